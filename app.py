@@ -3,6 +3,7 @@ from flask import Flask
 from flask_socketio import SocketIO
 from flask_migrate import Migrate
 from extensions import db
+from socket_manager import socketio_options
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY") or "a secret key"
@@ -14,14 +15,18 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 
 db.init_app(app)
 migrate = Migrate(app, db)
-socketio = SocketIO(app)
+socketio = SocketIO(app, **socketio_options())
 
 from models import Transcription, Assessment, Project
-from routes import init_routes
+from routes import init_routes, start_background_services
+from commands import init_commands
 
 init_routes(app, socketio)
+init_commands(app)
 
 if __name__ == '__main__':
+    # main.py is the entrypoint to use under eventlet: it monkey-patches before anything is imported.
     with app.app_context():
         db.create_all()
+    start_background_services(app, socketio)
     socketio.run(app, host='0.0.0.0', port=5000)
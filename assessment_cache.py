@@ -0,0 +1,183 @@
+import os
+import re
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from flask import has_app_context
+from sqlalchemy.orm import Session
+from extensions import db
+from models import AssessmentCacheEntry
+from metrics import Collected
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.environ.get("ASSESSMENT_CACHE_MAX_ENTRIES", 1024))
+CACHE_TTL_SECONDS = int(os.environ.get("ASSESSMENT_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+CACHE_PERSISTENT = os.environ.get("ASSESSMENT_CACHE_PERSISTENT", "1") == "1"
+# Expired rows are deleted at most this often, from whichever process writes to the cache next.
+CACHE_PURGE_INTERVAL_SECONDS = int(os.environ.get("ASSESSMENT_CACHE_PURGE_INTERVAL_SECONDS", 3600))
+
+
+def normalize_transcript(text: str) -> str:
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def make_cache_key(transcription: str, framework: str, model: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_transcript(transcription), framework, model, prompt_version):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class AssessmentCache:
+    """Two-tier cache: an in-memory LRU in front of the assessment_cache_entry table.
+
+    The table is read and written through short-lived sessions of its own, so a lookup
+    never commits or rolls back work pending in the caller's ``db.session``.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS, persistent=CACHE_PERSISTENT,
+                 purge_interval_seconds=CACHE_PURGE_INTERVAL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = time.time() + purge_interval_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'evictions': 0, 'saved_seconds': 0.0}
+
+    def get(self, key):
+        return self.get_any([key])[1]
+
+    def get_any(self, keys):
+        """The first live entry among ``keys`` as ``(key, result)``, or ``(None, None)``.
+
+        However many keys are tried, the stats count a single lookup.
+        """
+        for key in keys:
+            hit = self._lookup(key)
+            if hit is not None:
+                source, result, latency_ms = hit
+                with self._lock:
+                    self.stats[source] += 1
+                    self.stats['saved_seconds'] += latency_ms / 1000.0
+                return key, copy.deepcopy(result)
+        with self._lock:
+            self.stats['misses'] += 1
+        return None, None
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result, latency_ms = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return 'memory_hits', result, latency_ms
+                del self._entries[key]
+
+        row = self._load(key)
+        if row is None:
+            return None
+        # created_at is naive UTC; .timestamp() alone would read it as local time.
+        self._remember(key, row.result, row.latency_ms or 0, row.created_at.replace(tzinfo=timezone.utc).timestamp())
+        return 'db_hits', row.result, row.latency_ms or 0
+
+    def set(self, key, result, framework, model, prompt_version, latency_ms=0):
+        self._remember(key, copy.deepcopy(result), latency_ms, time.time())
+        if not self._db_available():
+            return
+        try:
+            with self._session() as session:
+                entry = session.get(AssessmentCacheEntry, key)
+                if entry is None:
+                    entry = AssessmentCacheEntry(key=key, framework=framework, model=model,
+                                                 prompt_version=prompt_version)
+                    session.add(entry)
+                entry.result = result
+                entry.latency_ms = latency_ms
+                entry.created_at = datetime.utcnow()
+                session.commit()
+        except Exception as e:
+            logger.error(f"Error persisting assessment cache entry: {e}")
+        if time.time() >= self._next_purge:
+            self._next_purge = time.time() + self.purge_interval_seconds
+            try:
+                removed = self.purge_expired()
+                if removed:
+                    logger.info(f"Purged {removed} expired assessment cache entries")
+            except Exception as e:
+                logger.error(f"Error purging assessment cache entries: {e}")
+
+    def purge_expired(self):
+        """Delete persisted entries older than the TTL; returns the number removed."""
+        if not self._db_available():
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        with self._session() as session:
+            removed = session.query(AssessmentCacheEntry).filter(AssessmentCacheEntry.created_at < cutoff).delete()
+            session.commit()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats, memory_entries=len(self._entries))
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['memory_hits'] + stats['db_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, result, latency_ms, stored_at):
+        with self._lock:
+            self._entries[key] = (stored_at, result, latency_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _load(self, key):
+        if not self._db_available():
+            return None
+        try:
+            with self._session() as session:
+                row = session.get(AssessmentCacheEntry, key)
+                if row is None:
+                    return None
+                if datetime.utcnow() - row.created_at > timedelta(seconds=self.ttl_seconds):
+                    session.delete(row)
+                    session.commit()
+                    return None
+                row.hits = (row.hits or 0) + 1
+                session.commit()
+                return row
+        except Exception as e:
+            logger.error(f"Error reading assessment cache entry: {e}")
+            return None
+
+    def _session(self):
+        # Rows stay readable after the session closes.
+        return Session(db.engine, expire_on_commit=False)
+
+    def _db_available(self):
+        return self.persistent and has_app_context()
+
+
+assessment_cache = AssessmentCache()
+
+Collected('verita_assessment_cache_hit_ratio', 'Share of assessment cache lookups served from memory or the database.',
+          collect=lambda: {(): assessment_cache.snapshot()['hit_ratio']})
+Collected('verita_assessment_cache_lookups_total', 'Assessment cache lookups by result.', ['result'],
+          collect=lambda: {(result,): assessment_cache.snapshot()[result]
+                           for result in ('memory_hits', 'db_hits', 'misses')},
+          kind='counter')
@@ -0,0 +1,104 @@
+import os
+import wave
+from collections import namedtuple
+import numpy as np
+
+AUDIO_CHUNK_MIN_SECONDS = float(os.environ.get("AUDIO_CHUNK_MIN_SECONDS", 20))
+AUDIO_CHUNK_MAX_SECONDS = float(os.environ.get("AUDIO_CHUNK_MAX_SECONDS", 60))
+# Windows quieter than this (dB relative to full scale) count as silence.
+SILENCE_THRESHOLD_DB = float(os.environ.get("SILENCE_THRESHOLD_DB", -40))
+SILENCE_MIN_SECONDS = float(os.environ.get("SILENCE_MIN_SECONDS", 0.4))
+
+WINDOW_SECONDS = 0.02
+READ_BLOCK_WINDOWS = 500
+SAMPLE_TYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+AudioChunk = namedtuple('AudioChunk', ['index', 'start_frame', 'end_frame', 'sample_rate'])
+
+
+def open_wave(path):
+    """Open a PCM WAV file, rejecting formats the chunker cannot decode."""
+    try:
+        audio = wave.open(path, 'rb')
+    except (wave.Error, EOFError):
+        raise ValueError("Audio must be an uncompressed PCM WAV file")
+    if audio.getsampwidth() not in SAMPLE_TYPES:
+        audio.close()
+        raise ValueError(f"Unsupported sample width: {audio.getsampwidth() * 8} bits")
+    return audio
+
+
+def to_mono(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Decode PCM frames to mono float samples in [-1, 1]."""
+    samples = np.frombuffer(frames, dtype=SAMPLE_TYPES[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples = (samples - 128) / 128
+    else:
+        samples /= float(2 ** (8 * sample_width - 1))
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+
+
+def read_chunk(path, chunk: AudioChunk) -> np.ndarray:
+    with open_wave(path) as audio:
+        audio.setpos(chunk.start_frame)
+        frames = audio.readframes(chunk.end_frame - chunk.start_frame)
+        return to_mono(frames, audio.getsampwidth(), audio.getnchannels())
+
+
+def iter_window_levels(audio, window_frames):
+    """Yield the level in dBFS of each ``window_frames`` window, reading the file block by block."""
+    sample_width, channels = audio.getsampwidth(), audio.getnchannels()
+    while True:
+        frames = audio.readframes(window_frames * READ_BLOCK_WINDOWS)
+        if not frames:
+            return
+        samples = to_mono(frames, sample_width, channels)
+        windows = -(-len(samples) // window_frames)
+        padded = np.zeros(windows * window_frames, dtype=np.float32)
+        padded[:len(samples)] = samples
+        rms = np.sqrt(np.mean(padded.reshape(windows, window_frames) ** 2, axis=1))
+        yield from 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def find_chunks(path, min_seconds=AUDIO_CHUNK_MIN_SECONDS, max_seconds=AUDIO_CHUNK_MAX_SECONDS,
+                threshold_db=SILENCE_THRESHOLD_DB, min_silence=SILENCE_MIN_SECONDS) -> list:
+    """Split a recording into chunks of ``min_seconds`` to ``max_seconds``, cutting inside pauses.
+
+    Once a chunk is long enough it ends in the middle of the next pause of at least
+    ``min_silence``; with no pause it is cut at ``max_seconds``. Only levels are kept
+    while scanning, so memory stays flat however long the file is.
+    """
+    with open_wave(path) as audio:
+        sample_rate, total_frames = audio.getframerate(), audio.getnframes()
+        window_frames = max(1, int(sample_rate * WINDOW_SECONDS))
+        min_frames, max_frames = int(min_seconds * sample_rate), int(max_seconds * sample_rate)
+        silence_windows = max(1, int(min_silence / WINDOW_SECONDS))
+
+        boundaries = [0]
+        silent_run = 0
+        for position, level in enumerate(iter_window_levels(audio, window_frames)):
+            silent_run = silent_run + 1 if level < threshold_db else 0
+            window_end = (position + 1) * window_frames
+            length = window_end - boundaries[-1]
+            if silent_run >= silence_windows and length >= min_frames:
+                boundaries.append(window_end - silent_run * window_frames // 2)
+                silent_run = 0
+            elif length >= max_frames:
+                boundaries.append(window_end)
+                silent_run = 0
+    if total_frames - boundaries[-1] < sample_rate * min_silence and len(boundaries) > 1:
+        boundaries.pop()
+    boundaries.append(total_frames)
+    return [AudioChunk(index, start, end, sample_rate)
+            for index, (start, end) in enumerate(zip(boundaries, boundaries[1:])) if end > start]
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
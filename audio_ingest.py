@@ -0,0 +1,202 @@
+import os
+import uuid
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from extensions import db
+from audio_chunking import find_chunks, format_timestamp, open_wave
+from speech_engines import get_speech_engine, transcribe_chunk
+from grading_framework import (grade_transcription, merge_assessments, with_app_context, is_too_short,
+                               is_error_assessment, VERIFY_QUOTES, LONG_TRANSCRIPT_WORKERS)
+from grading_jobs import (grade_frameworks_job, load_transcription, load_quote_index, store_assessment,
+                          embed_stored_assessments)
+from quote_index import verify_evidence
+from transcript_chunking import chunk_transcript, estimate_tokens, CHUNK_TOKEN_BUDGET, LONG_TRANSCRIPT_TOKENS
+from job_queue import task
+from metrics import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AUDIO_UPLOAD_DIR = os.environ.get("AUDIO_UPLOAD_DIR", "uploads")
+AUDIO_MAX_BYTES = int(os.environ.get("AUDIO_MAX_BYTES", 2 * 1024 ** 3))
+KEEP_AUDIO_UPLOADS = os.environ.get("KEEP_AUDIO_UPLOADS", "0") == "1"
+TRANSCRIPTION_WORKERS = int(os.environ.get("TRANSCRIPTION_WORKERS", os.cpu_count() or 2))
+UPLOAD_BUFFER_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+def save_upload(stream, max_bytes=AUDIO_MAX_BYTES) -> str:
+    """Copy an upload stream to AUDIO_UPLOAD_DIR one buffer at a time and check it is a usable WAV file."""
+    os.makedirs(AUDIO_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(AUDIO_UPLOAD_DIR, f"{uuid.uuid4().hex}.wav")
+    written = 0
+    try:
+        with open(path, 'wb') as output:
+            while True:
+                block = stream.read(UPLOAD_BUFFER_BYTES)
+                if not block:
+                    break
+                written += len(block)
+                if written > max_bytes:
+                    raise UploadTooLargeError(f"Audio uploads are limited to {max_bytes} bytes")
+                output.write(block)
+        open_wave(path).close()
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_transcription_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: forking a threaded or eventlet server can deadlock the child.
+            # Spawned workers re-import __main__, so entry scripts keep their side effects (monkey-patching,
+            # building the app, start_background_services) under an ``if __name__ == '__main__'`` guard.
+            _pool = ProcessPoolExecutor(max_workers=TRANSCRIPTION_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+class ProgressiveGrader:
+    """Grades a long transcript segment by segment while later audio is still being transcribed.
+
+    Nothing starts until the text is known to be long, so shorter recordings are graded
+    whole like pasted text. Segments and the merge match ``grade_long_transcription``.
+    """
+
+    def __init__(self, frameworks):
+        self.frameworks = frameworks
+        self.pending = []
+        self.pending_tokens = 0
+        self.total_tokens = 0
+        self.segments = []
+        self.futures = {framework: [] for framework in frameworks}
+        self._executor = None
+
+    @property
+    def started(self):
+        return bool(self.segments)
+
+    def add(self, line):
+        tokens = estimate_tokens(line)
+        self.pending.append(line)
+        self.pending_tokens += tokens
+        self.total_tokens += tokens
+        if not self.started:
+            if self.total_tokens > LONG_TRANSCRIPT_TOKENS:
+                *ready, rest = chunk_transcript('\n'.join(self.pending))
+                for segment in ready:
+                    self.submit(segment)
+                self.pending, self.pending_tokens = [rest], estimate_tokens(rest)
+        elif self.pending_tokens >= CHUNK_TOKEN_BUDGET:
+            self.submit('\n'.join(self.pending))
+            self.pending, self.pending_tokens = [], 0
+
+    def submit(self, segment):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=LONG_TRANSCRIPT_WORKERS)
+        # Quotes are verified once against the whole transcript after merging.
+        grade = with_app_context(lambda framework: grade_transcription(segment, framework, verify_quotes=False,
+                                                                       route=False))
+        for framework in self.frameworks:
+            self.futures[framework].append(self._executor.submit(grade, framework))
+        self.segments.append(segment)
+
+    def finish(self, job, transcription):
+        remainder = '\n'.join(self.pending)
+        if remainder and not is_too_short(remainder):
+            self.submit(remainder)
+        quote_index = load_quote_index(transcription)
+        weights = [estimate_tokens(segment) for segment in self.segments]
+        job.progress('grading', transcription_id=transcription.id, frameworks=self.frameworks)
+        stored = []
+        for framework in self.frameworks:
+            assessment = merge_assessments([job.wait(future) for future in self.futures[framework]], weights)
+            if VERIFY_QUOTES and not is_error_assessment(assessment):
+                assessment = verify_evidence(assessment, transcription.text, quote_index)
+            stored.append(store_assessment(transcription, framework, assessment))
+            job.emit('assessment_result', {
+                'transcription_id': transcription.id,
+                'framework': framework,
+                'assessment': assessment,
+                'completed': len(stored),
+                'total': len(self.frameworks)
+            })
+        embed_stored_assessments(stored)
+        return {'transcription_id': transcription.id,
+                'assessment_ids': {assessment.framework: assessment.id for assessment in stored}}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@task('transcribe_audio')
+def transcribe_audio_job(job, transcription_id, path, frameworks, engine_name=None):
+    """Transcribe an uploaded recording chunk by chunk in the process pool, then grade it.
+
+    Chunks are stitched in order into ``[HH:MM:SS] text`` lines as they finish; long
+    recordings start grading before the last chunk is transcribed.
+    """
+    transcription = load_transcription(transcription_id)
+    grader = ProgressiveGrader(frameworks)
+    futures = []
+    try:
+        engine = get_speech_engine(engine_name)
+        job.progress('splitting', transcription_id=transcription_id)
+        with span('audio_split'):
+            chunks = find_chunks(path)
+        logger.info(f"Transcribing {path} in {len(chunks)} chunks with the {engine.name} engine")
+        job.progress('transcribing', transcription_id=transcription_id, total=len(chunks))
+
+        lines = []
+        pool = get_transcription_pool()
+        with span('speech_to_text'):
+            futures = [pool.submit(transcribe_chunk, engine, path, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                text = job.wait(future)
+                start = chunk.start_frame / chunk.sample_rate
+                job.emit('transcription_chunk', {
+                    'transcription_id': transcription_id,
+                    'index': chunk.index,
+                    'total': len(chunks),
+                    'start_seconds': round(start, 2),
+                    'text': text
+                })
+                if text:
+                    line = f"[{format_timestamp(start)}] {text}"
+                    lines.append(line)
+                    grader.add(line)
+
+        transcription.text = '\n'.join(lines)
+        db.session.commit()
+        job.emit('transcription_complete', {'transcription_id': transcription_id, 'chunks': len(chunks),
+                                            'characters': len(transcription.text)})
+        if not grader.started:
+            return grade_frameworks_job(job, transcription_id, frameworks)
+        return grader.finish(job, transcription)
+    except Exception:
+        db.session.rollback()
+        if not transcription.text:
+            # Nothing was transcribed, so the placeholder row would only clutter listings and exports.
+            logger.info(f"Removing transcription {transcription_id} after failed audio transcription")
+            db.session.delete(transcription)
+            db.session.commit()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+        grader.close()
+        if not KEEP_AUDIO_UPLOADS and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,70 @@
+"""Throughput of the bulk Assessment insert path used by batch imports.
+
+Times ``bulk_import.insert_assessments`` (core insert, project rollup and item
+embeddings) over synthetic results, committing after each batch like a batch import does.
+
+    python benchmarks/bulk_insert.py --rows 100000 --batch-size 1000
+"""
+import sys
+import time
+import random
+import argparse
+
+from common import add_common_arguments, configure_environment, create_app_tables, emit_report, percentiles, \
+    synthetic_result, synthetic_transcript
+
+
+def seed_transcriptions(db, project_id, count):
+    from sqlalchemy import insert
+    from models import Transcription
+    rows = [{'text': synthetic_transcript(index, lines=5), 'project_id': project_id} for index in range(count)]
+    ids = db.session.scalars(insert(Transcription).returning(Transcription.id, sort_by_parameter_order=True),
+                             rows).all()
+    db.session.commit()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per insert_assessments call and commit.')
+    parser.add_argument('--transcriptions', type=int, default=1000, help='Transcriptions the rows are spread over.')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    app = create_app_tables()
+    from extensions import db
+    from models import Project
+    from bulk_import import insert_assessments
+
+    rng = random.Random(0)
+    with app.app_context():
+        project = Project(name='Benchmark')
+        db.session.add(project)
+        db.session.commit()
+        transcription_ids = seed_transcriptions(db, project.id, args.transcriptions)
+
+        batch_times = []
+        started = time.perf_counter()
+        for offset in range(0, args.rows, args.batch_size):
+            rows = [{'transcription_id': rng.choice(transcription_ids), 'framework': 'nielsen',
+                     'result': synthetic_result(rng)} for _ in range(min(args.batch_size, args.rows - offset))]
+            batch_started = time.perf_counter()
+            insert_assessments(rows, project.id)
+            db.session.commit()
+            batch_times.append(time.perf_counter() - batch_started)
+        elapsed = time.perf_counter() - started
+
+    emit_report('bulk_insert', {key: value for key, value in vars(args).items() if key != 'output'}, dict(
+        percentiles(batch_times),
+        batches=len(batch_times),
+        elapsed_s=round(elapsed, 2),
+        insert_s=round(sum(batch_times), 2),
+        rows_per_s=round(args.rows / sum(batch_times), 1) if batch_times else 0,
+    ), args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
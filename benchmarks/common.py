@@ -0,0 +1,117 @@
+"""Shared helpers for the offline benchmarks: environment setup, percentiles and JSON reports."""
+import os
+import sys
+import json
+import random
+import logging
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def add_common_arguments(parser):
+    parser.add_argument('--database-url', default=None,
+                        help='Database to benchmark against; defaults to a throwaway SQLite file.')
+    parser.add_argument('--output', default=None, help='Append the JSON report as one line to this file.')
+
+
+def configure_environment(database_url=None, openai_base_url=None):
+    """Point the app at local stand-ins; must run before ``app`` is imported."""
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='verita-bench-'), 'bench.db')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+    os.environ.setdefault('EMBEDDING_BACKEND', 'local')
+    os.environ.setdefault('BATCH_BACKEND', 'local')
+    if openai_base_url:
+        os.environ['OPENAI_BASE_URL'] = openai_base_url
+    return database_url
+
+
+def create_app_tables():
+    from app import app
+    from extensions import db
+    # Per-request INFO logging would dominate the timings at load.
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def percentiles(samples) -> dict:
+    """p50/p95/p99/max in milliseconds from samples in seconds (nearest-rank)."""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    ordered = sorted(samples)
+
+    def rank(fraction):
+        return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))] * 1000
+
+    return {'p50_ms': round(rank(0.50), 2), 'p95_ms': round(rank(0.95), 2), 'p99_ms': round(rank(0.99), 2),
+            'max_ms': round(ordered[-1] * 1000, 2)}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit_report(name, parameters, results, output=None) -> dict:
+    """Print the report as JSON and optionally append it to ``output`` for run-over-run comparison."""
+    report = {
+        'benchmark': name,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'parameters': parameters,
+        'results': dict(results, peak_rss_mb=peak_rss_mb()),
+    }
+    line = json.dumps(report)
+    print(line)
+    if output:
+        with open(output, 'a') as history:
+            history.write(line + '\n')
+    return report
+
+
+WORDS = ("export", "settings", "dashboard", "search", "onboarding", "checkout", "filter", "report", "save",
+         "navigation", "confusing", "slow", "helpful", "missing", "button", "menu", "share", "invite")
+
+
+def synthetic_transcript(index, lines=20, rng=None):
+    """A timestamped interview transcript that differs per ``index`` so content caches miss."""
+    rng = rng or random.Random(index)
+    body = []
+    for line in range(lines):
+        words = ' '.join(rng.choice(WORDS) for _ in range(12))
+        body.append(f"[00:{line // 60:02d}:{line % 60:02d}] Participant {index}: {words}")
+    return '\n'.join(body)
+
+
+def synthetic_result(rng) -> dict:
+    def items(low, high):
+        return [' '.join(rng.choice(WORDS) for _ in range(6)) for _ in range(rng.randint(low, high))]
+
+    return {
+        'key_insights': items(1, 5),
+        'user_pain_points': items(0, 4),
+        'areas_for_improvement': items(0, 4),
+        'overall_quality_score': rng.randint(20, 95),
+        'recommendations': items(1, 3),
+        'framework_specific_analysis': {'summary': ' '.join(rng.choice(WORDS) for _ in range(20))},
+    }
+
@@ -0,0 +1,90 @@
+"""Latency of ``/api/insights`` over a synthetic dataset of 10k to 1M assessments.
+
+The dataset is seeded with plain core inserts (no embeddings) and the project rollup is
+rebuilt once at the end, so even the 1M case seeds in minutes. Cold requests carry a unique
+query string so the response cache misses; warm requests repeat one URL.
+
+    python benchmarks/insights.py --assessments 1000000 --projects 50 --requests 200
+"""
+import sys
+import time
+import random
+import argparse
+
+from common import add_common_arguments, configure_environment, create_app_tables, emit_report, percentiles, \
+    synthetic_result
+
+SEED_CHUNK_SIZE = 5000
+
+
+def seed_dataset(db, assessments, projects, per_transcription, rng):
+    from sqlalchemy import insert
+    from models import Project, Transcription, Assessment, assessment_metrics
+    from commands import rebuild_project_stats
+
+    project_ids = db.session.scalars(insert(Project).returning(Project.id, sort_by_parameter_order=True),
+                                     [{'name': f'Benchmark {index}'} for index in range(projects)]).all()
+    inserted = 0
+    while inserted < assessments:
+        chunk = min(SEED_CHUNK_SIZE, assessments - inserted)
+        transcriptions = [{'text': f'Synthetic transcript {inserted + index}', 'project_id': rng.choice(project_ids)}
+                          for index in range(0, chunk, per_transcription)]
+        transcription_ids = db.session.scalars(
+            insert(Transcription).returning(Transcription.id, sort_by_parameter_order=True), transcriptions).all()
+        rows = []
+        for index in range(chunk):
+            position = index // per_transcription
+            result = synthetic_result(rng)
+            rows.append(dict(transcription_id=transcription_ids[position],
+                             project_id=transcriptions[position]['project_id'],
+                             framework=rng.choice(('nielsen', 'ideo', 'double_diamond')), result=result,
+                             **assessment_metrics(result)))
+        db.session.execute(insert(Assessment), rows)
+        db.session.commit()
+        inserted += chunk
+    rebuild_project_stats()
+
+
+def time_requests(client, count, path):
+    timings, failures = [], 0
+    for index in range(count):
+        started = time.perf_counter()
+        response = client.get(path(index))
+        timings.append(time.perf_counter() - started)
+        failures += response.status_code != 200
+    return timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assessments', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--per-transcription', type=int, default=3, help='Assessments per synthetic transcription.')
+    parser.add_argument('--requests', type=int, default=100, help='Requests timed for each of cold and warm.')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    app = create_app_tables()
+    from extensions import db
+
+    with app.app_context():
+        seed_started = time.perf_counter()
+        seed_dataset(db, args.assessments, args.projects, args.per_transcription, random.Random(0))
+        seed_elapsed = time.perf_counter() - seed_started
+        db.session.remove()
+
+    client = app.test_client()
+    cold, cold_failures = time_requests(client, args.requests, lambda index: f'/api/insights?run={index}')
+    warm, warm_failures = time_requests(client, args.requests, lambda index: '/api/insights')
+
+    emit_report('insights', {key: value for key, value in vars(args).items() if key != 'output'}, dict(
+        seed_s=round(seed_elapsed, 2),
+        cold=dict(percentiles(cold), requests_per_s=round(len(cold) / sum(cold), 1), failures=cold_failures),
+        warm=dict(percentiles(warm), requests_per_s=round(len(warm) / sum(warm), 1), failures=warm_failures),
+    ), args.output)
+    return 0 if not cold_failures and not warm_failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Throughput by worker count: N app processes sharing a database and a Socket.IO message queue.
+
+For each worker count the same total number of clients is split across that many
+``socketio_load.py`` processes. Every process relays its events through the shared
+queue, so the numbers include the fan-out cost a real multi-worker deployment pays.
+SQLite serializes writers across processes; pass ``--database-url`` with PostgreSQL for
+numbers that reflect production. Reports from earlier runs are kept in
+``benchmarks/results/scale_out.jsonl``.
+
+    python benchmarks/scale_out.py --workers 1 2 4 --clients 32 --requests 4 --latency 0.5 \
+        --output benchmarks/results/scale_out.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from common import ROOT, add_common_arguments, configure_environment, create_app_tables, emit_report
+
+LOAD_SCRIPT = os.path.join(ROOT, 'benchmarks', 'socketio_load.py')
+
+
+def run_workers(count, args, database_url, queue_url, first_transcript=0):
+    # The client-side rate limits are per process; lifted so the runs compare workers, not limiter budgets.
+    env = dict(os.environ, SOCKETIO_MESSAGE_QUEUE=queue_url, DATABASE_URL=database_url,
+               OPENAI_REQUESTS_PER_MINUTE='1000000', OPENAI_TOKENS_PER_MINUTE='1000000000')
+    share, extra = divmod(args.clients, count)
+    processes = []
+    first = first_transcript
+    for index in range(count):
+        clients = share + (index < extra)
+        # Distinct transcripts per process and run; repeats would be served from the assessment cache.
+        command = [sys.executable, LOAD_SCRIPT, '--clients', str(clients), '--first-transcript', str(first),
+                   '--requests', str(args.requests), '--latency', str(args.latency), '--jitter', str(args.jitter),
+                   '--database-url', database_url]
+        first += clients * args.requests
+        processes.append(subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                                          stderr=subprocess.DEVNULL, text=True))
+    reports = []
+    for process in processes:
+        output, _ = process.communicate()
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    results = [report['results'] for report in reports]
+    # Workers start at slightly different times; the slowest one bounds the wall clock.
+    elapsed = max(result['elapsed_s'] for result in results)
+    completed = sum(result['completed'] for result in results)
+    return {
+        'workers': count,
+        'completed': completed,
+        'errors': sum(result['errors'] for result in results),
+        'elapsed_s': elapsed,
+        'requests_per_s': round(completed / elapsed, 2) if elapsed else 0,
+        'events_per_s': round(sum(result['events'] for result in results) / elapsed, 2) if elapsed else 0,
+        'worst_p95_ms': max(result['p95_ms'] or 0 for result in results),
+        'worst_p99_ms': max(result['p99_ms'] or 0 for result in results),
+        'peak_rss_mb_per_worker': max(result['peak_rss_mb'] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=32, help='Total clients, split across the workers.')
+    parser.add_argument('--requests', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--jitter', type=float, default=0.1)
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    database_url = configure_environment(args.database_url)
+    create_app_tables()
+
+    runs = []
+    for count in args.workers:
+        queue_url = f"file://{tempfile.mkdtemp(prefix='verita-mq-')}"
+        runs.append(run_workers(count, args, database_url, queue_url, len(runs) * args.clients * args.requests))
+    baseline = runs[0]['requests_per_s'] or 1
+    for run in runs:
+        run['speedup'] = round(run['requests_per_s'] / baseline, 2)
+    emit_report('scale_out', {key: value for key, value in vars(args).items() if key != 'output'},
+                {'runs': runs}, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
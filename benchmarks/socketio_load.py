@@ -0,0 +1,109 @@
+"""Load test: concurrent Socket.IO clients sending ``transcribe`` against a fake OpenAI server.
+
+Each client emits a transcript, waits for its ``assessment_result`` (or ``assessment_error``)
+and repeats; error stubs stored after failed OpenAI calls count as errors. Latency is measured from the emit to the final event, so it covers the
+commit, the job queue, the OpenAI round trip and storing the assessment.
+
+    python benchmarks/socketio_load.py --clients 50 --requests 4 --latency 0.8 --jitter 0.3 --error-rate 0.02
+"""
+import sys
+import time
+import argparse
+import threading
+
+from common import (add_common_arguments, configure_environment, create_app_tables, emit_report, percentiles,
+                    synthetic_transcript)
+
+FINAL_EVENTS = ('assessment_result', 'assessment_error')
+
+
+def run_client(socketio, app, client_index, args, results):
+    from grading_framework import is_error_assessment
+    client = socketio.test_client(app)
+    latencies, events, errors = [], 0, 0
+    for request_index in range(args.requests):
+        started = time.perf_counter()
+        ack = client.emit('transcribe', {
+            'transcription': synthetic_transcript(args.first_transcript + client_index * args.requests + request_index,
+                                                  args.lines),
+            'framework': args.framework,
+            'stream': args.stream,
+        }, callback=True)
+        if not ack or 'error' in ack:
+            errors += 1
+            continue
+        deadline = started + args.timeout
+        finished = False
+        while not finished and time.perf_counter() < deadline:
+            for event in client.get_received():
+                events += 1
+                payload = (event['args'] or [{}])[0]
+                if event['name'] in FINAL_EVENTS and payload.get('job_id') == ack['job_id']:
+                    finished = True
+                    errors += event['name'] == 'assessment_error' or \
+                        is_error_assessment(payload.get('assessment') or {})
+            if not finished:
+                time.sleep(0.005)
+        if finished:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    client.disconnect()
+    results[client_index] = (latencies, events, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=5, help='Transcripts sent by each client, one at a time.')
+    parser.add_argument('--framework', default='nielsen')
+    parser.add_argument('--stream', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--lines', type=int, default=20, help='Lines per synthetic transcript.')
+    parser.add_argument('--first-transcript', type=int, default=0,
+                        help='Index of the first synthetic transcript; processes sharing a database need disjoint ranges.')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Seconds to wait for each result.')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake OpenAI response latency in seconds.')
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Delay between streamed chunks.')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    from fake_openai import FakeOpenAIServer
+    server = FakeOpenAIServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              rate_limit_rate=args.rate_limit_rate, retry_after=0,
+                              chunk_delay=args.chunk_delay, seed=0).start()
+    configure_environment(args.database_url, openai_base_url=server.base_url)
+    app = create_app_tables()
+    from app import socketio
+
+    results = {}
+    threads = [threading.Thread(target=run_client, args=(socketio, app, index, args, results))
+               for index in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    latencies = [latency for client_latencies, _, _ in results.values() for latency in client_latencies]
+    events = sum(client_events for _, client_events, _ in results.values())
+    errors = sum(client_errors for _, _, client_errors in results.values())
+    emit_report('socketio_load', {key: value for key, value in vars(args).items() if key != 'output'}, dict(
+        percentiles(latencies),
+        completed=len(latencies),
+        errors=errors,
+        elapsed_s=round(elapsed, 2),
+        requests_per_s=round(len(latencies) / elapsed, 2),
+        events=events,
+        events_per_s=round(events / elapsed, 2),
+        fake_openai=server.stats,
+    ), args.output)
+    return 0 if latencies else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
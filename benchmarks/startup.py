@@ -0,0 +1,58 @@
+"""Cold-start benchmark: time ``import app`` in fresh interpreters.
+
+Guards against heavy work creeping back into import time (network calls, SDK
+construction). Exits non-zero when the median exceeds ``--max-ms``.
+
+    python benchmarks/startup.py --runs 10 --max-ms 1500
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    "import time; started = time.perf_counter(); import app; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def measure(runs, env):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=1500.0, help='Fail if the median import time exceeds this.')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    # Without a key the old eager client would fail at import; this proves construction is lazy.
+    env.pop('OPENAI_API_KEY', None)
+
+    timings = measure(args.runs, env)
+    report = {
+        'benchmark': 'startup',
+        'runs': args.runs,
+        'median_ms': round(statistics.median(timings), 1),
+        'min_ms': round(min(timings), 1),
+        'max_ms': round(max(timings), 1),
+        'threshold_ms': args.max_ms,
+    }
+    report['passed'] = report['median_ms'] <= args.max_ms
+    print(json.dumps(report))
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
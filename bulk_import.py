@@ -0,0 +1,259 @@
+import io
+import json
+import logging
+import zipfile
+from datetime import datetime
+from sqlalchemy import insert, select
+from extensions import db
+from models import (Transcription, Assessment, BulkImport, assessment_metrics,
+                    apply_project_stats, project_stats_delta)
+from grading_framework import (build_messages, parse_assessment, create_error_assessment,
+                               create_short_input_assessment, is_too_short, is_error_assessment, DEFAULT_MODEL,
+                               JSON_MODE, VERIFY_QUOTES)
+from quote_index import build_quote_index, verify_evidence
+from embeddings import embed_assessments
+from socket_manager import project_room
+from batch_backends import (get_batch_backend, build_request_line, MAX_BATCH_REQUESTS,
+                            PENDING_STATUSES, FAILED_STATUSES)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INSERT_CHUNK_SIZE = 500
+UNFINISHED_STATUSES = ('pending', 'running')
+
+
+def read_records(stream, filename: str):
+    """Yield ``{"text": ..., "framework": ...}`` records from a JSONL file or a ZIP of .txt/.jsonl files."""
+    if filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(stream) as archive:
+            for name in archive.namelist():
+                if name.endswith('/'):
+                    continue
+                with archive.open(name) as member:
+                    yield from read_records(member, name)
+    elif filename.lower().endswith('.txt'):
+        text = io.TextIOWrapper(stream, encoding='utf-8').read()
+        if text.strip():
+            yield {'text': text}
+    else:
+        for line_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get('text') or record.get('transcription')
+            if not text:
+                raise ValueError(f"{filename}:{line_number} has no text or transcription field")
+            yield {'text': text, 'framework': record.get('framework')}
+
+
+def create_bulk_import(records, project_id, framework, model=DEFAULT_MODEL, backend_name=None):
+    """Insert all transcriptions in one statement and submit their grading as batches."""
+    backend = get_batch_backend(backend_name)
+    records = list(records)
+    if not records:
+        raise ValueError("No transcripts found in upload")
+
+    # Bulk inserts skip ORM events, so the quote index is built here rather than in populate_quote_index.
+    rows = [{'text': record['text'], 'project_id': project_id, 'created_at': datetime.utcnow(),
+             'quote_index': build_quote_index(record['text'])} for record in records]
+    transcription_ids = db.session.scalars(
+        insert(Transcription).returning(Transcription.id, sort_by_parameter_order=True), rows
+    ).all()
+
+    bulk_import = BulkImport(project_id=project_id, framework=framework, model=model, backend=backend.name,
+                             total=len(records), batch_ids=[], completed_batch_ids=[])
+    db.session.add(bulk_import)
+
+    requests = []
+    short_assessments = []
+    for transcription_id, record in zip(transcription_ids, records):
+        record_framework = record.get('framework') or framework
+        if is_too_short(record['text']):
+            short_assessments.append({'transcription_id': transcription_id, 'framework': record_framework,
+                                      'result': create_short_input_assessment(), 'model': None})
+            continue
+        messages = build_messages(record['text'], record_framework)
+        requests.append(build_request_line(f"transcription-{transcription_id}:{record_framework}", messages, model,
+                                           json_mode=JSON_MODE))
+
+    if short_assessments:
+        insert_assessments(short_assessments, project_id)
+        count_results(bulk_import, short_assessments)
+
+    batch_ids = []
+    for start in range(0, len(requests), MAX_BATCH_REQUESTS):
+        batch_ids.append(backend.submit(requests[start:start + MAX_BATCH_REQUESTS]))
+    bulk_import.batch_ids = batch_ids
+    bulk_import.status = 'running' if batch_ids else 'completed'
+    db.session.commit()
+    logger.info(f"Bulk import {bulk_import.id}: {len(records)} transcriptions, {len(batch_ids)} batches")
+    return bulk_import
+
+
+def insert_assessments(rows, project_id):
+    """Core bulk insert; ORM events do not fire here, so metrics, the project rollup and item
+    embeddings are applied explicitly."""
+    now = datetime.utcnow()
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = [dict(row, created_at=now, project_id=project_id, **assessment_metrics(row['result']))
+                 for row in rows[start:start + INSERT_CHUNK_SIZE]]
+        assessment_ids = db.session.scalars(
+            insert(Assessment).returning(Assessment.id, sort_by_parameter_order=True), chunk
+        ).all()
+        delta = project_stats_delta({}, count=0)
+        for row in chunk:
+            for key, value in project_stats_delta(row).items():
+                delta[key] += value
+        apply_project_stats(db.session.connection(), project_id, delta)
+        embed_rows([(assessment_id, row['transcription_id'], project_id, row['result'])
+                    for assessment_id, row in zip(assessment_ids, chunk)])
+
+
+def embed_rows(rows):
+    """Embed a chunk's items in a savepoint so an embeddings outage never loses graded results."""
+    try:
+        with db.session.begin_nested():
+            embed_assessments(rows)
+    except Exception as e:
+        logger.error(f"Embedding {len(rows)} imported assessments failed, backfill with embed-assessments: {e}")
+
+
+def poll_bulk_import(bulk_import_id) -> BulkImport:
+    """Check outstanding batches once and store any finished results.
+
+    Safe to call repeatedly or after a restart: completed batches are remembered and
+    transcriptions that already have an assessment are skipped.
+    """
+    bulk_import = db.session.get(BulkImport, bulk_import_id)
+    if bulk_import is None:
+        raise ValueError(f"Bulk import {bulk_import_id} not found")
+    if bulk_import.status in ('completed', 'failed'):
+        return bulk_import
+
+    backend = get_batch_backend(bulk_import.backend)
+    for batch_id in list(bulk_import.batch_ids):
+        # Row lock per batch so concurrent pollers (web worker and CLI) never store a batch twice.
+        db.session.refresh(bulk_import, with_for_update=True)
+        if batch_id in bulk_import.completed_batch_ids:
+            db.session.commit()
+            continue
+        status = backend.status(batch_id)
+        if status in PENDING_STATUSES:
+            db.session.commit()
+            continue
+        if status in FAILED_STATUSES:
+            bulk_import.error = f"Batch {batch_id} ended with status {status}"
+            logger.error(f"Bulk import {bulk_import.id}: {bulk_import.error}")
+        else:
+            store_batch_results(bulk_import, backend.results(batch_id))
+        bulk_import.completed_batch_ids = bulk_import.completed_batch_ids + [batch_id]
+        db.session.commit()
+
+    if set(bulk_import.batch_ids) <= set(bulk_import.completed_batch_ids):
+        bulk_import.status = 'failed' if bulk_import.error and not bulk_import.completed else 'completed'
+        db.session.commit()
+    return bulk_import
+
+
+def store_batch_results(bulk_import, results):
+    parsed = []
+    for custom_id, content, error in results:
+        transcription_key, _, framework = custom_id.partition(':')
+        transcription_id = int(transcription_key.split('-', 1)[1])
+        if error:
+            result = create_error_assessment(error)
+        else:
+            try:
+                result = parse_assessment(content)
+            except (json.JSONDecodeError, ValueError) as e:
+                logger.error(f"Unusable batch result for transcription {transcription_id}: {e}")
+                result = create_error_assessment("JSON parsing error")
+        parsed.append({'transcription_id': transcription_id, 'framework': framework or bulk_import.framework,
+                       'result': result, 'model': bulk_import.model})
+
+    for start in range(0, len(parsed), INSERT_CHUNK_SIZE):
+        chunk = parsed[start:start + INSERT_CHUNK_SIZE]
+        existing = set(db.session.scalars(
+            select(Assessment.transcription_id).where(
+                Assessment.transcription_id.in_([row['transcription_id'] for row in chunk]))
+        ))
+        rows = [row for row in chunk if row['transcription_id'] not in existing]
+        if VERIFY_QUOTES:
+            verify_rows(rows)
+        if rows:
+            insert_assessments(rows, bulk_import.project_id)
+        count_results(bulk_import, rows)
+
+
+def count_results(bulk_import, rows):
+    """Add stored rows to the progress totals: error stubs, too-short input included, count as failed."""
+    failed = sum(1 for row in rows if is_error_assessment(row['result']))
+    bulk_import.completed = (bulk_import.completed or 0) + len(rows) - failed
+    bulk_import.failed = (bulk_import.failed or 0) + failed
+
+
+def verify_rows(rows):
+    graded = [row for row in rows if 'error' not in row['result']['framework_specific_analysis']]
+    if not graded:
+        return
+    transcripts = {
+        transcription_id: (text, quote_index)
+        for transcription_id, text, quote_index in db.session.execute(
+            select(Transcription.id, Transcription.text, Transcription.quote_index).where(
+                Transcription.id.in_([row['transcription_id'] for row in graded])))
+    }
+    for row in graded:
+        text, quote_index = transcripts.get(row['transcription_id'], ('', None))
+        row['result'] = verify_evidence(row['result'], text, quote_index)
+
+
+def bulk_import_status(bulk_import):
+    return {
+        'bulk_import_id': bulk_import.id,
+        'project_id': bulk_import.project_id,
+        'status': bulk_import.status,
+        'backend': bulk_import.backend,
+        'total': bulk_import.total,
+        'completed': bulk_import.completed,
+        'failed': bulk_import.failed,
+        'batches': len(bulk_import.batch_ids),
+        'completed_batches': len(bulk_import.completed_batch_ids),
+        'error': bulk_import.error
+    }
+
+
+def resume_bulk_imports(app, socketio):
+    """Start a watcher for every import a previous process left unfinished; run at server start."""
+    try:
+        with app.app_context():
+            pending = db.session.query(BulkImport.id, BulkImport.project_id) \
+                .filter(BulkImport.status.in_(UNFINISHED_STATUSES)).all()
+            db.session.remove()
+    except Exception as e:
+        logger.warning(f"Could not check for unfinished bulk imports: {e}")
+        return
+    for bulk_import_id, project_id in pending:
+        logger.info(f"Resuming polling of bulk import {bulk_import_id}")
+        socketio.start_background_task(watch_bulk_import, app, socketio, bulk_import_id,
+                                       room=project_room(project_id) if project_id is not None else None)
+
+
+def watch_bulk_import(app, socketio, bulk_import_id, room=None, interval=30, max_interval=600):
+    """Poll a bulk import with exponential backoff until it finishes; run as a background task."""
+    while True:
+        with app.app_context():
+            try:
+                bulk_import = poll_bulk_import(bulk_import_id)
+                status = bulk_import_status(bulk_import)
+            except Exception as e:
+                logger.error(f"Error polling bulk import {bulk_import_id}: {e}")
+                db.session.rollback()
+                status = None
+        if status is not None:
+            if room is not None:
+                socketio.emit('bulk_import_progress', status, to=room)
+            if status['status'] in ('completed', 'failed'):
+                return status
+        socketio.sleep(interval)
+        interval = min(max_interval, interval * 2)
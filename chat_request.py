@@ -1,35 +1,287 @@
 import os
+import time
+import random
 import logging
-from openai import OpenAI, OpenAIError
+import threading
+from metrics import OPENAI_TOKENS, Collected
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    logger.error("OPENAI_API_KEY is not set in the environment variables")
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
+# Client layer configuration, shared by grading, batch submission and fine-tuning.
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", 120))
+OPENAI_CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", 5))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", 64))
+OPENAI_MAX_KEEPALIVE = int(os.environ.get("OPENAI_MAX_KEEPALIVE", 32))
+OPENAI_MAX_IN_FLIGHT = int(os.environ.get("OPENAI_MAX_IN_FLIGHT", 16))
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", 500))
+OPENAI_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_TOKENS_PER_MINUTE", 300000))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", 5))
+OPENAI_BACKOFF_BASE = float(os.environ.get("OPENAI_BACKOFF_BASE", 1.0))
+OPENAI_BACKOFF_MAX = float(os.environ.get("OPENAI_BACKOFF_MAX", 60.0))
+# Completion tokens reserved against the tokens/min bucket before the real usage is known.
+DEFAULT_COMPLETION_TOKENS = 1500
+HEALTH_CHECK_TTL_SECONDS = int(os.environ.get("HEALTH_CHECK_TTL_SECONDS", 60))
+# With USE_FINE_TUNED_MODEL=1, requests for this model are served by the latest successful fine-tune.
+# Opt-in: the fine-tune's base model must support JSON mode, or OPENAI_JSON_MODE must be turned off.
+FINE_TUNED_MODEL_REPLACES = os.environ.get("FINE_TUNED_MODEL_REPLACES", "gpt-4o")
+USE_FINE_TUNED_MODEL = os.environ.get("USE_FINE_TUNED_MODEL", "0") == "1"
+FINE_TUNED_MODEL_REFRESH_SECONDS = int(os.environ.get("FINE_TUNED_MODEL_REFRESH_SECONDS", 60))
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
-def test_openai_connection():
-    try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": "Hello, OpenAI!"}]
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute`` units per minute."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Block until ``amount`` units are available and take them; returns the seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, amount):
+        """Debit units without waiting, e.g. to reconcile an estimate with actual usage."""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+
+class OpenAIClientLayer:
+    """OpenAI client with a tuned connection pool, rate limits, bounded concurrency and retries."""
+
+    def __init__(self, api_key, base_url=OPENAI_BASE_URL, timeout=OPENAI_TIMEOUT,
+                 max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive=OPENAI_MAX_KEEPALIVE,
+                 max_in_flight=OPENAI_MAX_IN_FLIGHT, requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=OPENAI_TOKENS_PER_MINUTE, max_retries=OPENAI_MAX_RETRIES,
+                 backoff_base=OPENAI_BACKOFF_BASE, backoff_max=OPENAI_BACKOFF_MAX):
+        # The SDK and httpx are imported here rather than at module level so that
+        # importing this module (and everything that depends on it) stays cheap.
+        import httpx
+        from openai import OpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+
+        self.retryable_errors = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(timeout, connect=OPENAI_CONNECT_TIMEOUT)
         )
+        # Retries are handled here so they respect the shared limits; disable the SDK's own.
+        self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0, 'throttled_seconds': 0.0,
+                      'prompt_tokens': 0, 'completion_tokens': 0}
+        self._stats_lock = threading.Lock()
+
+    def call(self, func, *args, estimated_tokens=0, **kwargs):
+        """Run an SDK call under the rate limits and in-flight cap, retrying transient failures."""
+        attempt = 0
+        while True:
+            self._throttle(estimated_tokens)
+            try:
+                with self.in_flight:
+                    return func(*args, **kwargs)
+            except self.retryable_errors as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self._record(errors=1)
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                logger.warning(f"OpenAI request failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                self._record(retries=1)
+                time.sleep(delay)
+
+    def chat(self, messages, model, **kwargs):
+        estimated = estimate_message_tokens(messages) + kwargs.get('max_tokens', DEFAULT_COMPLETION_TOKENS)
+        response = self.call(self.client.chat.completions.create, model=model, messages=messages,
+                             estimated_tokens=estimated, **kwargs)
+        self._record_usage(model, getattr(response, 'usage', None), estimated)
+        return response
+
+    def stream_chat(self, messages, model, **kwargs):
+        """Yield streamed chunks; the in-flight slot is held until the stream is exhausted or closed."""
+        estimated = estimate_message_tokens(messages) + kwargs.get('max_tokens', DEFAULT_COMPLETION_TOKENS)
+        attempt = 0
+        while True:
+            self._throttle(estimated)
+            self.in_flight.acquire()
+            try:
+                # include_usage adds a final chunk carrying token counts, as non-streamed responses have.
+                stream = self.client.chat.completions.create(model=model, messages=messages, stream=True,
+                                                             stream_options={"include_usage": True}, **kwargs)
+            except self.retryable_errors as e:
+                self.in_flight.release()
+                attempt += 1
+                if attempt > self.max_retries:
+                    self._record(errors=1)
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                logger.warning(f"OpenAI stream failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                self._record(retries=1)
+                time.sleep(delay)
+                continue
+            except Exception:
+                self.in_flight.release()
+                raise
+            break
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    self._record_usage(model, chunk.usage, estimated)
+                yield chunk
+        finally:
+            self.in_flight.release()
+
+    def _throttle(self, estimated_tokens):
+        waited = self.request_bucket.acquire(1)
+        if estimated_tokens:
+            waited += self.token_bucket.acquire(estimated_tokens)
+        self._record(requests=1, throttled_seconds=waited)
+
+    def _backoff_delay(self, attempt, error):
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        # Full jitter: spreads retries from many workers instead of having them collide again.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _record_usage(self, model, usage, estimated):
+        if usage is None:
+            return
+        self.token_bucket.consume(usage.total_tokens - estimated)
+        self._record(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        OPENAI_TOKENS.inc(usage.prompt_tokens, model=model, direction='prompt')
+        OPENAI_TOKENS.inc(usage.completion_tokens, model=model, direction='completion')
+
+    def _record(self, **counters):
+        with self._stats_lock:
+            for key, value in counters.items():
+                self.stats[key] += value
+
+    def snapshot(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+
+def estimate_message_tokens(messages) -> int:
+    return sum(len(message.get('content') or '') for message in messages) // 4 + 4 * len(messages)
+
+
+def retry_after_seconds(error):
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        return None
+    return None
+
+
+_client_layer = None
+_client_layer_lock = threading.Lock()
+_health = {'checked_at': 0.0, 'ok': None, 'error': None}
+
+def get_client_layer() -> OpenAIClientLayer:
+    """Return the process-wide client layer, building it on first use."""
+    global _client_layer
+    if _client_layer is None:
+        with _client_layer_lock:
+            if _client_layer is None:
+                api_key = os.environ.get("OPENAI_API_KEY")
+                if not api_key:
+                    logger.error("OPENAI_API_KEY is not set in the environment variables")
+                    raise ValueError("OPENAI_API_KEY environment variable is not set")
+                _client_layer = OpenAIClientLayer(api_key)
+    return _client_layer
+
+def get_openai_client():
+    return get_client_layer().client
+
+def check_openai_connection(max_age: float = HEALTH_CHECK_TTL_SECONDS) -> dict:
+    """Check that the API is reachable, reusing the last result for ``max_age`` seconds.
+
+    Lists models rather than running a completion, so the check costs no tokens.
+    """
+    now = time.time()
+    if _health['ok'] is not None and now - _health['checked_at'] < max_age:
+        return dict(_health)
+    try:
+        layer = get_client_layer()
+        layer.call(layer.client.models.list)
+        _health.update(ok=True, error=None)
         logger.info("OpenAI API connection test successful")
-        return True
-    except OpenAIError as e:
+    except Exception as e:
+        _health.update(ok=False, error=str(e))
         logger.error(f"OpenAI API connection test failed: {e}")
-        return False
+    _health['checked_at'] = now
+    return dict(_health)
+
+_fine_tuned = {'model': None, 'loader': None, 'loaded_at': 0.0}
+
+def set_fine_tuned_model_loader(loader):
+    """Register a callable returning the current fine-tuned model name (or None)."""
+    _fine_tuned.update(loader=loader, loaded_at=0.0)
 
-def send_openai_request(prompt: str, model: str = "gpt-4o") -> str:
+def resolve_model(model: str) -> str:
+    """Swap in the latest fine-tuned model for FINE_TUNED_MODEL_REPLACES, refreshing periodically."""
+    if not USE_FINE_TUNED_MODEL or model != FINE_TUNED_MODEL_REPLACES or _fine_tuned['loader'] is None:
+        return model
+    now = time.time()
+    if now - _fine_tuned['loaded_at'] >= FINE_TUNED_MODEL_REFRESH_SECONDS:
+        try:
+            _fine_tuned['model'] = _fine_tuned['loader']()
+            _fine_tuned['loaded_at'] = now
+        except Exception as e:
+            # Typically no app context or database; keep the last known value.
+            logger.debug(f"Could not refresh fine-tuned model: {e}")
+    return _fine_tuned['model'] or model
+
+def as_messages(prompt) -> list:
+    """Accept either a plain user prompt or a ready-made list of chat messages."""
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return list(prompt)
+
+def request_options(json_mode: bool) -> dict:
+    return {"response_format": {"type": "json_object"}} if json_mode else {}
+
+def send_openai_request(prompt, model: str = "gpt-4o", json_mode: bool = False) -> str:
+    from openai import OpenAIError
+    model = resolve_model(model)
     try:
         logger.info(f"Sending request to OpenAI API with model: {model}")
-        response = openai_client.chat.completions.create(
+        response = get_client_layer().chat(
             model=model,
-            messages=[{"role": "user", "content": prompt}]
+            messages=as_messages(prompt),
+            **request_options(json_mode)
         )
         content = response.choices[0].message.content
         if not content:
@@ -43,8 +295,34 @@ def send_openai_request(prompt: str, model: str = "gpt-4o") -> str:
         logger.error(f"Unexpected error in send_openai_request: {e}")
         raise
 
-# Test the OpenAI connection when the module is imported
-if test_openai_connection():
-    logger.info("OpenAI API connection is working correctly")
-else:
-    logger.warning("OpenAI API connection test failed. Please check your API key and network connection.")
+def stream_openai_request(prompt, model: str = "gpt-4o", json_mode: bool = False):
+    """Yield the completion text delta by delta as the model produces it."""
+    from openai import OpenAIError
+    model = resolve_model(model)
+    try:
+        logger.info(f"Sending streaming request to OpenAI API with model: {model}")
+        stream = get_client_layer().stream_chat(
+            model=model,
+            messages=as_messages(prompt),
+            **request_options(json_mode)
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+        logger.info("Finished streaming response from OpenAI API")
+    except OpenAIError as e:
+        logger.error(f"OpenAI API streaming error: {e}")
+        raise
+
+def client_layer_stats() -> dict:
+    # Never builds the layer just to be scraped.
+    if _client_layer is None:
+        return {}
+    return {(event,): value for event, value in _client_layer.snapshot().items()
+            if event not in ('prompt_tokens', 'completion_tokens')}
+
+Collected('verita_openai_client_events_total', 'Requests, retries, errors and throttled seconds in the OpenAI client layer.',
+          ['event'], collect=client_layer_stats, kind='counter')
@@ -0,0 +1,115 @@
+import time
+import click
+from sqlalchemy import func
+from extensions import db
+from models import BulkImport, Assessment, ProjectStats
+
+
+def init_commands(app):
+    @app.cli.command('bulk-import')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--project-id', type=int, required=True, help='Project to import the transcripts into.')
+    @click.option('--framework', default='nielsen', help='Default UX framework for records without one.')
+    @click.option('--backend', default=None, help='Batch backend: openai or local.')
+    @click.option('--wait/--no-wait', default=False, help='Poll until the batches finish.')
+    def bulk_import_command(path, project_id, framework, backend, wait):
+        """Import a JSONL or ZIP file of transcripts and grade them through the batch backend."""
+        from bulk_import import read_records, create_bulk_import, bulk_import_status
+        with open(path, 'rb') as upload:
+            new_import = create_bulk_import(read_records(upload, path), project_id, framework, backend_name=backend)
+        click.echo(bulk_import_status(new_import))
+        if wait:
+            wait_for_import(new_import.id)
+
+    @app.cli.command('bulk-import-resume')
+    @click.option('--wait/--no-wait', default=False, help='Poll until the batches finish.')
+    def bulk_import_resume_command(wait):
+        """Poll every unfinished bulk import, storing any results that have arrived."""
+        from bulk_import import poll_bulk_import, bulk_import_status, UNFINISHED_STATUSES
+        pending = BulkImport.query.filter(BulkImport.status.in_(UNFINISHED_STATUSES)).all()
+        for existing_import in pending:
+            if wait:
+                wait_for_import(existing_import.id)
+            else:
+                click.echo(bulk_import_status(poll_bulk_import(existing_import.id)))
+
+    @app.cli.command('export-dataset')
+    @click.option('--output', default=None, help='Path of the gzip-compressed JSONL file to write.')
+    @click.option('--project-id', type=int, default=None)
+    @click.option('--framework', default=None)
+    @click.option('--min-score', type=float, default=None, help='Only include assessments scoring at least this.')
+    def export_dataset_command(output, project_id, framework, min_score):
+        """Stream stored assessments into a fine-tuning dataset and report its token cost."""
+        from fine_tuning import prepare_dataset, DATASET_PATH
+        path, stats = prepare_dataset(output or DATASET_PATH, project_id=project_id, framework=framework,
+                                      min_score=min_score)
+        click.echo(f"Wrote {path}: {stats}")
+
+    @app.cli.command('embed-assessments')
+    @click.option('--project-id', type=int, default=None)
+    @click.option('--batch-size', type=int, default=500, help='Rows embedded and committed per round.')
+    def embed_assessments_command(project_id, batch_size):
+        """Backfill transcript, insight and pain point embeddings for rows that have none."""
+        from embeddings import (embed_assessments, embed_transcripts, missing_embeddings,
+                                missing_transcript_embeddings)
+        from models import Transcription
+        transcripts = backfill(missing_transcript_embeddings(project_id), Transcription.id, embed_transcripts,
+                               batch_size)
+        items = backfill(missing_embeddings(project_id), Assessment.id, embed_assessments, batch_size)
+        click.echo(f"Embedded {transcripts} transcripts and {items} assessment items")
+
+    @app.cli.command('purge-assessment-cache')
+    def purge_assessment_cache_command():
+        """Delete persisted assessment cache entries older than ASSESSMENT_CACHE_TTL_SECONDS."""
+        from assessment_cache import assessment_cache
+        click.echo(f"Purged {assessment_cache.purge_expired()} expired assessment cache entries")
+
+    @app.cli.command('rebuild-project-stats')
+    def rebuild_project_stats_command():
+        """Recompute the project_stats rollup from scratch to repair any drift."""
+        click.echo(f"Rebuilt stats for {rebuild_project_stats()} projects")
+
+
+def backfill(query, id_column, embed, batch_size):
+    """Run ``embed`` over ``query`` in id-ordered batches, committing after each one."""
+    total = 0
+    after_id = 0
+    while True:
+        rows = db.session.execute(query.where(id_column > after_id).limit(batch_size)).all()
+        if not rows:
+            return total
+        total += embed(rows)
+        db.session.commit()
+        after_id = rows[-1].id
+
+
+def rebuild_project_stats():
+    """Recompute every project rollup from the assessment table in one transaction."""
+    totals = db.session.query(
+        Assessment.project_id,
+        func.count(Assessment.id),
+        func.coalesce(func.sum(Assessment.overall_quality_score), 0),
+        func.coalesce(func.sum(Assessment.key_insight_count), 0),
+        func.coalesce(func.sum(Assessment.pain_point_count), 0),
+        func.coalesce(func.sum(Assessment.improvement_count), 0)
+    ).filter(Assessment.project_id.isnot(None)).group_by(Assessment.project_id).all()
+
+    ProjectStats.query.delete()
+    for project_id, count, quality, insights, pain_points, improvements in totals:
+        db.session.add(ProjectStats(project_id=project_id, assessment_count=count, sum_quality_score=quality,
+                                    sum_key_insights=insights, sum_pain_points=pain_points,
+                                    sum_improvements=improvements))
+    db.session.commit()
+    return len(totals)
+
+
+def wait_for_import(bulk_import_id, interval=30, max_interval=600):
+    from bulk_import import poll_bulk_import, bulk_import_status
+    while True:
+        bulk_import = poll_bulk_import(bulk_import_id)
+        click.echo(bulk_import_status(bulk_import))
+        if bulk_import.status in ('completed', 'failed'):
+            return
+        db.session.remove()
+        time.sleep(interval)
+        interval = min(max_interval, interval * 2)
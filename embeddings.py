@@ -0,0 +1,297 @@
+import os
+import re
+import hashlib
+import logging
+import numpy as np
+from sqlalchemy import select, insert
+from extensions import db
+from models import Embedding, Assessment, Transcription
+from chat_request import get_client_layer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", 256))
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 256))
+# Embedding models take ~8k tokens; the opening of a transcript is plenty to recognise a re-upload.
+EMBEDDING_MAX_CHARS = 24000
+
+THEME_SIMILARITY = float(os.environ.get("THEME_SIMILARITY", 0.8))
+THEME_MAX_ITEMS = int(os.environ.get("THEME_MAX_ITEMS", 5000))
+# With FLAG_SIMILAR_TRANSCRIPTS, transcripts this close are flagged for review. Set above 1 to disable.
+DUPLICATE_TRANSCRIPT_SIMILARITY = float(os.environ.get("DUPLICATE_TRANSCRIPT_SIMILARITY", 0.97))
+
+EMBEDDED_KEYS = ("key_insights", "user_pain_points")
+TRANSCRIPT_KIND = "transcript"
+SIMILARITY_BLOCK_ROWS = 1024
+
+LOCAL_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def to_blob(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_blobs(blobs, dimensions: int) -> np.ndarray:
+    if not blobs:
+        return np.zeros((0, dimensions), dtype=np.float32)
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(-1, dimensions)
+
+
+class OpenAIEmbeddingBackend:
+    """Embeddings API calls routed through the shared, rate-limited client layer."""
+
+    def __init__(self, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS, layer=None):
+        self.model = model
+        self.dimensions = dimensions
+        self.name = f"{model}@{dimensions}"
+        self._layer = layer
+
+    @property
+    def layer(self):
+        if self._layer is None:
+            self._layer = get_client_layer()
+        return self._layer
+
+    def embed(self, texts: list) -> np.ndarray:
+        response = self.layer.call(self.layer.client.embeddings.create, model=self.model, input=texts,
+                                   dimensions=self.dimensions,
+                                   estimated_tokens=sum(len(text) for text in texts) // 4)
+        return normalize_rows([item.embedding for item in sorted(response.data, key=lambda item: item.index)])
+
+
+class LocalEmbeddingBackend:
+    """Deterministic hashed bag-of-words vectors for offline runs and tests.
+
+    Words and word pairs are hashed into ``dimensions`` signed buckets, so texts that
+    share wording land close together without any model or network access.
+    """
+
+    def __init__(self, dimensions=EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"local-hash@{dimensions}"
+
+    def embed(self, texts: list) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = LOCAL_TOKEN_PATTERN.findall(text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+                matrix[row, digest % self.dimensions] += 1.0 if digest & (1 << 63) else -1.0
+        return normalize_rows(matrix)
+
+
+_backend = None
+
+
+def get_embedding_backend():
+    global _backend
+    if _backend is None:
+        _backend = LocalEmbeddingBackend() if EMBEDDING_BACKEND == "local" else OpenAIEmbeddingBackend()
+    return _backend
+
+
+def set_embedding_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def embed_texts(texts: list, backend=None) -> np.ndarray:
+    """Embed ``texts`` in API-sized batches, sending each distinct string only once."""
+    backend = backend or get_embedding_backend()
+    unique = list(dict.fromkeys(texts))
+    if not unique:
+        return np.zeros((0, backend.dimensions), dtype=np.float32)
+    vectors = np.vstack([backend.embed(unique[start:start + EMBEDDING_BATCH_SIZE])
+                         for start in range(0, len(unique), EMBEDDING_BATCH_SIZE)])
+    position = {text: i for i, text in enumerate(unique)}
+    return vectors[[position[text] for text in texts]]
+
+
+def assessment_items(result) -> list:
+    """(kind, text) pairs worth embedding from an assessment result; error stubs yield nothing."""
+    if not isinstance(result, dict):
+        return []
+    analysis = result.get("framework_specific_analysis")
+    if isinstance(analysis, dict) and set(analysis) == {"error"}:
+        return []
+    items = []
+    for key in EMBEDDED_KEYS:
+        values = result.get(key)
+        if isinstance(values, list):
+            items.extend((key, str(value).strip()) for value in values if str(value).strip())
+    return items
+
+
+def embed_assessments(rows, backend=None) -> int:
+    """Embed insights and pain points for ``(assessment_id, transcription_id, project_id, result)`` rows.
+
+    All items go out in as few API calls as possible and are bulk inserted; the caller commits.
+    """
+    backend = backend or get_embedding_backend()
+    records = []
+    for assessment_id, transcription_id, project_id, result in rows:
+        for kind, text in assessment_items(result):
+            records.append({"kind": kind, "assessment_id": assessment_id, "transcription_id": transcription_id,
+                            "project_id": project_id, "model": backend.name, "text": text})
+    if not records:
+        return 0
+    vectors = embed_texts([record["text"] for record in records], backend)
+    for record, vector in zip(records, vectors):
+        record["vector"] = to_blob(vector)
+    db.session.execute(insert(Embedding), records)
+    return len(records)
+
+
+def embed_transcripts(rows, backend=None) -> int:
+    """Embed ``(transcription_id, project_id, text)`` rows for near-duplicate detection; the caller commits."""
+    backend = backend or get_embedding_backend()
+    rows = list(rows)
+    if not rows:
+        return 0
+    vectors = embed_texts([text[:EMBEDDING_MAX_CHARS] for _, _, text in rows], backend)
+    db.session.execute(insert(Embedding), [
+        {"kind": TRANSCRIPT_KIND, "transcription_id": transcription_id, "project_id": project_id,
+         "model": backend.name, "vector": to_blob(vector)}
+        for (transcription_id, project_id, _), vector in zip(rows, vectors)
+    ])
+    return len(rows)
+
+
+def transcript_vector(transcription, backend=None) -> np.ndarray:
+    """The stored embedding of ``transcription``, computing and adding it to the session if missing."""
+    backend = backend or get_embedding_backend()
+    stored = db.session.scalar(select(Embedding.vector).where(
+        Embedding.transcription_id == transcription.id, Embedding.kind == TRANSCRIPT_KIND,
+        Embedding.model == backend.name).limit(1))
+    if stored is not None:
+        return from_blobs([stored], backend.dimensions)[0]
+    vector = embed_texts([transcription.text[:EMBEDDING_MAX_CHARS]], backend)[0]
+    db.session.add(Embedding(kind=TRANSCRIPT_KIND, transcription_id=transcription.id,
+                             project_id=transcription.project_id, model=backend.name, vector=to_blob(vector)))
+    return vector
+
+
+def near_duplicate_assessments(transcription, frameworks, threshold=DUPLICATE_TRANSCRIPT_SIMILARITY,
+                               backend=None) -> dict:
+    """Map each framework to ``(assessment, similarity)`` from the closest already-graded transcript.
+
+    Only transcripts in the same project at or above ``threshold`` cosine similarity are
+    considered, and error assessments are never returned. Similarity alone does not make
+    a result safe to copy; it only flags transcripts for review.
+    """
+    if threshold > 1:
+        return {}
+    backend = backend or get_embedding_backend()
+    vector = transcript_vector(transcription, backend)
+    project_filter = Embedding.project_id.is_(None) if transcription.project_id is None \
+        else Embedding.project_id == transcription.project_id
+    candidates = db.session.execute(select(Embedding.transcription_id, Embedding.vector).where(
+        Embedding.kind == TRANSCRIPT_KIND, Embedding.model == backend.name, project_filter,
+        Embedding.transcription_id != transcription.id)).all()
+    if not candidates:
+        return {}
+    similarities = from_blobs([blob for _, blob in candidates], backend.dimensions) @ vector
+    close = {candidates[i][0]: float(similarities[i]) for i in np.flatnonzero(similarities >= threshold)}
+    if not close:
+        return {}
+
+    matches = {}
+    for assessment in Assessment.query.filter(Assessment.transcription_id.in_(close),
+                                              Assessment.framework.in_(frameworks)) \
+            .order_by(Assessment.id.desc()):
+        if not assessment_items(assessment.result):
+            continue
+        similarity = close[assessment.transcription_id]
+        if assessment.framework not in matches or similarity > matches[assessment.framework][1]:
+            matches[assessment.framework] = (assessment, similarity)
+    return matches
+
+
+def similarity_graph(vectors: np.ndarray, threshold: float) -> np.ndarray:
+    """Boolean adjacency of pairs at or above ``threshold``, built in row blocks to bound memory."""
+    return np.vstack([vectors[start:start + SIMILARITY_BLOCK_ROWS] @ vectors.T >= threshold
+                      for start in range(0, len(vectors), SIMILARITY_BLOCK_ROWS)])
+
+
+def cluster_vectors(vectors: np.ndarray, threshold: float = THEME_SIMILARITY) -> list:
+    """Greedy leader clustering: the item with the most unassigned neighbours seeds each cluster.
+
+    Returns arrays of row indices, leader first.
+    """
+    if not len(vectors):
+        return []
+    adjacency = similarity_graph(vectors, threshold)
+    degree = adjacency.sum(axis=1)
+    unassigned = np.ones(len(vectors), dtype=bool)
+    clusters = []
+    while unassigned.any():
+        leader = int(np.argmax(np.where(unassigned, degree, -1)))
+        members = np.union1d(np.flatnonzero(adjacency[leader] & unassigned), [leader])
+        unassigned[members] = False
+        degree -= adjacency[:, members].sum(axis=1)
+        clusters.append(np.concatenate(([leader], members[members != leader])))
+    return clusters
+
+
+def project_themes(project_id, kinds=EMBEDDED_KEYS, threshold=THEME_SIMILARITY, min_size=2, limit=20,
+                   backend=None) -> list:
+    """Cluster a project's embedded insights and pain points into recurring themes, largest first."""
+    backend = backend or get_embedding_backend()
+    themes = []
+    for kind in kinds:
+        rows = db.session.execute(select(Embedding.assessment_id, Embedding.transcription_id, Embedding.text,
+                                         Embedding.vector)
+                                  .where(Embedding.project_id == project_id, Embedding.kind == kind,
+                                         Embedding.model == backend.name)
+                                  .order_by(Embedding.id.desc()).limit(THEME_MAX_ITEMS)).all()
+        vectors = from_blobs([row.vector for row in rows], backend.dimensions)
+        for members in cluster_vectors(vectors, threshold):
+            if len(members) < min_size:
+                continue
+            leader = rows[members[0]]
+            closeness = vectors[members] @ vectors[members[0]]
+            examples = list(dict.fromkeys(rows[i].text for i in members[np.argsort(-closeness)]))
+            themes.append({
+                "kind": kind,
+                "label": leader.text,
+                "mentions": len(members),
+                "assessments": len({rows[i].assessment_id for i in members}),
+                "transcriptions": len({rows[i].transcription_id for i in members}),
+                "examples": examples[:5]
+            })
+    themes.sort(key=lambda theme: (theme["transcriptions"], theme["mentions"]), reverse=True)
+    return themes[:limit]
+
+
+def missing_transcript_embeddings(project_id=None, backend=None):
+    backend = backend or get_embedding_backend()
+    embedded = select(Embedding.transcription_id).where(Embedding.kind == TRANSCRIPT_KIND,
+                                                        Embedding.model == backend.name)
+    query = select(Transcription.id, Transcription.project_id, Transcription.text) \
+        .where(Transcription.id.not_in(embedded))
+    if project_id is not None:
+        query = query.where(Transcription.project_id == project_id)
+    return query.order_by(Transcription.id)
+
+
+def missing_embeddings(project_id=None, backend=None):
+    """Assessments with no item embeddings for the current backend, for backfilling."""
+    backend = backend or get_embedding_backend()
+    embedded = select(Embedding.assessment_id).where(Embedding.assessment_id.isnot(None),
+                                                     Embedding.model == backend.name)
+    query = select(Assessment.id, Assessment.transcription_id, Assessment.project_id, Assessment.result) \
+        .where(Assessment.id.not_in(embedded))
+    if project_id is not None:
+        query = query.where(Assessment.project_id == project_id)
+    return query.order_by(Assessment.id)
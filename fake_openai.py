@@ -0,0 +1,178 @@
+"""Local OpenAI-compatible server for exercising the client layer without spending money.
+
+Run standalone with ``python fake_openai.py --port 8001`` and point the app at it with
+``OPENAI_BASE_URL=http://127.0.0.1:8001/v1``, or start it in-process with
+``FakeOpenAIServer(...).start()``.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ASSESSMENT = {
+    "key_insights": ["Participants struggle to find the export option"],
+    "user_pain_points": ["Export is buried three menus deep"],
+    "areas_for_improvement": ["Surface export in the main toolbar"],
+    "overall_quality_score": 72,
+    "recommendations": ["Run a tree test on the navigation"],
+    "framework_specific_analysis": {"visibility_of_system_status": "[00:01:12] \"I never know if it saved\""}
+}
+
+
+def default_responder(messages, model):
+    return "```json\n" + json.dumps(DEFAULT_ASSESSMENT) + "\n```"
+
+
+class FakeOpenAIServer:
+    """Chat completions endpoint with configurable latency, streaming speed and failure rates."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, chunk_size=16, chunk_delay=0.0, responder=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.responder = responder or default_responder
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'rate_limited': 0, 'errors': 0, 'streams': 0}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self):
+        with self._lock:
+            return self.random.random(), self.random.uniform(-self.jitter, self.jitter)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip('/').endswith('/models'):
+                    return self._json(200, {'object': 'list', 'data': [
+                        {'id': name, 'object': 'model', 'created': 0, 'owned_by': 'fake'}
+                        for name in ('gpt-4o', 'gpt-4o-mini')
+                    ]})
+                self._json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    return self._json(404, {'error': {'message': f'Unknown path {self.path}'}})
+                server._count('requests')
+
+                roll, jitter = server._roll()
+                if roll < server.rate_limit_rate:
+                    server._count('rate_limited')
+                    return self._json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                                      {'Retry-After': str(server.retry_after)})
+                if roll < server.rate_limit_rate + server.error_rate:
+                    server._count('errors')
+                    return self._json(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+
+                time.sleep(max(0.0, server.latency + jitter))
+                model = body.get('model', 'gpt-4o')
+                content = server.responder(body.get('messages', []), model)
+                prompt_tokens = sum(len(m.get('content') or '') for m in body.get('messages', [])) // 4
+                usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content) // 4,
+                         'total_tokens': prompt_tokens + len(content) // 4}
+                if body.get('stream'):
+                    server._count('streams')
+                    return self._stream(model, content)
+                self._json(200, {
+                    'id': f'chatcmpl-fake-{int(time.time() * 1000)}',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': usage
+                })
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, model, content):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for start in range(0, len(content), server.chunk_size):
+                    self._event({
+                        'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'finish_reason': None,
+                                     'delta': {'content': content[start:start + server.chunk_size]}}]
+                    })
+                    if server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                self._event({'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                             'model': model, 'choices': [{'index': 0, 'finish_reason': 'stop', 'delta': {}}]})
+                self._write_chunk(b'data: [DONE]\n\n')
+                self._write_chunk(b'')
+
+            def _event(self, payload):
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds before each response starts.')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500.')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction answered with 429.')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Seconds between streamed chunks.')
+    args = parser.parse_args()
+    fake = FakeOpenAIServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                            chunk_delay=args.chunk_delay)
+    print(f"Fake OpenAI server listening on {fake.base_url}")
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -1,46 +1,337 @@
 import os
+import csv
+import gzip
 import json
-from openai import OpenAI
-
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
-
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-
-def prepare_dataset():
-    # This is a placeholder function. In a real-world scenario, you would
-    # prepare your dataset of UX research interview transcripts here.
-    dataset = [
-        {"messages": [
-            {"role": "system", "content": "You are a UX research expert."},
-            {"role": "user", "content": "Analyze this UX research interview transcript: [Transcript text]"},
-            {"role": "assistant", "content": "[Expert analysis of the transcript]"}
-        ]}
-        # Add more examples here
-    ]
-    
-    with open('ux_research_dataset.jsonl', 'w') as f:
-        for item in dataset:
-            f.write(json.dumps(item) + '\n')
-    
-    return 'ux_research_dataset.jsonl'
-
-def fine_tune_model(dataset_file):
-    file_response = openai_client.files.create(file=open(dataset_file, "rb"), purpose='fine-tune')
-    file_id = file_response.id
-
-    fine_tuning_job = openai_client.fine_tuning.jobs.create(
-        training_file=file_id,
-        model="gpt-3.5-turbo-0613"
-    )
-
-    # Wait for the fine-tuning to complete (this is a simplified version)
-    while True:
-        job_status = openai_client.fine_tuning.jobs.retrieve(fine_tuning_job.id)
-        if job_status.status == 'succeeded':
-            return job_status.fine_tuned_model
-        elif job_status.status == 'failed':
-            raise Exception("Fine-tuning failed")
-
-    return None
+import uuid
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+from extensions import db
+from models import FineTuneJob, Transcription, Assessment
+from chat_request import get_client_layer
+from grading_framework import build_messages, is_error_assessment
+from assessment_cache import normalize_transcript
+from transcript_chunking import estimate_tokens
+from job_queue import task
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FINE_TUNE_BASE_MODEL = os.environ.get("FINE_TUNE_BASE_MODEL", "gpt-3.5-turbo-0613")
+FINE_TUNE_BACKEND = os.environ.get("FINE_TUNE_BACKEND", "openai")
+FINE_TUNE_POLL_MIN_SECONDS = float(os.environ.get("FINE_TUNE_POLL_MIN_SECONDS", 10))
+FINE_TUNE_POLL_MAX_SECONDS = float(os.environ.get("FINE_TUNE_POLL_MAX_SECONDS", 300))
+
+FINISHED_STATUSES = {"succeeded", "failed", "cancelled"}
+
+DATASET_PATH = os.environ.get("FINE_TUNE_DATASET_PATH", "ux_research_dataset.jsonl.gz")
+DATASET_BATCH_SIZE = 1000
+FINE_TUNE_EPOCHS = int(os.environ.get("FINE_TUNE_EPOCHS", 3))
+# Training price for the base model, used only for the pre-upload estimate.
+FINE_TUNE_COST_PER_1K_TOKENS = float(os.environ.get("FINE_TUNE_COST_PER_1K_TOKENS", 0.008))
+
+def iter_training_pairs(project_id=None, framework=None, min_score=None, batch_size=DATASET_BATCH_SIZE):
+    """Stream (transcription id, assessment id, text, framework, result) rows without loading them all.
+
+    ``yield_per`` keeps only one batch of rows in memory and, on PostgreSQL, makes
+    psycopg2 use a server-side cursor. Rows come sorted by framework and transcript
+    text, so the database puts duplicates next to each other for ``iter_examples``.
+    """
+    query = db.session.query(Transcription.id, Assessment.id, Transcription.text, Assessment.framework,
+                             Assessment.result) \
+        .join(Assessment, Assessment.transcription_id == Transcription.id)
+    if project_id is not None:
+        query = query.filter(Assessment.project_id == project_id)
+    if framework is not None:
+        query = query.filter(Assessment.framework == framework)
+    if min_score is not None:
+        query = query.filter(Assessment.overall_quality_score >= min_score)
+    yield from query.order_by(Assessment.framework, Transcription.text, Assessment.id) \
+        .execution_options(yield_per=batch_size)
+
+
+def build_example(text, framework, result) -> dict:
+    # Same system prefix and user message as live grading, so the tuned model sees familiar prompts.
+    # The evidence list is added by quote verification after the reply, so it is not a training target.
+    reply = {key: value for key, value in result.items() if key != "evidence"}
+    return {"messages": build_messages(text, framework) + [
+        {"role": "assistant", "content": json.dumps(reply)}
+    ]}
+
+
+_encoding = None
+
+
+def get_encoding():
+    """The cl100k_base tokenizer, loaded on first use since tiktoken may download it; None without tiktoken."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoding = False
+    return _encoding or None
+
+
+def count_example_tokens(example) -> int:
+    encoding = get_encoding()
+    if encoding is not None:
+        return sum(len(encoding.encode(message["content"])) + 4 for message in example["messages"])
+    return sum(estimate_tokens(message["content"]) + 4 for message in example["messages"])
+
+
+def iter_examples(rows, stats):
+    """Turn assessment rows into training examples, skipping error stubs and duplicate content.
+
+    ``rows`` must come sorted as ``iter_training_pairs`` returns them: only the last
+    kept transcript is remembered, so memory stays constant however many rows there
+    are. Copies that differ only in whitespace are not adjacent and are both kept.
+    Counters in ``stats`` are updated as the rows are consumed.
+    """
+    previous = None
+    for transcription_id, assessment_id, text, framework, result in rows:
+        if not isinstance(result, dict) or is_error_assessment(result):
+            stats["skipped"] += 1
+            continue
+        digest = hashlib.blake2b(f"{framework}\0{normalize_transcript(text)}".encode("utf-8"), digest_size=8).digest()
+        if digest == previous:
+            stats["duplicates"] += 1
+            continue
+        previous = digest
+        example = build_example(text, framework, result)
+        tokens = count_example_tokens(example)
+        stats["examples"] += 1
+        stats["total_tokens"] += tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+        yield example, {"transcription_id": transcription_id, "assessment_id": assessment_id, "tokens": tokens}
+
+
+def prepare_dataset(path=DATASET_PATH, project_id=None, framework=None, min_score=None):
+    """Write a gzip-compressed fine-tuning JSONL file from stored assessments, one example at a time.
+
+    A ``<path>.tokens.csv`` manifest records the token count of every example.
+    Returns the path and a summary including the estimated training cost.
+    """
+    stats = {"examples": 0, "duplicates": 0, "skipped": 0, "total_tokens": 0, "max_tokens": 0}
+    rows = iter_training_pairs(project_id=project_id, framework=framework, min_score=min_score)
+    with gzip.open(path, "wt", encoding="utf-8") as output, open(f"{path}.tokens.csv", "w", newline="") as manifest:
+        writer = csv.DictWriter(manifest, fieldnames=["transcription_id", "assessment_id", "tokens"])
+        writer.writeheader()
+        for example, entry in iter_examples(rows, stats):
+            output.write(json.dumps(example) + "\n")
+            writer.writerow(entry)
+    stats["estimated_cost_usd"] = round(
+        stats["total_tokens"] / 1000 * FINE_TUNE_COST_PER_1K_TOKENS * FINE_TUNE_EPOCHS, 2)
+    logger.info(f"Prepared fine-tuning dataset {path}: {stats}")
+    return path, stats
+
+
+class OpenAIFineTuningAPI:
+    """Fine-tuning calls routed through the shared, rate-limited client layer."""
+
+    def __init__(self, layer=None):
+        self._layer = layer
+
+    @property
+    def layer(self):
+        if self._layer is None:
+            self._layer = get_client_layer()
+        return self._layer
+
+    def upload(self, dataset_file):
+        if not dataset_file.endswith(".gz"):
+            with open(dataset_file, "rb") as dataset:
+                return self.layer.call(self.layer.client.files.create, file=dataset, purpose='fine-tune').id
+        # The files API wants plain JSONL; decompress through a temp file rather than into memory.
+        with gzip.open(dataset_file, "rb") as compressed, tempfile.NamedTemporaryFile(suffix=".jsonl") as plain:
+            shutil.copyfileobj(compressed, plain)
+            plain.flush()
+            plain.seek(0)
+            return self.layer.call(self.layer.client.files.create,
+                                   file=(os.path.basename(dataset_file)[:-3], plain), purpose='fine-tune').id
+
+    def create(self, training_file_id, base_model):
+        return self.layer.call(self.layer.client.fine_tuning.jobs.create,
+                               training_file=training_file_id, model=base_model)
+
+    def retrieve(self, job_id):
+        return self.layer.call(self.layer.client.fine_tuning.jobs.retrieve, job_id)
+
+
+class StubFineTuningAPI:
+    """Offline stand-in that walks each job through ``statuses``, one step per retrieve."""
+
+    def __init__(self, statuses=("validating_files", "queued", "running", "succeeded")):
+        self.statuses = list(statuses)
+        self.jobs = {}
+
+    def upload(self, dataset_file):
+        return f"file-stub-{uuid.uuid4().hex[:12]}"
+
+    def create(self, training_file_id, base_model):
+        job_id = f"ftjob-stub-{uuid.uuid4().hex[:12]}"
+        self.jobs[job_id] = {'step': 0, 'base_model': base_model}
+        return self._job(job_id)
+
+    def retrieve(self, job_id):
+        job = self.jobs[job_id]
+        job['step'] = min(job['step'] + 1, len(self.statuses) - 1)
+        return self._job(job_id)
+
+    def _job(self, job_id):
+        job = self.jobs[job_id]
+        status = self.statuses[job['step']]
+        fine_tuned_model = f"ft:{job['base_model']}:verita::{job_id[-8:]}" if status == 'succeeded' else None
+        error = SimpleNamespace(message="Stub job failed") if status == 'failed' else None
+        return SimpleNamespace(id=job_id, status=status, fine_tuned_model=fine_tuned_model, error=error)
+
+
+_api = None
+
+
+def get_fine_tuning_api():
+    global _api
+    if _api is None:
+        _api = StubFineTuningAPI() if FINE_TUNE_BACKEND == "stub" else OpenAIFineTuningAPI()
+    return _api
+
+
+def set_fine_tuning_api(api):
+    global _api
+    _api = api
+
+
+def start_fine_tune(dataset_file, base_model=FINE_TUNE_BASE_MODEL, api=None) -> FineTuneJob:
+    """Upload the dataset, create the job and record it; returns without waiting for training."""
+    api = api or get_fine_tuning_api()
+    training_file_id = api.upload(dataset_file)
+    remote_job = api.create(training_file_id, base_model)
+    job = FineTuneJob(openai_job_id=remote_job.id, base_model=base_model,
+                      training_file_id=training_file_id, status=remote_job.status)
+    db.session.add(job)
+    db.session.commit()
+    logger.info(f"Started fine-tuning job {remote_job.id} on {base_model}")
+    return job
+
+
+@task('fine_tune')
+def fine_tune_job(job, project_id=None, framework=None, min_score=None, base_model=FINE_TUNE_BASE_MODEL):
+    """Build a dataset in a temp file of its own, upload it and start training; the watcher takes over from there."""
+    descriptor, path = tempfile.mkstemp(prefix="fine-tune-", suffix=".jsonl.gz")
+    os.close(descriptor)
+    try:
+        job.progress('preparing_dataset')
+        path, stats = prepare_dataset(path, project_id=project_id, framework=framework, min_score=min_score)
+        if not stats["examples"]:
+            raise ValueError("No assessments match the dataset filters")
+        job.progress('uploading', examples=stats["examples"])
+        fine_tune = start_fine_tune(path, base_model)
+    finally:
+        for leftover in (path, f"{path}.tokens.csv"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    ensure_fine_tune_watcher(job.queue.app, job.queue.socketio)
+    return dict(fine_tune_job_status(fine_tune), dataset=stats)
+
+
+def poll_fine_tune_job(job: FineTuneJob, api=None) -> bool:
+    """Refresh one job from the API; returns True when its status changed."""
+    api = api or get_fine_tuning_api()
+    remote_job = api.retrieve(job.openai_job_id)
+    if remote_job.status == job.status:
+        return False
+    job.status = remote_job.status
+    if remote_job.status == 'succeeded':
+        job.fine_tuned_model = remote_job.fine_tuned_model
+    if remote_job.status == 'failed' and remote_job.error is not None:
+        job.error = getattr(remote_job.error, 'message', None) or str(remote_job.error)
+    if remote_job.status in FINISHED_STATUSES:
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(f"Fine-tuning job {job.openai_job_id} is now {job.status}")
+    return True
+
+
+def fine_tune_job_status(job: FineTuneJob) -> dict:
+    return {
+        'id': job.id,
+        'openai_job_id': job.openai_job_id,
+        'base_model': job.base_model,
+        'status': job.status,
+        'fine_tuned_model': job.fine_tuned_model,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def latest_fine_tuned_model():
+    job = FineTuneJob.query.filter(FineTuneJob.status == 'succeeded', FineTuneJob.fine_tuned_model.isnot(None)) \
+        .order_by(FineTuneJob.finished_at.desc()).first()
+    return job.fine_tuned_model if job else None
+
+
+_watcher_lock = threading.Lock()
+_watcher_running = False
+
+
+def ensure_fine_tune_watcher(app, socketio):
+    """Start the background poller unless one is already running in this process."""
+    global _watcher_running
+    with _watcher_lock:
+        if _watcher_running:
+            return
+        _watcher_running = True
+    socketio.start_background_task(watch_fine_tune_jobs, app, socketio)
+
+
+def resume_fine_tune_watcher(app, socketio):
+    """Start the watcher at startup when a previous process left jobs unfinished."""
+    try:
+        with app.app_context():
+            pending = db.session.query(FineTuneJob.id) \
+                .filter(FineTuneJob.status.notin_(FINISHED_STATUSES)).first() is not None
+            db.session.remove()
+    except Exception as e:
+        logger.warning(f"Could not check for unfinished fine-tuning jobs: {e}")
+        return
+    if pending:
+        logger.info("Resuming polling of unfinished fine-tuning jobs")
+        ensure_fine_tune_watcher(app, socketio)
+
+
+def watch_fine_tune_jobs(app, socketio, api=None):
+    """Poll unfinished jobs, backing off while nothing changes and resetting on every change."""
+    global _watcher_running
+    interval = FINE_TUNE_POLL_MIN_SECONDS
+    try:
+        while True:
+            with app.app_context():
+                with _watcher_lock:
+                    pending = FineTuneJob.query.filter(FineTuneJob.status.notin_(FINISHED_STATUSES)).all()
+                    if not pending:
+                        # Cleared with the check itself: a job committed before it is seen here, and one
+                        # committed after finds the flag down and starts a new watcher.
+                        _watcher_running = False
+                        return
+                changed = False
+                for job in pending:
+                    try:
+                        if poll_fine_tune_job(job, api):
+                            changed = True
+                            socketio.emit('fine_tune_status', fine_tune_job_status(job))
+                    except Exception as e:
+                        logger.error(f"Error polling fine-tuning job {job.openai_job_id}: {e}")
+                        db.session.rollback()
+                db.session.remove()
+            interval = FINE_TUNE_POLL_MIN_SECONDS if changed else min(FINE_TUNE_POLL_MAX_SECONDS, interval * 1.5)
+            socketio.sleep(interval)
+    except BaseException:
+        with _watcher_lock:
+            _watcher_running = False
+        raise
@@ -1,88 +1,503 @@
+import os
+import re
 import json
+import time
 import logging
-from chat_request import send_openai_request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from flask import current_app, has_app_context
+from collections import namedtuple
+from chat_request import send_openai_request, stream_openai_request, resolve_model, estimate_message_tokens
+from section_parser import SectionStreamParser
+from transcript_chunking import chunk_transcript, estimate_tokens, is_long_transcript
+from assessment_cache import assessment_cache, make_cache_key
+from prompt_templates import UX_FRAMEWORKS, get_prompt_template
+from quote_index import verify_evidence
+from model_routing import (triage, text_signals, routing_record, low_confidence, MODEL_ROUTING, FAST_MODEL,
+                           EXPECTED_OUTPUT_TOKENS)
+from metrics import span, ASSESSMENTS, ROUTING_DECISIONS, ROUTING_COST_USD
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-UX_FRAMEWORKS = {
-    "nielsen": "Nielsen's 10 Usability Heuristics",
-    "ideo": "IDEO's Human-Centered Design",
-    "double_diamond": "Double Diamond Design Process",
-    "lean_ux": "Lean UX",
-    "jobs_to_be_done": "Jobs to be Done (JTBD)",
-    "jump_associates": "Jump Associates' UX Research Framework"
+DEFAULT_MODEL = "gpt-4o"
+# Ask for a bare JSON object (response_format=json_object). Disable for models without JSON mode.
+JSON_MODE = os.environ.get("OPENAI_JSON_MODE", "1") == "1"
+VERIFY_QUOTES = os.environ.get("VERIFY_QUOTES", "1") == "1"
+
+REQUIRED_KEYS = ["key_insights", "user_pain_points", "areas_for_improvement", "overall_quality_score", "recommendations", "framework_specific_analysis"]
+
+LONG_TRANSCRIPT_WORKERS = int(os.environ.get("LONG_TRANSCRIPT_WORKERS", 4))
+DUPLICATE_SIMILARITY = 0.8
+
+SectionCallback = Callable[[str, object], None]
+EscalationCallback = Callable[[str], None]
+
+# Stand-ins for sections a reply did not deliver; the key is listed in ``incomplete_sections``.
+SECTION_PLACEHOLDERS = {
+    "key_insights": list,
+    "user_pain_points": list,
+    "areas_for_improvement": list,
+    "overall_quality_score": int,
+    "recommendations": list,
+    "framework_specific_analysis": dict,
 }
 
-def grade_transcription(transcription: str, framework: str) -> dict:
-    framework_description = UX_FRAMEWORKS.get(framework, "General UX research")
-    
+def resolve_frameworks(frameworks) -> list:
+    """Turn ``"all"``, a single key or a list of keys into a list of framework keys.
+
+    A single key is passed through as-is so unknown frameworks keep falling back to
+    general UX research; keys in a list must all be known.
+    """
+    if frameworks == "all":
+        return list(UX_FRAMEWORKS)
+    if isinstance(frameworks, str):
+        return [frameworks]
+    unknown = [framework for framework in frameworks if framework not in UX_FRAMEWORKS]
+    if unknown:
+        raise ValueError(f"Unknown frameworks: {', '.join(unknown)}")
+    if not frameworks:
+        raise ValueError("At least one framework is required")
+    return list(dict.fromkeys(frameworks))
+
+def build_messages(transcription: str, framework: str) -> list:
+    return get_prompt_template(framework).messages(transcription)
+
+def load_json_object(response: str):
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        # Replies produced without JSON mode may wrap the object in a fence or prose.
+        start, end = response.find('{'), response.rfind('}')
+        if start == -1 or end < start:
+            raise
+        return json.loads(response[start:end + 1])
+
+def parse_assessment(response: str) -> dict:
+    """Extract and validate the assessment JSON from a model reply.
+
+    Raises ``json.JSONDecodeError`` or ``ValueError`` when the reply is unusable.
+    """
+    assessment = load_json_object(response)
+    if not isinstance(assessment, dict):
+        raise ValueError("Assessment is not a JSON object")
+
+    # Validate the assessment structure
+    for key in REQUIRED_KEYS:
+        if key not in assessment:
+            raise ValueError(f"Missing required key in assessment: {key}")
+
+    # Ensure overall_quality_score is within the correct range
+    assessment["overall_quality_score"] = max(0, min(100, assessment["overall_quality_score"]))
+    return assessment
+
+def is_valid_section(key: str, value) -> bool:
+    if key == "overall_quality_score":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if key == "framework_specific_analysis":
+        return isinstance(value, dict)
+    return isinstance(value, list)
+
+def parse_sections(response: str):
+    """Split a model reply into its usable sections and the required keys still missing or malformed.
+
+    A reply that is cut off or not valid JSON as a whole keeps every top-level member
+    that completed. Raises ``json.JSONDecodeError`` or ``ValueError`` only when no
+    required section is usable.
+    """
+    try:
+        assessment = load_json_object(response)
+    except json.JSONDecodeError:
+        assessment = dict(SectionStreamParser().feed(response))
+        if not assessment:
+            raise
+    if not isinstance(assessment, dict):
+        raise ValueError("Assessment is not a JSON object")
+
+    sections = {key: value for key, value in assessment.items()
+                if key not in REQUIRED_KEYS or is_valid_section(key, value)}
+    missing = [key for key in REQUIRED_KEYS if key not in sections]
+    if len(missing) == len(REQUIRED_KEYS):
+        raise ValueError(f"Missing required key in assessment: {missing[0]}")
+    if "overall_quality_score" in sections:
+        sections["overall_quality_score"] = max(0, min(100, sections["overall_quality_score"]))
+    return sections, missing
+
+def complete_sections(transcription: str, framework: str, model: str, sections: dict, missing: list):
+    """Request only the ``missing`` sections and merge them into ``sections``.
+
+    Returns ``(sections, still_missing, input_tokens, output_tokens)``. A failed request
+    leaves everything as it was rather than losing the sections already graded.
+    """
+    messages = get_prompt_template(framework).section_messages(transcription, missing)
+    input_tokens = estimate_message_tokens(messages)
+    response = ""
+    try:
+        with span('complete_sections', framework, model):
+            response = send_openai_request(messages, model=model, json_mode=JSON_MODE)
+            completed, _ = parse_sections(response)
+    except Exception as e:
+        logger.error(f"Completing sections {missing} for framework {framework} failed: {e}")
+        return sections, missing, input_tokens, estimate_tokens(response)
+    sections = dict(sections, **{key: completed[key] for key in missing if key in completed})
+    return sections, [key for key in missing if key not in completed], input_tokens, estimate_tokens(response)
+
+def mark_incomplete(sections: dict, missing: list) -> dict:
+    """Fill ``missing`` sections with empty values and list them in ``incomplete_sections`` for a later re-grade."""
+    assessment = dict(sections)
+    for key in missing:
+        assessment[key] = SECTION_PLACEHOLDERS[key]()
+    assessment["incomplete_sections"] = list(missing)
+    return assessment
+
+GradeAttempt = namedtuple('GradeAttempt', ['assessment', 'model', 'input_tokens', 'output_tokens'])
+
+def grade_transcription(transcription: str, framework: str, model: str = DEFAULT_MODEL,
+                        on_section: Optional[SectionCallback] = None, quote_index=None,
+                        verify_quotes: bool = VERIFY_QUOTES, route: bool = MODEL_ROUTING,
+                        on_escalate: Optional[EscalationCallback] = None) -> dict:
+    """Grade a transcript against a UX framework.
+
+    When ``on_section`` is given the completion is streamed and the callback is
+    invoked with each top-level section of the assessment as soon as it is complete.
+    Quoted evidence is checked against ``quote_index`` (built from the text if not
+    given) and annotated in an ``evidence`` list.
+
+    With ``route`` set, a local pre-filter and the fast model tier decide whether
+    ``model`` is needed at all; the decision and its estimated cost are attached as
+    ``routing``. Sections streamed by a fast-tier pass that is then escalated are sent
+    again by the full tier; ``on_escalate`` is called with the reason in between.
+    """
     # Check for empty or very short inputs
-    if not transcription or len(transcription.split()) < 10:
+    if is_too_short(transcription):
         logger.warning(f"Short or empty input detected: {transcription}")
-        return {
-            "key_insights": ["Input too short for meaningful analysis"],
-            "user_pain_points": ["Unable to identify pain points from short input"],
-            "areas_for_improvement": ["Provide more detailed transcription for better analysis"],
-            "overall_quality_score": 0,
-            "recommendations": ["Ensure the transcription is complete and detailed enough for analysis"],
-            "framework_specific_analysis": {"error": "Input too short for framework-specific analysis"}
-        }
-    
-    prompt = f"""
-    As a UX research expert, analyze the following interview transcript using the {framework_description} framework. 
-    Focus on identifying key UX research insights, user pain points, and potential areas for improvement.
-    
-    Transcript:
-    {transcription}
-    
-    Provide your assessment in the following JSON format:
-    {{
-        "key_insights": ["insight1", "insight2", ...],
-        "user_pain_points": ["pain_point1", "pain_point2", ...],
-        "areas_for_improvement": ["area1", "area2", ...],
-        "overall_quality_score": 0-100,
-        "recommendations": ["recommendation1", "recommendation2", ...],
-        "framework_specific_analysis": {{
-            "key1": "value1",
-            "key2": "value2",
-            ...
-        }}
-    }}
-    
-    For the framework_specific_analysis, include relevant metrics or categories specific to the {framework_description} framework.
-    Quote specific lines from the transcript to provide supporting evidence for framework_specific_analysis and include the exact timestamp from the transcript at which each line can be found.
-    Do not paraphrase the lines you quote, they must match the transcript word for word.
-    """
+        ASSESSMENTS.inc(framework=framework, model=model, outcome='short')
+        assessment = create_short_input_assessment()
+        if route:
+            decision = {'tier': 'reject', 'reasons': ['too_short'], 'signals': text_signals(transcription or '')}
+            return with_routing(assessment, decision, None, [], model)
+        return assessment
+
+    started = time.monotonic()
+    decision = triage(transcription) if route else None
+    if decision is not None and decision['tier'] == 'reject':
+        logger.info(f"Pre-filter rejected transcript for framework {framework}: {decision['reasons']}")
+        ASSESSMENTS.inc(framework=framework, model=model, outcome='rejected')
+        return with_routing(create_low_value_assessment(decision['reasons']), decision, None, [], model)
+
+    if is_long_transcript(transcription):
+        assessment = grade_long_transcription(transcription, framework, model)
+        if verify_quotes and not is_error_assessment(assessment):
+            assessment = verify_evidence(assessment, transcription, quote_index)
+        if on_section is not None:
+            for key in REQUIRED_KEYS:
+                on_section(key, assessment.get(key))
+        if decision is None:
+            return assessment
+        decision = dict(decision, tier='full', reasons=['long'])
+        prompt_tokens = estimate_tokens(transcription)
+        return with_routing(assessment, decision, model, [(model, prompt_tokens, EXPECTED_OUTPUT_TOKENS)], model,
+                            started)
+
+    if decision is None:
+        return grade_with_model(transcription, framework, model, on_section, quote_index, verify_quotes).assessment
+
+    # A re-upload graded before by either tier is served from the cache whatever the triage says.
+    cached_model, cached = cached_assessment(transcription, framework, [resolve_model(model), FAST_MODEL])
+    if cached is not None:
+        ASSESSMENTS.inc(framework=framework, model=cached_model, outcome='cached')
+        if on_section is not None:
+            for key in REQUIRED_KEYS:
+                on_section(key, cached.get(key))
+        return with_routing(cached, dict(decision, tier='cache', reasons=['duplicate']), cached_model, [], model,
+                            started)
 
+    attempts = []
+    if decision['tier'] == 'fast':
+        # A fast result is only cached once it is kept, so an escalated one is never served later.
+        fast = grade_with_model(transcription, framework, FAST_MODEL, on_section, quote_index, verify_quotes,
+                                check_cache=False, cache_result=False)
+        attempts.append(fast[1:])
+        reason = escalation_reason(fast.assessment)
+        if reason is None:
+            cache_assessment(transcription, framework, fast.model, fast.assessment,
+                             int((time.monotonic() - started) * 1000))
+            return with_routing(fast.assessment, decision, FAST_MODEL, attempts, model, started)
+        logger.info(f"Escalating {framework} assessment from {FAST_MODEL} to {model}: {reason}")
+        if on_escalate is not None:
+            on_escalate(reason)
+        decision = dict(decision, reasons=decision['reasons'] + [f'escalated:{reason}'])
+    full = grade_with_model(transcription, framework, model, on_section, quote_index, verify_quotes,
+                            check_cache=False)
+    attempts.append(full[1:])
+    return with_routing(full.assessment, decision, full.model, attempts, model, started)
+
+def grade_with_model(transcription: str, framework: str, model: str, on_section: Optional[SectionCallback] = None,
+                     quote_index=None, verify_quotes: bool = VERIFY_QUOTES, check_cache: bool = True,
+                     cache_result: bool = True) -> GradeAttempt:
+    """One grading call to ``model``, through the assessment cache; token counts are estimates."""
+    # Resolve before keying the cache so a newly fine-tuned model never serves stale entries.
+    model = resolve_model(model)
+    with span('prompt_build', framework, model):
+        template = get_prompt_template(framework)
+        messages = template.messages(transcription)
+    input_tokens = estimate_message_tokens(messages)
+
+    with span('cache_lookup', framework, model):
+        cache_key = make_cache_key(transcription, framework, model, template.version)
+        cached = assessment_cache.get(cache_key) if check_cache else None
+    if cached is not None:
+        logger.info(f"Assessment cache hit for framework: {framework}")
+        ASSESSMENTS.inc(framework=framework, model=model, outcome='cached')
+        if on_section is not None:
+            for key in REQUIRED_KEYS:
+                on_section(key, cached.get(key))
+        return GradeAttempt(cached, model, 0, 0)
+
+    response = ""
     try:
         logger.info(f"Sending request to OpenAI API for framework: {framework}")
-        response = send_openai_request(prompt)
-        response = response[response.find('```json')+7:]
-        response = response[:response.find('```')]
-        assessment = json.loads(response)
+        started = time.monotonic()
+        with span('openai_request', framework, model):
+            if on_section is not None:
+                response = stream_sections(messages, model, on_section)
+            else:
+                response = send_openai_request(messages, model=model, json_mode=JSON_MODE)
+        latency_ms = int((time.monotonic() - started) * 1000)
+        with span('parse_validate', framework, model):
+            assessment, missing = parse_sections(response)
+        output_tokens = estimate_tokens(response)
+        if missing:
+            # Keep what is usable and ask again for the rest only, instead of paying for the whole prompt twice.
+            logger.warning(f"Reply for framework {framework} is missing or has invalid sections: {missing}")
+            requested = missing
+            assessment, missing, extra_input, extra_output = complete_sections(transcription, framework, model,
+                                                                               assessment, missing)
+            input_tokens += extra_input
+            output_tokens += extra_output
+            if on_section is not None:
+                for key in requested:
+                    if key not in missing:
+                        on_section(key, assessment[key])
+        if missing:
+            assessment = mark_incomplete(assessment, missing)
         logger.info("Successfully received and parsed OpenAI API response")
-        
-        # Validate the assessment structure
-        required_keys = ["key_insights", "user_pain_points", "areas_for_improvement", "overall_quality_score", "recommendations", "framework_specific_analysis"]
-        for key in required_keys:
-            if key not in assessment:
-                raise ValueError(f"Missing required key in assessment: {key}")
-        
-        # Ensure overall_quality_score is within the correct range
-        assessment["overall_quality_score"] = max(0, min(100, assessment["overall_quality_score"]))
-        
-        return assessment
+        if verify_quotes:
+            with span('verify_quotes', framework, model):
+                assessment = verify_evidence(assessment, transcription, quote_index)
+
+        if missing:
+            # Never cached, so the next request for this transcript tries again.
+            ASSESSMENTS.inc(framework=framework, model=model, outcome='partial')
+        else:
+            if cache_result:
+                assessment_cache.set(cache_key, assessment, framework, model, template.version, latency_ms)
+            ASSESSMENTS.inc(framework=framework, model=model, outcome='graded')
+        return GradeAttempt(assessment, model, input_tokens, output_tokens)
     except json.JSONDecodeError as e:
         logger.error(f"JSON decoding error: {e}")
         logger.error(f"Response content: {response}")
-        return create_error_assessment("JSON parsing error")
+        ASSESSMENTS.inc(framework=framework, model=model, outcome='error')
+        assessment = create_error_assessment("JSON parsing error")
     except ValueError as e:
         logger.error(f"Value error in assessment: {e}")
-        return create_error_assessment(str(e))
+        ASSESSMENTS.inc(framework=framework, model=model, outcome='error')
+        assessment = create_error_assessment(str(e))
     except Exception as e:
         logger.error(f"Unexpected error in grade_transcription: {e}")
-        return create_error_assessment("Unexpected error")
+        ASSESSMENTS.inc(framework=framework, model=model, outcome='error')
+        assessment = create_error_assessment("Unexpected error")
+    return GradeAttempt(assessment, model, input_tokens, estimate_tokens(response))
+
+def cached_assessment(transcription: str, framework: str, models: list):
+    """The first cached assessment among ``models`` as ``(model, assessment)``, or ``(None, None)``."""
+    template = get_prompt_template(framework)
+    keys = {make_cache_key(transcription, framework, model, template.version): model
+            for model in dict.fromkeys(models)}
+    key, cached = assessment_cache.get_any(list(keys))
+    return keys.get(key), cached
+
+def cache_assessment(transcription: str, framework: str, model: str, assessment: dict, latency_ms: int = 0):
+    template = get_prompt_template(framework)
+    assessment_cache.set(make_cache_key(transcription, framework, model, template.version), assessment, framework,
+                         model, template.version, latency_ms)
+
+def escalation_reason(assessment: dict):
+    """Why a fast-tier result needs the full model, or None to keep it."""
+    if is_error_assessment(assessment):
+        return 'error'
+    if assessment.get("incomplete_sections"):
+        return 'incomplete'
+    return low_confidence(assessment)
+
+def with_routing(assessment: dict, decision: dict, model, attempts: list, baseline_model: str,
+                 started: float = None) -> dict:
+    latency_ms = int((time.monotonic() - started) * 1000) if started is not None else 0
+    # Cache hits inside grade_with_model cost nothing and are not counted as calls.
+    calls = [attempt for attempt in attempts if attempt[1] or attempt[2]]
+    record = routing_record(decision, model, calls, resolve_model(baseline_model), latency_ms)
+    ROUTING_DECISIONS.inc(tier=record['tier'], escalated=str(record['escalated']).lower())
+    if record['saved_usd'] is not None:
+        ROUTING_COST_USD.inc(record['cost_usd'], kind='actual')
+        ROUTING_COST_USD.inc(record['baseline_cost_usd'], kind='baseline')
+    # A copy, so cached results never carry one request's routing into another.
+    return dict(assessment, routing=record)
+
+def regrade_assessment(transcription: str, framework: str, result: dict, sections=None, model: str = DEFAULT_MODEL,
+                       quote_index=None, verify_quotes: bool = VERIFY_QUOTES) -> dict:
+    """Regenerate the sections of a stored result that are incomplete or invalid, plus any in ``sections``.
+
+    Valid sections are kept and only the rest is requested. Error stubs and long
+    transcripts are graded again from scratch; for long ones the chunks that graded
+    cleanly the first time come back from the cache.
+    """
+    stale = set(sections or []) | set(result.get("incomplete_sections", []))
+    stale |= {key for key in REQUIRED_KEYS if not is_valid_section(key, result.get(key))}
+    kept = {key: value for key, value in result.items()
+            if key not in stale and key not in ("incomplete_sections", "routing", "evidence")}
+    if is_error_assessment(result) or is_long_transcript(transcription) or len(stale) == len(REQUIRED_KEYS):
+        return grade_transcription(transcription, framework, model, quote_index=quote_index,
+                                   verify_quotes=verify_quotes)
+    if not stale:
+        return result
+
+    started = time.monotonic()
+    model = resolve_model(model)
+    missing = [key for key in REQUIRED_KEYS if key in stale]
+    logger.info(f"Regrading sections {missing} of a {framework} assessment")
+    assessment, still_missing, input_tokens, output_tokens = complete_sections(transcription, framework, model,
+                                                                               kept, missing)
+    if still_missing:
+        assessment = mark_incomplete(assessment, still_missing)
+    if "framework_specific_analysis" not in stale and "evidence" in result:
+        assessment["evidence"] = result["evidence"]
+    elif verify_quotes:
+        assessment = verify_evidence(assessment, transcription, quote_index)
+    ASSESSMENTS.inc(framework=framework, model=model, outcome='partial' if still_missing else 'regraded')
+
+    decision = {'tier': 'regrade', 'reasons': missing, 'signals': text_signals(transcription)}
+    baseline = (estimate_message_tokens(get_prompt_template(framework).messages(transcription)),
+                EXPECTED_OUTPUT_TOKENS)
+    record = routing_record(decision, model, [(model, input_tokens, output_tokens)], model,
+                            int((time.monotonic() - started) * 1000), baseline_tokens=baseline)
+    return dict(assessment, routing=record)
+
+def grade_long_transcription(transcription: str, framework: str, model: str = DEFAULT_MODEL) -> dict:
+    """Grade a long transcript chunk by chunk in parallel and merge the partial assessments."""
+    chunks = chunk_transcript(transcription)
+    logger.info(f"Grading long transcript in {len(chunks)} chunks for framework: {framework}")
+    # Quotes are verified once against the whole transcript after merging.
+    grade_chunk = with_app_context(lambda chunk: grade_transcription(chunk, framework, model, verify_quotes=False,
+                                                                     route=False))
+    with ThreadPoolExecutor(max_workers=max(1, min(LONG_TRANSCRIPT_WORKERS, len(chunks)))) as executor:
+        partials = list(executor.map(grade_chunk, chunks))
+    return merge_assessments(partials, [estimate_tokens(chunk) for chunk in chunks])
+
+def merge_assessments(partials: list, weights: list) -> dict:
+    """Reduce per-chunk assessments into one, deduplicating list items and keeping quoted evidence."""
+    valid = [(partial, weight) for partial, weight in zip(partials, weights) if not is_error_assessment(partial)]
+    if not valid:
+        return partials[0] if partials else create_error_assessment("No transcript chunks could be graded")
+
+    merged = {}
+    for key in ("key_insights", "user_pain_points", "areas_for_improvement", "recommendations"):
+        merged[key] = dedupe_items(item for partial, _ in valid for item in partial.get(key, []))
+
+    scored = [(partial, weight) for partial, weight in valid
+              if "overall_quality_score" not in partial.get("incomplete_sections", [])] or valid
+    total_weight = sum(weight for _, weight in scored)
+    merged["overall_quality_score"] = round(
+        sum(float(partial.get("overall_quality_score", 0)) * weight for partial, weight in scored) / total_weight
+    )
+
+    analysis = {}
+    for partial, _ in valid:
+        for key, value in partial.get("framework_specific_analysis", {}).items():
+            values = analysis.setdefault(key, [])
+            if value not in values:
+                values.append(value)
+    merged["framework_specific_analysis"] = {
+        key: values[0] if len(values) == 1 else values for key, values in analysis.items()
+    }
+    # Any chunk that lacks a section leaves it incomplete; re-grading repeats only those chunks.
+    incomplete = {key for partial, _ in valid for key in partial.get("incomplete_sections", [])}
+    if incomplete:
+        merged["incomplete_sections"] = [key for key in REQUIRED_KEYS if key in incomplete]
+    return merged
+
+def dedupe_items(items) -> list:
+    kept = []
+    kept_tokens = []
+    for item in items:
+        tokens = set(re.findall(r'\w+', str(item).lower()))
+        if any(tokens == other or jaccard(tokens, other) >= DUPLICATE_SIMILARITY for other in kept_tokens):
+            continue
+        kept.append(item)
+        kept_tokens.append(tokens)
+    return kept
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def is_error_assessment(assessment: dict) -> bool:
+    analysis = assessment.get("framework_specific_analysis")
+    return isinstance(analysis, dict) and set(analysis) == {"error"}
+
+def with_app_context(func):
+    """Wrap ``func`` so worker threads run inside the caller's Flask app context, if any."""
+    if not has_app_context():
+        return func
+    app = current_app._get_current_object()
+
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
+    return wrapper
+
+def stream_sections(messages: list, model: str, on_section: SectionCallback) -> str:
+    """Stream the reply into ``on_section``; a stream cut off after some sections returns what arrived."""
+    parser = SectionStreamParser()
+    parts = []
+    delivered = 0
+    try:
+        for delta in stream_openai_request(messages, model=model, json_mode=JSON_MODE):
+            parts.append(delta)
+            for key, value in parser.feed(delta):
+                on_section(key, value)
+                delivered += 1
+    except Exception as e:
+        if not delivered:
+            raise
+        logger.warning(f"Stream ended after {delivered} sections: {e}")
+    response = ''.join(parts).strip()
+    if not response:
+        raise ValueError("OpenAI returned an empty response.")
+    return response
+
+def is_too_short(transcription: str) -> bool:
+    return not transcription or len(transcription.split()) < 10
+
+def create_short_input_assessment() -> dict:
+    return {
+        "key_insights": ["Input too short for meaningful analysis"],
+        "user_pain_points": ["Unable to identify pain points from short input"],
+        "areas_for_improvement": ["Provide more detailed transcription for better analysis"],
+        "overall_quality_score": 0,
+        "recommendations": ["Ensure the transcription is complete and detailed enough for analysis"],
+        "framework_specific_analysis": {"error": "Input too short for framework-specific analysis"}
+    }
+
+def create_low_value_assessment(reasons) -> dict:
+    return {
+        "key_insights": ["Input does not look like a research transcript"],
+        "user_pain_points": ["Unable to identify pain points from this input"],
+        "areas_for_improvement": ["Submit the interview or session transcript itself"],
+        "overall_quality_score": 0,
+        "recommendations": ["Check the upload is the right file and in plain text"],
+        "framework_specific_analysis": {"error": f"Skipped by the pre-filter: {', '.join(reasons)}"}
+    }
 
 def create_error_assessment(error_message: str) -> dict:
     return {
@@ -0,0 +1,256 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from extensions import db
+from models import Transcription, Assessment, Embedding
+from grading_framework import (grade_transcription, regrade_assessment, with_app_context, is_too_short, REQUIRED_KEYS,
+                               VERIFY_QUOTES, DEFAULT_MODEL)
+from quote_index import QuoteIndex, QUOTE_INDEX_VERSION, verify_evidence
+from embeddings import near_duplicate_assessments, embed_assessments, assessment_items
+from job_queue import task
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FRAMEWORK_CONCURRENCY = int(os.environ.get("FRAMEWORK_CONCURRENCY", 3))
+# Embed each transcript to flag near matches (``similar_to``); grades are reused for identical text either way.
+FLAG_SIMILAR_TRANSCRIPTS = os.environ.get("FLAG_SIMILAR_TRANSCRIPTS", "0") == "1"
+
+
+def load_transcription(transcription_id):
+    transcription = db.session.get(Transcription, transcription_id)
+    if transcription is None:
+        raise ValueError(f"Transcription {transcription_id} not found")
+    return transcription
+
+
+def load_quote_index(transcription):
+    """Index for verifying quotes; rows ingested before indexing existed get one built and saved."""
+    stored = transcription.quote_index
+    index = QuoteIndex.load(transcription.text, stored)
+    if not stored or stored.get('version') != QUOTE_INDEX_VERSION:
+        transcription.quote_index = index.to_dict()
+    return index
+
+
+def store_assessment(transcription, framework, assessment_result):
+    # Routing is bookkeeping about how the result was produced, kept out of the result itself.
+    routing = assessment_result.get('routing')
+    result = {key: value for key, value in assessment_result.items() if key != 'routing'}
+    try:
+        new_assessment = Assessment(transcription_id=transcription.id, project_id=transcription.project_id,
+                                    framework=framework, result=result, routing=routing,
+                                    model=routing.get('model') if routing else None)
+        db.session.add(new_assessment)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info(f"New assessment created for transcription ID: {transcription.id}")
+    return new_assessment
+
+
+def update_assessment(assessment, assessment_result):
+    """Replace a stored result in place; the ORM hooks keep metric columns and project stats in step."""
+    routing = assessment_result.get('routing')
+    try:
+        assessment.result = {key: value for key, value in assessment_result.items() if key != 'routing'}
+        assessment.routing = routing
+        if routing and routing.get('model'):
+            assessment.model = routing['model']
+        # Item embeddings describe the old result; they are rebuilt by the caller.
+        Embedding.query.filter_by(assessment_id=assessment.id).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info(f"Assessment {assessment.id} updated")
+    return assessment
+
+
+def identical_transcript_assessments(transcription, frameworks) -> dict:
+    """Map each framework to the latest usable assessment of another transcript in the same project with
+    exactly the same text. A plain equality filter in SQL; no embeddings are needed."""
+    project_filter = Transcription.project_id.is_(None) if transcription.project_id is None \
+        else Transcription.project_id == transcription.project_id
+    matches = {}
+    for assessment in Assessment.query.join(Transcription, Assessment.transcription_id == Transcription.id) \
+            .filter(Transcription.text == transcription.text, project_filter, Transcription.id != transcription.id,
+                    Assessment.framework.in_(frameworks)) \
+            .order_by(Assessment.id.desc()):
+        if assessment.framework not in matches and assessment_items(assessment.result):
+            matches[assessment.framework] = assessment
+    return matches
+
+
+def reuse_duplicates(transcription, frameworks, quote_index):
+    """Results to copy from an already-graded transcript, and near matches to flag, each keyed by framework.
+
+    Grades are copied only from a transcript with identical text, since interviews that
+    share a template can differ in every answer; copies differing only in whitespace are
+    served by the assessment cache instead. With FLAG_SIMILAR_TRANSCRIPTS, the frameworks
+    left over are checked by embedding similarity and close matches are noted in
+    ``similar_to`` for review. Failures only mean grading goes ahead as usual.
+    """
+    if is_too_short(transcription.text):
+        return {}, {}
+    try:
+        identical = identical_transcript_assessments(transcription, frameworks)
+        remaining = [framework for framework in frameworks if framework not in identical]
+        # Embedding costs an API call and a scan of the project's vectors, for a flag only.
+        matches = near_duplicate_assessments(transcription, remaining) \
+            if FLAG_SIMILAR_TRANSCRIPTS and remaining else {}
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Duplicate check failed for transcription {transcription.id}: {str(e)}")
+        return {}, {}
+
+    reused = {}
+    for framework, assessment in identical.items():
+        logger.info(f"Transcription {transcription.id} has the same text as {assessment.transcription_id}; "
+                    f"reusing its {framework} assessment")
+        result = {key: value for key, value in assessment.result.items()
+                  if key not in ('evidence', 'duplicate_of', 'similar_to', 'routing')}
+        if VERIFY_QUOTES:
+            result = verify_evidence(result, transcription.text, quote_index)
+        result['duplicate_of'] = {'transcription_id': assessment.transcription_id, 'assessment_id': assessment.id,
+                                  'similarity': 1.0}
+        result['routing'] = {'tier': 'reuse', 'reasons': ['duplicate_text'], 'model': assessment.model,
+                             'models_called': [], 'escalated': False, 'input_tokens': 0, 'output_tokens': 0,
+                             'cost_usd': 0.0, 'baseline_cost_usd': None, 'saved_usd': None, 'latency_ms': 0}
+        reused[framework] = result
+
+    similar = {}
+    for framework, (assessment, similarity) in matches.items():
+        logger.info(f"Transcription {transcription.id} is similar ({similarity:.3f}) to "
+                    f"{assessment.transcription_id}; grading it and flagging the match for review")
+        similar[framework] = {'transcription_id': assessment.transcription_id, 'assessment_id': assessment.id,
+                              'similarity': round(similarity, 4)}
+    return reused, similar
+
+
+def flag_similar(assessment_result, framework, similar):
+    if framework not in similar:
+        return assessment_result
+    return dict(assessment_result, similar_to=similar[framework])
+
+
+def embed_stored_assessments(assessments):
+    try:
+        embed_assessments([(assessment.id, assessment.transcription_id, assessment.project_id, assessment.result)
+                           for assessment in assessments])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Embedding assessments {[assessment.id for assessment in assessments]} failed: {str(e)}")
+
+
+@task('grade_transcription')
+def grade_transcription_job(job, transcription_id, framework, stream=False):
+    transcription = load_transcription(transcription_id)
+
+    def emit_chunk(section, content):
+        job.emit('assessment_chunk', {
+            'transcription_id': transcription_id,
+            'framework': framework,
+            'section': section,
+            'content': content
+        })
+
+    def emit_reset(reason):
+        # The fast tier's sections are superseded; the full tier streams its own.
+        job.emit('assessment_reset', {
+            'transcription_id': transcription_id,
+            'framework': framework,
+            'reason': reason
+        })
+
+    quote_index = load_quote_index(transcription)
+    reused, similar = reuse_duplicates(transcription, [framework], quote_index)
+    if framework in reused:
+        job.progress('reused', transcription_id=transcription_id, framework=framework)
+        assessment_result = reused[framework]
+        if stream:
+            for key in REQUIRED_KEYS:
+                emit_chunk(key, assessment_result.get(key))
+    else:
+        job.progress('grading', transcription_id=transcription_id, framework=framework)
+        assessment_result = flag_similar(grade_transcription(transcription.text, framework,
+                                                             on_section=emit_chunk if stream else None,
+                                                             on_escalate=emit_reset if stream else None,
+                                                             quote_index=quote_index), framework, similar)
+    new_assessment = store_assessment(transcription, framework, assessment_result)
+    embed_stored_assessments([new_assessment])
+
+    job.emit('assessment_result', {
+        'transcription_id': transcription_id,
+        'framework': framework,
+        'assessment': assessment_result
+    })
+    return {'transcription_id': transcription_id, 'assessment_ids': {framework: new_assessment.id}}
+
+
+@task('grade_frameworks')
+def grade_frameworks_job(job, transcription_id, frameworks, concurrency=FRAMEWORK_CONCURRENCY):
+    """Grade one transcript against several frameworks concurrently, emitting each result as it lands."""
+    transcription = load_transcription(transcription_id)
+    text = transcription.text
+    quote_index = load_quote_index(transcription)
+    grade = with_app_context(lambda framework: grade_transcription(text, framework, quote_index=quote_index))
+
+    stored = []
+
+    def store_and_emit(framework, assessment_result):
+        stored.append(store_assessment(transcription, framework, assessment_result))
+        job.emit('assessment_result', {
+            'transcription_id': transcription_id,
+            'framework': framework,
+            'assessment': assessment_result,
+            'completed': len(stored),
+            'total': len(frameworks)
+        })
+
+    reused, similar = reuse_duplicates(transcription, frameworks, quote_index)
+    if reused:
+        job.progress('reused', transcription_id=transcription_id, frameworks=list(reused))
+    for framework, assessment_result in reused.items():
+        store_and_emit(framework, assessment_result)
+    remaining = [framework for framework in frameworks if framework not in reused]
+
+    if remaining:
+        job.progress('grading', transcription_id=transcription_id, frameworks=remaining)
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(remaining)))) as executor:
+            futures = {executor.submit(grade, framework): framework for framework in remaining}
+            for future in job.as_completed(futures):
+                framework = futures[future]
+                store_and_emit(framework, flag_similar(future.result(), framework, similar))
+    embed_stored_assessments(stored)
+    return {'transcription_id': transcription_id,
+            'assessment_ids': {assessment.framework: assessment.id for assessment in stored}}
+
+
+@task('regrade_assessment')
+def regrade_assessment_job(job, assessment_id, sections=None):
+    """Re-grade an existing assessment, regenerating only the sections that are missing, invalid or requested."""
+    assessment = db.session.get(Assessment, assessment_id)
+    if assessment is None:
+        raise ValueError(f"Assessment {assessment_id} not found")
+    transcription = load_transcription(assessment.transcription_id)
+    job.progress('grading', transcription_id=transcription.id, framework=assessment.framework,
+                 assessment_id=assessment_id)
+    assessment_result = regrade_assessment(transcription.text, assessment.framework, assessment.result, sections,
+                                           model=assessment.model or DEFAULT_MODEL,
+                                           quote_index=load_quote_index(transcription))
+    if assessment_result is not assessment.result:
+        update_assessment(assessment, assessment_result)
+        embed_stored_assessments([assessment])
+
+    job.emit('assessment_result', {
+        'transcription_id': transcription.id,
+        'framework': assessment.framework,
+        'assessment_id': assessment_id,
+        'assessment': assessment_result,
+        'regraded': True
+    })
+    return {'transcription_id': transcription.id, 'assessment_ids': {assessment.framework: assessment_id}}
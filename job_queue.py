@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import uuid
+import logging
+import importlib
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from metrics import profiling, span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_URL = os.environ.get("JOB_QUEUE_URL", "local://")
+JOB_QUEUE_WORKERS = int(os.environ.get("JOB_QUEUE_WORKERS", 4))
+JOB_QUEUE_MAX_PENDING = int(os.environ.get("JOB_QUEUE_MAX_PENDING", 500))
+# How long the status of a finished or failed job stays available from /jobs/<id>.
+JOB_STATUS_TTL_SECONDS = int(os.environ.get("JOB_STATUS_TTL_SECONDS", 86400))
+FINISHED_JOB_STATUSES = ('finished', 'failed')
+
+TASKS = {}
+# Tasks whose module is imported only when one of them is first submitted or run.
+TASK_MODULES = {}
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def task(name):
+    """Register a function so it can be submitted to the queue by name."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def register_task_module(name, module):
+    """Declare that task ``name`` is defined in ``module`` without importing it yet."""
+    TASK_MODULES[name] = module
+
+
+def get_task(name):
+    if name not in TASKS and name in TASK_MODULES:
+        importlib.import_module(TASK_MODULES[name])
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+    return TASKS[name]
+
+
+class Job:
+    """Handle passed to a running task so it can report back to its client."""
+
+    def __init__(self, queue, job_id, room=None):
+        self.queue = queue
+        self.id = job_id
+        self.room = room
+
+    def emit(self, event, data):
+        if self.room is None:
+            return
+        payload = dict(data, job_id=self.id)
+        self.queue.socketio.emit(event, payload, to=self.room)
+
+    def progress(self, stage, **extra):
+        self.queue.set_status(self.id, 'running', stage=stage)
+        self.emit('assessment_progress', dict(extra, stage=stage))
+
+    def wait(self, future, poll_seconds=0.05):
+        """Result of a concurrent.futures future, yielding to other tasks while it is pending.
+
+        ``future.result()`` would hold an eventlet or gevent worker for the whole wait.
+        """
+        while not future.done():
+            self.queue.socketio.sleep(poll_seconds)
+        return future.result()
+
+    def as_completed(self, futures, poll_seconds=0.05):
+        """Yield futures as they finish, like ``concurrent.futures.as_completed`` but yielding while none has."""
+        pending = list(futures)
+        while pending:
+            done = [future for future in pending if future.done()]
+            if not done:
+                self.queue.socketio.sleep(poll_seconds)
+                continue
+            for future in done:
+                pending.remove(future)
+                yield future
+
+
+class LocalJobQueue:
+    """In-process queue served by a bounded pool of Socket.IO background tasks.
+
+    Background tasks are started through ``socketio.start_background_task`` so
+    they cooperate with whichever async mode (eventlet, gevent, threading) the
+    server is running under.
+    """
+
+    def __init__(self, app, socketio, workers=JOB_QUEUE_WORKERS, max_pending=JOB_QUEUE_MAX_PENDING):
+        self.app = app
+        self.socketio = socketio
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue = None
+        self._statuses = {}
+        self._expiry = deque()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._queue = self.socketio.server.eio.create_queue()
+        for _ in range(self.workers):
+            self.socketio.start_background_task(self._worker)
+        logger.info(f"Started {self.workers} job queue workers")
+
+    def submit(self, task_name, *args, room=None, profile=False):
+        get_task(task_name)
+        self.start()
+        self._reserve()
+        try:
+            job_id = uuid.uuid4().hex
+            self.set_status(job_id, 'queued')
+            self._put({'id': job_id, 'task': task_name, 'args': list(args), 'room': room, 'profile': profile})
+        except Exception:
+            # Nothing was queued, so no worker will release the slot.
+            self._release()
+            raise
+        return job_id
+
+    def set_status(self, job_id, status, **extra):
+        now = time.monotonic()
+        with self._lock:
+            self._statuses[job_id] = dict(extra, status=status, updated_at=datetime.utcnow().isoformat())
+            if status in FINISHED_JOB_STATUSES:
+                self._expiry.append((now + JOB_STATUS_TTL_SECONDS, job_id))
+            # Finished jobs expire after the TTL, as Redis does with the key expiry.
+            while self._expiry and self._expiry[0][0] <= now:
+                _, expired_id = self._expiry.popleft()
+                self._statuses.pop(expired_id, None)
+
+    def status(self, job_id):
+        return self._statuses.get(job_id)
+
+    def _put(self, payload):
+        self._queue.put(payload)
+
+    def _get(self):
+        return self._queue.get()
+
+    def _worker(self):
+        while True:
+            payload = self._get()
+            if payload is None:
+                continue
+            try:
+                self._run(payload)
+            finally:
+                self._release()
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError("Too many pending jobs, please retry shortly")
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending = max(0, self._pending - 1)
+
+    def _run(self, payload):
+        job = Job(self, payload['id'], payload.get('room'))
+        self.set_status(job.id, 'running')
+        with self.app.app_context(), span(f"job_{payload['task']}"), \
+                profiling(f"job-{payload['task']}", enabled=payload.get('profile', False)):
+            try:
+                result = get_task(payload['task'])(job, *payload['args'])
+                self.set_status(job.id, 'finished', result=result)
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}")
+                logger.error(f"Traceback: {traceback.format_exc()}")
+                self.set_status(job.id, 'failed', error=str(e))
+                job.emit('assessment_error', {'error': str(e)})
+
+
+class RedisJobQueue(LocalJobQueue):
+    """Queue backed by a Redis list so jobs survive restarts and can be shared by workers."""
+
+    def __init__(self, app, socketio, url, **kwargs):
+        super().__init__(app, socketio, **kwargs)
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("JOB_QUEUE_URL points to Redis but the redis package is not installed")
+        self._redis = redis.Redis.from_url(url)
+        self._key = 'verita:jobs'
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.workers):
+            self.socketio.start_background_task(self._worker)
+        logger.info(f"Started {self.workers} Redis job queue workers")
+
+    def _reserve(self):
+        if self._redis.llen(self._key) >= self.max_pending:
+            raise QueueFullError("Too many pending jobs, please retry shortly")
+
+    def _release(self):
+        pass
+
+    def set_status(self, job_id, status, **extra):
+        value = json.dumps(dict(extra, status=status, updated_at=datetime.utcnow().isoformat()))
+        self._redis.set(f'verita:job:{job_id}', value, ex=JOB_STATUS_TTL_SECONDS)
+
+    def status(self, job_id):
+        value = self._redis.get(f'verita:job:{job_id}')
+        return json.loads(value) if value else None
+
+    def _put(self, payload):
+        self._redis.rpush(self._key, json.dumps(payload))
+
+    def _get(self):
+        item = self._redis.blpop(self._key, timeout=1)
+        if item is None:
+            self.socketio.sleep(0)
+            return None
+        return json.loads(item[1])
+
+
+def create_job_queue(app, socketio, url=JOB_QUEUE_URL):
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisJobQueue(app, socketio, url)
+    return LocalJobQueue(app, socketio)
@@ -1,7 +1,20 @@
-from app import app, socketio
-from extensions import db
-
+# Everything runs under the guard: the spawned speech-to-text workers re-import this module as
+# __mp_main__ and must not monkey-patch or build the Flask app.
 if __name__ == "__main__":
+    try:
+        import eventlet
+    except ImportError:
+        eventlet = None
+    if eventlet is not None:
+        # Before anything else is imported, so OpenAI, HTTP and database calls made by the job queue's
+        # background tasks yield to the hub instead of blocking every socket on the worker.
+        eventlet.monkey_patch()
+
+    from app import app, socketio
+    from extensions import db
+    from routes import start_background_services
+
     with app.app_context():
         db.create_all()
+    start_background_services(app, socketio)
     socketio.run(app, host='0.0.0.0', port=5000)
@@ -0,0 +1,233 @@
+"""In-process metrics for the grading pipeline, rendered in the Prometheus text exposition format.
+
+Kept dependency-free so any module can record into it without pulling in a client library.
+"""
+import os
+import sys
+import time
+import math
+import logging
+import threading
+from contextlib import contextmanager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+                                for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', format_value(bound))])} "
+                             f"{count}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+class Collected(Metric):
+    """Values read at scrape time from ``collect()``, which returns ``{label values tuple: value}``.
+
+    Use ``kind='counter'`` for cumulative totals kept elsewhere, e.g. in a stats dict.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), collect=None, kind='gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def render(self):
+        try:
+            values = self.collect() if self.collect else {}
+        except Exception as e:
+            logger.error(f"Collecting {self.name} failed: {e}")
+            values = {}
+        return self.header() + [f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+                                for key, value in sorted(values.items())]
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram('verita_stage_seconds', 'Time spent in each stage of the grading pipeline.',
+                          ['stage', 'framework', 'model'])
+OPENAI_TOKENS = Counter('verita_openai_tokens_total', 'Tokens sent to and received from OpenAI.',
+                        ['model', 'direction'])
+ASSESSMENTS = Counter('verita_assessments_total', 'Assessments produced, by how they were obtained.',
+                      ['framework', 'model', 'outcome'])
+ROUTING_DECISIONS = Counter('verita_routing_decisions_total', 'Model routing decisions, by tier.',
+                            ['tier', 'escalated'])
+# Savings are baseline minus actual; escalations make a single request cost more than its baseline.
+ROUTING_COST_USD = Counter('verita_routing_cost_usd_total',
+                           'Estimated OpenAI spend with routing (actual) and with the full model for everything (baseline).',
+                           ['kind'])
+
+
+@contextmanager
+def span(stage, framework='', model=''):
+    """Time the enclosed block into ``verita_stage_seconds``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, framework=framework, model=model)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class FoldedStackProfiler:
+    """Deterministic profiler for the current thread that records time per call stack.
+
+    Output is the folded-stack format (``frame;frame;frame microseconds`` per line)
+    read by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self._stack = []
+        self._previous = None
+
+    def start(self, root='root'):
+        self._previous = sys.getprofile()
+        self._stack = [[root, time.perf_counter(), 0.0]]
+        sys.setprofile(self._profile)
+
+    def stop(self):
+        sys.setprofile(self._previous)
+        now = time.perf_counter()
+        while self._stack:
+            self._pop(now)
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == 'call':
+            self._stack.append([self._label(frame), now, 0.0])
+        elif event == 'c_call':
+            self._stack.append([f"{getattr(arg, '__qualname__', arg)} (builtin)", now, 0.0])
+        elif event in ('return', 'c_return', 'c_exception') and len(self._stack) > 1:
+            self._pop(now)
+
+    def _pop(self, now):
+        label, started, children = self._stack.pop()
+        elapsed = now - started
+        path = ';'.join([entry[0] for entry in self._stack] + [label])
+        self.totals[path] = self.totals.get(path, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def folded(self) -> str:
+        return ''.join(f"{path} {max(1, int(seconds * 1e6))}\n" for path, seconds in sorted(self.totals.items()))
+
+
+def start_profile(name):
+    if not PROFILING_ENABLED:
+        return None
+    profiler = FoldedStackProfiler()
+    profiler.start(name)
+    return profiler
+
+
+def write_profile(profiler, name) -> str:
+    """Stop ``profiler`` and write ``<PROFILE_DIR>/<name>-<timestamp>.folded``; returns the path."""
+    profiler.stop()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_name = ''.join(char if char.isalnum() or char in '-_' else '_' for char in name)
+    path = os.path.join(PROFILE_DIR, f"{safe_name}-{time.time_ns() // 1000}.folded")
+    with open(path, 'w') as output:
+        output.write(profiler.folded())
+    logger.info(f"Wrote profile {path}")
+    return path
+
+
+@contextmanager
+def profiling(name, enabled=True):
+    """Profile the enclosed block when PROFILING_ENABLED is set and ``enabled`` is true.
+
+    Only the calling thread is profiled; work handed to other threads shows up as waiting.
+    """
+    profiler = start_profile(name) if enabled else None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            write_profile(profiler, name)
@@ -0,0 +1,110 @@
+"""Add denormalized metric columns to assessment
+
+Revision ID: 5d7b9e0c2f41
+Revises: 8c4e1d2a6b37
+Create Date: 2026-10-18 11:26:03.581442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7b9e0c2f41'
+down_revision = '8c4e1d2a6b37'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+assessment = sa.table('assessment',
+    sa.column('id', sa.Integer),
+    sa.column('transcription_id', sa.Integer),
+    sa.column('result', sa.JSON),
+    sa.column('project_id', sa.Integer),
+    sa.column('framework', sa.String),
+    sa.column('overall_quality_score', sa.Float),
+    sa.column('key_insight_count', sa.Integer),
+    sa.column('pain_point_count', sa.Integer),
+    sa.column('improvement_count', sa.Integer),
+)
+transcription = sa.table('transcription',
+    sa.column('id', sa.Integer),
+    sa.column('project_id', sa.Integer),
+)
+
+
+def metrics(result):
+    result = result if isinstance(result, dict) else {}
+
+    def count(key):
+        value = result.get(key)
+        return len(value) if isinstance(value, list) else 0
+
+    try:
+        score = float(result.get('overall_quality_score') or 0)
+    except (TypeError, ValueError):
+        score = 0.0
+    return {
+        'overall_quality_score': score,
+        'key_insight_count': count('key_insights'),
+        'pain_point_count': count('user_pain_points'),
+        'improvement_count': count('areas_for_improvement'),
+    }
+
+
+def upgrade():
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('project_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('framework', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('overall_quality_score', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('key_insight_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('pain_point_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('improvement_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_foreign_key('fk_assessment_project_id', 'project', ['project_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_assessment_project_id'), ['project_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_assessment_framework'), ['framework'], unique=False)
+
+    # Backfill in keyset-paginated batches; the metrics are computed in Python so the
+    # same logic works whether result is stored as json or jsonb.
+    connection = op.get_bind()
+    op.execute(
+        assessment.update()
+        .where(assessment.c.transcription_id == transcription.c.id)
+        .values(project_id=transcription.c.project_id)
+    )
+    # The framework of rows graded before it was stored is unknown; mark them general.
+    op.execute(assessment.update().where(assessment.c.framework.is_(None)).values(framework='general'))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(assessment.c.id, assessment.c.result)
+            .where(assessment.c.id > last_id)
+            .order_by(assessment.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            assessment.update().where(assessment.c.id == sa.bindparam('assessment_id')).values(
+                overall_quality_score=sa.bindparam('overall_quality_score'),
+                key_insight_count=sa.bindparam('key_insight_count'),
+                pain_point_count=sa.bindparam('pain_point_count'),
+                improvement_count=sa.bindparam('improvement_count'),
+            ),
+            [dict(metrics(row.result), assessment_id=row.id) for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_assessment_framework'))
+        batch_op.drop_index(batch_op.f('ix_assessment_project_id'))
+        batch_op.drop_constraint('fk_assessment_project_id', type_='foreignkey')
+        batch_op.drop_column('improvement_count')
+        batch_op.drop_column('pain_point_count')
+        batch_op.drop_column('key_insight_count')
+        batch_op.drop_column('overall_quality_score')
+        batch_op.drop_column('framework')
+        batch_op.drop_column('project_id')
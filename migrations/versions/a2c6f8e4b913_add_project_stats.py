@@ -0,0 +1,45 @@
+"""Add project stats rollup table
+
+Revision ID: a2c6f8e4b913
+Revises: 5d7b9e0c2f41
+Create Date: 2026-10-18 12:08:47.902316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c6f8e4b913'
+down_revision = '5d7b9e0c2f41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('project_stats',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('assessment_count', sa.Integer(), nullable=False),
+    sa.Column('sum_quality_score', sa.Float(), nullable=False),
+    sa.Column('sum_key_insights', sa.Integer(), nullable=False),
+    sa.Column('sum_pain_points', sa.Integer(), nullable=False),
+    sa.Column('sum_improvements', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    # Seed the rollup from the metric columns backfilled in the previous revision.
+    op.execute("""
+        INSERT INTO project_stats (project_id, assessment_count, sum_quality_score,
+                                   sum_key_insights, sum_pain_points, sum_improvements, updated_at)
+        SELECT project_id, COUNT(id), COALESCE(SUM(overall_quality_score), 0),
+               COALESCE(SUM(key_insight_count), 0), COALESCE(SUM(pain_point_count), 0),
+               COALESCE(SUM(improvement_count), 0), CURRENT_TIMESTAMP
+        FROM assessment
+        WHERE project_id IS NOT NULL
+        GROUP BY project_id
+    """)
+
+
+def downgrade():
+    op.drop_table('project_stats')
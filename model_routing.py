@@ -0,0 +1,125 @@
+"""Decide which model tier grades a transcript, and estimate what each decision cost and saved.
+
+Tiers: ``reject`` (local pre-filter, no API call), ``cache`` (already graded), ``fast``
+(FAST_MODEL, escalated to the full model only when its result is unusable or shows low
+confidence) and ``full``. Costs are estimates from character-based token counts and MODEL_PRICES.
+"""
+import os
+import re
+import json
+from transcript_chunking import estimate_tokens
+
+MODEL_ROUTING = os.environ.get("MODEL_ROUTING", "1") == "1"
+FAST_MODEL = os.environ.get("FAST_MODEL", "gpt-4o-mini")
+# Transcripts up to this many tokens are graded by the fast tier first.
+FAST_TIER_MAX_TOKENS = int(os.environ.get("FAST_TIER_MAX_TOKENS", 2000))
+# Fast-tier results whose quotes are found in the transcript less often than this are regraded by the full model.
+MIN_MATCHED_QUOTE_RATIO = float(os.environ.get("ROUTING_MIN_MATCHED_QUOTES", 0.5))
+
+MIN_ALPHA_RATIO = 0.6
+# Share of distinct word trigrams; unlike the distinct-word ratio it does not fall as transcripts get longer.
+MIN_UNIQUE_TRIGRAM_RATIO = 0.3
+MIN_STOPWORD_RATIO = 0.08
+REPETITION_MIN_WORDS = 50
+# Typical assessment length, used to price a call that was never made.
+EXPECTED_OUTPUT_TOKENS = 700
+
+# USD per million input and output tokens.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+MODEL_PRICES.update({model: tuple(prices) for model, prices in
+                     json.loads(os.environ.get("MODEL_PRICES_JSON", "{}")).items()})
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be but by do for from had has have i if in is it its just me my no not of on or so that
+the then there they this to was we were what when which who will with would you your
+""".split())
+
+
+def text_signals(text: str) -> dict:
+    words = [word.lower() for word in WORD_PATTERN.findall(text)]
+    trigrams = list(zip(words, words[1:], words[2:]))
+    non_space = sum(1 for char in text if not char.isspace()) or 1
+    return {
+        'words': len(words),
+        'tokens': estimate_tokens(text),
+        'alpha_ratio': round(sum(1 for char in text if char.isalpha()) / non_space, 3),
+        'unique_trigram_ratio': round(len(set(trigrams)) / len(trigrams), 3) if trigrams else 1.0,
+        'stopword_ratio': round(sum(1 for word in words if word in STOPWORDS) / len(words), 3) if words else 0.0,
+    }
+
+
+def triage(text: str) -> dict:
+    """Local pre-filter: ``{'tier': 'reject' | 'fast' | 'full', 'reasons': [...], 'signals': {...}}``."""
+    signals = text_signals(text)
+    reject = []
+    if signals['alpha_ratio'] < MIN_ALPHA_RATIO:
+        reject.append('not_prose')
+    if signals['words'] >= REPETITION_MIN_WORDS and signals['unique_trigram_ratio'] < MIN_UNIQUE_TRIGRAM_RATIO:
+        reject.append('repetitive')
+    if reject:
+        return {'tier': 'reject', 'reasons': reject, 'signals': signals}
+
+    fast = []
+    if signals['tokens'] <= FAST_TIER_MAX_TOKENS:
+        fast.append('short')
+    if signals['stopword_ratio'] < MIN_STOPWORD_RATIO:
+        # Not conversational English: off-topic text, or another language worth a cheap first look.
+        fast.append('language')
+    return {'tier': 'fast' if fast else 'full', 'reasons': fast, 'signals': signals}
+
+
+def low_confidence(assessment: dict):
+    """Why a complete fast-tier result should not be trusted, or None.
+
+    The fast model reports no confidence of its own, so this looks for what a weak
+    grading leaves behind: no framework analysis, or quotes that are not in the transcript.
+    """
+    if not assessment.get("framework_specific_analysis"):
+        return 'no_analysis'
+    evidence = assessment.get("evidence") or []
+    if evidence and sum(1 for entry in evidence if entry.get('matched')) / len(evidence) < MIN_MATCHED_QUOTE_RATIO:
+        return 'unmatched_quotes'
+    return None
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int):
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def routing_record(decision, model, attempts, baseline_model, latency_ms=None, baseline_tokens=None) -> dict:
+    """Summarize a routing decision for storage on the Assessment.
+
+    ``attempts`` is a list of ``(model, input_tokens, output_tokens)`` for calls actually
+    made. The baseline is one call to ``baseline_model`` with the same prompt, which is
+    what every transcript cost before routing, unless ``baseline_tokens`` gives the
+    ``(input_tokens, output_tokens)`` to price instead.
+    """
+    input_tokens = sum(attempt[1] for attempt in attempts)
+    output_tokens = sum(attempt[2] for attempt in attempts)
+    costs = [estimate_cost(*attempt) for attempt in attempts]
+    cost = sum(costs) if None not in costs else None
+    prompt_tokens = attempts[0][1] if attempts else decision['signals']['tokens']
+    completion_tokens = attempts[-1][2] if attempts else EXPECTED_OUTPUT_TOKENS
+    if baseline_tokens is not None:
+        prompt_tokens, completion_tokens = baseline_tokens
+    baseline = estimate_cost(baseline_model, prompt_tokens, completion_tokens)
+    return {
+        'tier': decision['tier'],
+        'reasons': decision['reasons'],
+        'model': model,
+        'models_called': [attempt[0] for attempt in attempts],
+        'escalated': len(attempts) > 1,
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'cost_usd': round(cost, 6) if cost is not None else None,
+        'baseline_cost_usd': round(baseline, 6) if baseline is not None else None,
+        'saved_usd': round(baseline - cost, 6) if baseline is not None and cost is not None else None,
+        'latency_ms': latency_ms,
+    }
@@ -1,5 +1,7 @@
 from extensions import db
 from datetime import datetime
+from sqlalchemy import event, inspect
+from quote_index import build_quote_index
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,12 +13,193 @@ class Project(db.Model):
 class Transcription(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=True)
+    # Word and timestamp index used to verify quoted evidence; see quote_index.py.
+    quote_index = db.Column(db.JSON)
     assessments = db.relationship('Assessment', backref='transcription', lazy=True)
+    # Keyset pagination walks id descending within a project.
+    __table_args__ = (db.Index('ix_transcription_project_id_id', 'project_id', 'id'),)
+
+@event.listens_for(Transcription, 'before_insert')
+@event.listens_for(Transcription, 'before_update')
+def populate_quote_index(mapper, connection, target):
+    if target.quote_index is None or inspect(target).attrs.text.history.has_changes():
+        target.quote_index = build_quote_index(target.text)
 
 class Assessment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    transcription_id = db.Column(db.Integer, db.ForeignKey('transcription.id'), nullable=False)
+    transcription_id = db.Column(db.Integer, db.ForeignKey('transcription.id'), nullable=False, index=True)
     result = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Denormalized from result/transcription at write time so reporting never scans JSON.
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=True, index=True)
+    framework = db.Column(db.String(50), index=True)
+    overall_quality_score = db.Column(db.Float, nullable=False, default=0)
+    key_insight_count = db.Column(db.Integer, nullable=False, default=0)
+    pain_point_count = db.Column(db.Integer, nullable=False, default=0)
+    improvement_count = db.Column(db.Integer, nullable=False, default=0)
+    # Model that produced the result and the routing decision behind it (tier, calls, estimated cost).
+    model = db.Column(db.String(100))
+    routing = db.Column(db.JSON)
+    __table_args__ = (
+        db.Index('ix_assessment_project_framework_id', 'project_id', 'framework', 'id'),
+        db.Index('ix_assessment_project_score', 'project_id', 'overall_quality_score'),
+        # Serves JSON containment (@>) searches; result is json, so the index is on its jsonb cast.
+        db.Index('ix_assessment_result_gin', db.text('(result::jsonb) jsonb_path_ops'),
+                 postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+
+def assessment_metrics(result) -> dict:
+    """Typed metric columns derived from an assessment result."""
+    result = result if isinstance(result, dict) else {}
+
+    def count(key):
+        value = result.get(key)
+        return len(value) if isinstance(value, list) else 0
+
+    try:
+        score = float(result.get('overall_quality_score') or 0)
+    except (TypeError, ValueError):
+        score = 0.0
+    return {
+        'overall_quality_score': score,
+        'key_insight_count': count('key_insights'),
+        'pain_point_count': count('user_pain_points'),
+        'improvement_count': count('areas_for_improvement'),
+    }
+
+@event.listens_for(Assessment, 'before_insert')
+@event.listens_for(Assessment, 'before_update')
+def populate_assessment_metrics(mapper, connection, target):
+    for key, value in assessment_metrics(target.result).items():
+        setattr(target, key, value)
+
+class ProjectStats(db.Model):
+    """Running per-project sums, kept in step with Assessment writes so dashboards read O(projects)."""
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), primary_key=True)
+    assessment_count = db.Column(db.Integer, nullable=False, default=0)
+    sum_quality_score = db.Column(db.Float, nullable=False, default=0)
+    sum_key_insights = db.Column(db.Integer, nullable=False, default=0)
+    sum_pain_points = db.Column(db.Integer, nullable=False, default=0)
+    sum_improvements = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def averages(self) -> dict:
+        count = self.assessment_count or 0
+        return {
+            'avg_key_insights': self.sum_key_insights / count if count else 0.0,
+            'avg_user_pain_points': self.sum_pain_points / count if count else 0.0,
+            'avg_areas_for_improvement': self.sum_improvements / count if count else 0.0,
+            'avg_quality_score': self.sum_quality_score / count if count else 0.0,
+        }
+
+STATS_COLUMNS = {
+    'overall_quality_score': 'sum_quality_score',
+    'key_insight_count': 'sum_key_insights',
+    'pain_point_count': 'sum_pain_points',
+    'improvement_count': 'sum_improvements',
+}
+
+def project_stats_delta(metrics: dict, sign: int = 1, count: int = 1) -> dict:
+    delta = {stats_column: sign * (metrics.get(column) or 0) for column, stats_column in STATS_COLUMNS.items()}
+    delta['assessment_count'] = sign * count
+    return delta
+
+def apply_project_stats(connection, project_id, delta: dict):
+    """Atomically add ``delta`` to a project's rollup row on the given connection, creating it if needed."""
+    if project_id is None:
+        return
+    table = ProjectStats.__table__
+    now = datetime.utcnow()
+    if connection.dialect.name in ('postgresql', 'sqlite'):
+        if connection.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table).values(project_id=project_id, updated_at=now, **delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.project_id],
+            set_=dict({key: table.c[key] + statement.excluded[key] for key in delta}, updated_at=now)
+        )
+        connection.execute(statement)
+        return
+    updated = connection.execute(
+        table.update().where(table.c.project_id == project_id)
+        .values(updated_at=now, **{key: table.c[key] + value for key, value in delta.items()})
+    )
+    if updated.rowcount == 0:
+        connection.execute(table.insert().values(project_id=project_id, updated_at=now, **delta))
+
+@event.listens_for(Assessment, 'after_insert')
+def add_to_project_stats(mapper, connection, target):
+    apply_project_stats(connection, target.project_id, project_stats_delta(
+        {column: getattr(target, column) for column in STATS_COLUMNS}))
+
+@event.listens_for(Assessment, 'after_update')
+def adjust_project_stats(mapper, connection, target):
+    state = inspect(target)
+    old_metrics = {}
+    changed = False
+    for column in STATS_COLUMNS:
+        history = state.attrs[column].history
+        old_metrics[column] = history.deleted[0] if history.deleted else getattr(target, column)
+        changed = changed or bool(history.deleted)
+    if not changed:
+        return
+    delta = project_stats_delta({column: getattr(target, column) for column in STATS_COLUMNS}, count=0)
+    for key, value in project_stats_delta(old_metrics, sign=-1, count=0).items():
+        delta[key] += value
+    apply_project_stats(connection, target.project_id, delta)
+
+class AssessmentCacheEntry(db.Model):
+    key = db.Column(db.String(64), primary_key=True)
+    framework = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    prompt_version = db.Column(db.String(20), nullable=False)
+    result = db.Column(db.JSON, nullable=False)
+    latency_ms = db.Column(db.Integer, default=0)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class BulkImport(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=True)
+    framework = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    backend = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    batch_ids = db.Column(db.JSON, nullable=False, default=list)
+    completed_batch_ids = db.Column(db.JSON, nullable=False, default=list)
+    total = db.Column(db.Integer, default=0)
+    completed = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FineTuneJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    openai_job_id = db.Column(db.String(100), unique=True, nullable=False)
+    base_model = db.Column(db.String(100), nullable=False)
+    training_file_id = db.Column(db.String(100))
+    status = db.Column(db.String(30), nullable=False, default='validating_files')
+    fine_tuned_model = db.Column(db.String(200))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+class Embedding(db.Model):
+    """Unit-length float32 vector for a transcript or one assessment item, stored as raw bytes."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    transcription_id = db.Column(db.Integer, db.ForeignKey('transcription.id'), nullable=False, index=True)
+    assessment_id = db.Column(db.Integer, db.ForeignKey('assessment.id'), nullable=True, index=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=True)
+    # Backend name and dimensions; vectors from different models are never compared.
+    model = db.Column(db.String(100), nullable=False)
+    text = db.Column(db.Text)
+    vector = db.Column(db.LargeBinary, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_embedding_project_kind_model', 'project_id', 'kind', 'model'),)
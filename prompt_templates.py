@@ -0,0 +1,101 @@
+UX_FRAMEWORKS = {
+    "nielsen": "Nielsen's 10 Usability Heuristics",
+    "ideo": "IDEO's Human-Centered Design",
+    "double_diamond": "Double Diamond Design Process",
+    "lean_ux": "Lean UX",
+    "jobs_to_be_done": "Jobs to be Done (JTBD)",
+    "jump_associates": "Jump Associates' UX Research Framework"
+}
+
+# Bump whenever any template text changes so cached assessments are not reused.
+PROMPT_TEMPLATE_VERSION = "2"
+
+FRAMEWORK_GUIDANCE = {
+    "nielsen": "Use the heuristic names (e.g. visibility_of_system_status, error_prevention) as keys and only include heuristics the transcript gives evidence for.",
+    "ideo": "Use desirability, feasibility and viability as keys, plus any inspiration, ideation or implementation observations.",
+    "double_diamond": "Use discover, define, develop and deliver as keys and place each finding in the phase it informs.",
+    "lean_ux": "Use assumptions, hypotheses, minimum_viable_experiments and validated_learnings as keys.",
+    "jobs_to_be_done": "Use functional_jobs, emotional_jobs, social_jobs, pushes, pulls, anxieties and habits as keys.",
+    "jump_associates": "Use context, motivations, behaviours and opportunity_areas as keys.",
+}
+
+ANALYSIS_TEMPLATE = """For the framework_specific_analysis, include relevant metrics or categories specific to the {framework_description} framework. {guidance}
+Quote specific lines from the transcript to provide supporting evidence for framework_specific_analysis and include the exact timestamp from the transcript at which each line can be found.
+Do not paraphrase the lines you quote, they must match the transcript word for word."""
+
+PREFIX_TEMPLATE = """As a UX research expert, analyze the interview transcript supplied by the user using the {framework_description} framework.
+Focus on identifying key UX research insights, user pain points, and potential areas for improvement.
+
+Respond with a single JSON object in the following format and nothing else:
+{{
+    "key_insights": ["insight1", "insight2", ...],
+    "user_pain_points": ["pain_point1", "pain_point2", ...],
+    "areas_for_improvement": ["area1", "area2", ...],
+    "overall_quality_score": 0-100,
+    "recommendations": ["recommendation1", "recommendation2", ...],
+    "framework_specific_analysis": {{
+        "key1": "value1",
+        "key2": "value2",
+        ...
+    }}
+}}
+
+""" + ANALYSIS_TEMPLATE
+
+# Format line per section, for prompts that ask for only some of them.
+SECTION_RUBRIC = {
+    "key_insights": '"key_insights": ["insight1", "insight2", ...]',
+    "user_pain_points": '"user_pain_points": ["pain_point1", "pain_point2", ...]',
+    "areas_for_improvement": '"areas_for_improvement": ["area1", "area2", ...]',
+    "overall_quality_score": '"overall_quality_score": 0-100',
+    "recommendations": '"recommendations": ["recommendation1", "recommendation2", ...]',
+    "framework_specific_analysis": '"framework_specific_analysis": {"key1": "value1", "key2": "value2", ...}',
+}
+
+SECTIONS_TEMPLATE = """As a UX research expert, analyze the interview transcript supplied by the user using the {framework_description} framework.
+
+Respond with a single JSON object containing only these keys and nothing else:
+{{
+    {rubric}
+}}"""
+
+
+class PromptTemplate:
+    """Grading prompt for one framework.
+
+    Everything except the transcript lives in a system message rendered once at import.
+    Requests for the same framework then share an identical leading prefix, which is
+    what provider-side prompt caching keys on.
+    """
+
+    def __init__(self, framework, framework_description, guidance="", version=PROMPT_TEMPLATE_VERSION):
+        self.framework = framework
+        self.framework_description = framework_description
+        self.guidance = guidance
+        self.version = f"{framework}@{version}"
+        self.prefix = PREFIX_TEMPLATE.format(framework_description=framework_description, guidance=guidance).strip()
+        self._system_message = {"role": "system", "content": self.prefix}
+
+    def messages(self, transcription: str) -> list:
+        return [self._system_message, {"role": "user", "content": f"Transcript:\n{transcription}"}]
+
+    def section_messages(self, transcription: str, keys) -> list:
+        """A smaller request for ``keys`` only: the system message carries just their rubric."""
+        rubric = ",\n    ".join(SECTION_RUBRIC[key] for key in keys)
+        system = SECTIONS_TEMPLATE.format(framework_description=self.framework_description, rubric=rubric)
+        if "framework_specific_analysis" in keys:
+            system += "\n\n" + ANALYSIS_TEMPLATE.format(framework_description=self.framework_description,
+                                                       guidance=self.guidance)
+        return [{"role": "system", "content": system.strip()},
+                {"role": "user", "content": f"Transcript:\n{transcription}"}]
+
+
+PROMPT_TEMPLATES = {
+    framework: PromptTemplate(framework, description, FRAMEWORK_GUIDANCE.get(framework, ""))
+    for framework, description in UX_FRAMEWORKS.items()
+}
+GENERAL_TEMPLATE = PromptTemplate("general", "General UX research")
+
+
+def get_prompt_template(framework: str) -> PromptTemplate:
+    return PROMPT_TEMPLATES.get(framework, GENERAL_TEMPLATE)
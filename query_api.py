@@ -0,0 +1,139 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import select, cast, func, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from extensions import db
+from models import Transcription, Assessment
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 200
+TEXT_PREVIEW_CHARS = 200
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii'))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_datetime(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime")
+
+
+def parse_number(value, name, kind=float):
+    try:
+        return kind(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def parse_limit(args) -> int:
+    limit = parse_number(args.get('limit', DEFAULT_PAGE_SIZE), 'limit', int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def apply_common_filters(query, model, args):
+    if args.get('project_id'):
+        query = query.where(model.project_id == parse_number(args['project_id'], 'project_id', int))
+    if args.get('since'):
+        query = query.where(model.created_at >= parse_datetime(args['since'], 'since'))
+    if args.get('until'):
+        query = query.where(model.created_at < parse_datetime(args['until'], 'until'))
+    if args.get('cursor'):
+        query = query.where(model.id < decode_cursor(args['cursor']))
+    return query.order_by(model.id.desc())
+
+
+def transcription_query(args):
+    """Newest-first transcriptions with a short text preview unless ``include_text`` is set."""
+    text = Transcription.text if args.get('include_text') == '1' \
+        else func.substr(Transcription.text, 1, TEXT_PREVIEW_CHARS).label('text')
+    query = select(Transcription.id, Transcription.project_id, Transcription.created_at, text)
+    return apply_common_filters(query, Transcription, args)
+
+
+def assessment_query(args):
+    """Newest-first assessments filtered by project, transcription, framework, score, date and content.
+
+    ``q`` is a case-insensitive substring match over the result JSON; ``contains`` is a
+    JSON containment filter served by the GIN index and needs PostgreSQL.
+    """
+    columns = [Assessment.id, Assessment.transcription_id, Assessment.project_id, Assessment.framework,
+               Assessment.model, Assessment.overall_quality_score, Assessment.created_at]
+    if args.get('include_result', '1') == '1':
+        columns.extend([Assessment.result, Assessment.routing])
+    query = select(*columns)
+    if args.get('transcription_id'):
+        query = query.where(Assessment.transcription_id == parse_number(args['transcription_id'],
+                                                                        'transcription_id', int))
+    if args.get('framework'):
+        query = query.where(Assessment.framework == args['framework'])
+    if args.get('min_score'):
+        query = query.where(Assessment.overall_quality_score >= parse_number(args['min_score'], 'min_score'))
+    if args.get('max_score'):
+        query = query.where(Assessment.overall_quality_score <= parse_number(args['max_score'], 'max_score'))
+    if args.get('q'):
+        query = query.where(cast(Assessment.result, Text).ilike(f"%{escape_like(args['q'])}%", escape='\\'))
+    if args.get('contains'):
+        if db.engine.dialect.name != 'postgresql':
+            raise ValueError("The contains filter requires PostgreSQL")
+        try:
+            contains = json.loads(args['contains'])
+        except json.JSONDecodeError:
+            raise ValueError("contains must be a JSON object")
+        query = query.where(cast(Assessment.result, JSONB).contains(contains))
+    return apply_common_filters(query, Assessment, args)
+
+
+def serialize_row(row) -> dict:
+    item = dict(row._mapping)
+    if item.get('created_at') is not None:
+        item['created_at'] = item['created_at'].isoformat()
+    return item
+
+
+def stream_page(query, limit):
+    """Yield one page as a JSON document, writing rows out as they arrive from the database.
+
+    One extra row is fetched to learn whether a next page exists without a COUNT query.
+    """
+    rows = db.session.execute(query.limit(limit + 1).execution_options(yield_per=STREAM_BATCH_SIZE))
+    yield '{"items": ['
+    last_id = None
+    for position, row in enumerate(rows):
+        if position == limit:
+            yield f'], "next_cursor": {json.dumps(encode_cursor(last_id))}}}'
+            return
+        yield (',' if position else '') + json.dumps(serialize_row(row))
+        last_id = row.id
+    yield '], "next_cursor": null}'
+
+
+def stream_export(query, batch_size=STREAM_BATCH_SIZE):
+    """Yield every matching row as JSON Lines, walking the keyset in batches so memory stays flat."""
+    last_id = None
+    while True:
+        batch = query if last_id is None else query.where(query.selected_columns.id < last_id)
+        rows = db.session.execute(batch.limit(batch_size)).all()
+        for row in rows:
+            yield json.dumps(serialize_row(row)) + '\n'
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1].id
@@ -0,0 +1,172 @@
+import re
+import copy
+from bisect import bisect_right
+
+# Bump whenever tokenization changes so stored indexes are rebuilt instead of trusted.
+QUOTE_INDEX_VERSION = 1
+
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)*")
+TIMESTAMP_PATTERN = re.compile(r'(?<![\d:])(\d{1,2}):(\d{2})(?::(\d{2}))?(?:[.,]\d+)?(?![\d:])')
+QUOTE_PATTERN = re.compile(r'"([^"]+)"|“([^”]+)”')
+
+
+def timestamp_seconds(match) -> int:
+    first, second, third = match.group(1), match.group(2), match.group(3)
+    if third is None:
+        return int(first) * 60 + int(second)
+    return int(first) * 3600 + int(second) * 60 + int(third)
+
+
+def normalize_words(text: str) -> list:
+    return [word.lower() for word in WORD_PATTERN.findall(text)]
+
+
+class QuoteIndex:
+    """Word-level inverted index over a transcript plus a timestamp→offset map.
+
+    Looking up a quote starts from its rarest word, so verifying every quote in an
+    assessment costs roughly one pass over the transcript rather than an API call.
+    """
+
+    def __init__(self, words, offsets, timestamps):
+        self.words = words
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self._timestamp_offsets = [offset for offset, _, _ in timestamps]
+        self._positions = None
+
+    @classmethod
+    def from_text(cls, text: str) -> 'QuoteIndex':
+        text = text or ''
+        timestamps = [[match.start(), timestamp_seconds(match), match.group(0)]
+                      for match in TIMESTAMP_PATTERN.finditer(text)]
+        # Timestamp digits are left out so a quote spanning two utterances still matches.
+        stamp_ends = {offset: offset + len(label) for offset, _, label in timestamps}
+        words, offsets = [], []
+        skip_until = 0
+        for match in WORD_PATTERN.finditer(text):
+            skip_until = max(skip_until, stamp_ends.get(match.start(), 0))
+            if match.start() < skip_until:
+                continue
+            words.append(match.group(0).lower())
+            offsets.append(match.start())
+        return cls(words, offsets, timestamps)
+
+    @classmethod
+    def load(cls, text: str, data=None) -> 'QuoteIndex':
+        """Use the stored index when it is current, otherwise rebuild it from the text."""
+        if isinstance(data, dict) and data.get('version') == QUOTE_INDEX_VERSION:
+            return cls(data['words'], data['offsets'], data['timestamps'])
+        return cls.from_text(text)
+
+    def to_dict(self) -> dict:
+        return {'version': QUOTE_INDEX_VERSION, 'words': self.words, 'offsets': self.offsets,
+                'timestamps': self.timestamps}
+
+    @property
+    def positions(self) -> dict:
+        if self._positions is None:
+            positions = {}
+            for position, word in enumerate(self.words):
+                positions.setdefault(word, []).append(position)
+            self._positions = positions
+        return self._positions
+
+    def timestamp_at(self, offset: int):
+        """The last transcript timestamp at or before ``offset``, as ``[offset, seconds, label]``."""
+        i = bisect_right(self._timestamp_offsets, offset)
+        return self.timestamps[i - 1] if i else None
+
+    def find(self, quote: str, near_seconds=None):
+        """Character offset of ``quote`` in the transcript, or None when it does not appear verbatim.
+
+        Punctuation and case are ignored. With several occurrences, the one closest to
+        ``near_seconds`` wins.
+        """
+        quote_words = normalize_words(quote)
+        if not quote_words:
+            return None
+        anchor = min(range(len(quote_words)), key=lambda i: len(self.positions.get(quote_words[i], ())))
+        length = len(quote_words)
+        matches = []
+        for position in self.positions.get(quote_words[anchor], ()):
+            start = position - anchor
+            if start >= 0 and self.words[start:start + length] == quote_words:
+                matches.append(self.offsets[start])
+        if not matches:
+            return None
+        if near_seconds is None or len(matches) == 1:
+            return matches[0]
+
+        def distance(offset):
+            timestamp = self.timestamp_at(offset)
+            return abs(timestamp[1] - near_seconds) if timestamp else float('inf')
+        return min(matches, key=distance)
+
+
+def build_quote_index(text: str) -> dict:
+    return QuoteIndex.from_text(text).to_dict()
+
+
+def claimed_timestamps(value: str, quotes: list) -> list:
+    """Pair each quote in ``value`` with the timestamp written next to it, preferring the one before it."""
+    stamps = list(TIMESTAMP_PATTERN.finditer(value))
+    claimed = []
+    for i, quote in enumerate(quotes):
+        previous_end = quotes[i - 1].end() if i else 0
+        next_start = quotes[i + 1].start() if i + 1 < len(quotes) else len(value)
+        before = [stamp for stamp in stamps if previous_end <= stamp.start() < quote.start()]
+        after = [stamp for stamp in stamps if quote.end() <= stamp.start() < next_start]
+        claimed.append(before[-1] if before else (after[0] if after else None))
+    return claimed
+
+
+def verify_value(value: str, path: str, index: QuoteIndex, evidence: list) -> str:
+    quotes = list(QUOTE_PATTERN.finditer(value))
+    corrections = []
+    for quote, stamp in zip(quotes, claimed_timestamps(value, quotes)):
+        text = quote.group(1) or quote.group(2)
+        claimed_seconds = timestamp_seconds(stamp) if stamp else None
+        offset = index.find(text, claimed_seconds)
+        actual = index.timestamp_at(offset) if offset is not None else None
+        entry = {
+            'key': path,
+            'quote': text,
+            'matched': offset is not None,
+            'claimed_timestamp': stamp.group(0) if stamp else None,
+            'timestamp': actual[2] if actual else None,
+            'corrected': False
+        }
+        if stamp and actual and actual[1] != claimed_seconds:
+            corrections.append((stamp.start(), stamp.end(), actual[2]))
+            entry['corrected'] = True
+        evidence.append(entry)
+    for start, end, label in sorted(set(corrections), reverse=True):
+        value = value[:start] + label + value[end:]
+    return value
+
+
+def verify_node(node, path: str, index: QuoteIndex, evidence: list):
+    if isinstance(node, str):
+        return verify_value(node, path, index, evidence)
+    if isinstance(node, dict):
+        return {key: verify_node(value, f"{path}.{key}" if path else str(key), index, evidence)
+                for key, value in node.items()}
+    if isinstance(node, list):
+        return [verify_node(value, f"{path}[{i}]", index, evidence) for i, value in enumerate(node)]
+    return node
+
+
+def verify_evidence(assessment: dict, transcription: str, quote_index=None) -> dict:
+    """Check every quote in ``framework_specific_analysis`` against the transcript.
+
+    Returns a copy with wrong timestamps rewritten to where the quote actually occurs
+    and an ``evidence`` list recording, per quote, whether it was found verbatim.
+    """
+    index = quote_index if isinstance(quote_index, QuoteIndex) else QuoteIndex.load(transcription, quote_index)
+    evidence = []
+    verified = copy.copy(assessment)
+    verified['framework_specific_analysis'] = verify_node(
+        assessment.get('framework_specific_analysis', {}), '', index, evidence)
+    verified['evidence'] = evidence
+    return verified
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import Assessment, Project, ProjectStats, Embedding
+from metrics import Counter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_URL = os.environ.get("RESPONSE_CACHE_URL", "local://")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 256))
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 3600))
+
+# Every table a cached view reads; commands that rewrite one (e.g. rebuild-project-stats) bump the version too.
+VERSIONED_MODELS = (Assessment, Project, ProjectStats, Embedding)
+
+RESPONSE_CACHE_LOOKUPS = Counter('verita_response_cache_lookups_total', 'Cached JSON view lookups by endpoint and result.',
+                                 ['endpoint', 'result'])
+
+
+class LocalCacheBackend:
+    """Per-process version counter and response store."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # Unique per process start so clients never match an ETag issued before a restart.
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._modified = time.time()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            return f"{self._epoch}-{self._counter}", self._modified
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+            self._modified = time.time()
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """Version counter and response store shared by every worker through Redis."""
+
+    def __init__(self, url, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("RESPONSE_CACHE_URL points to Redis but the redis package is not installed")
+        self._redis = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def current(self):
+        version, modified = self._redis.mget('verita:data_version', 'verita:data_modified')
+        return (version or b'0').decode(), float(modified or 0)
+
+    def bump(self):
+        pipeline = self._redis.pipeline()
+        pipeline.incr('verita:data_version')
+        pipeline.set('verita:data_modified', time.time())
+        pipeline.execute()
+
+    def get(self, key):
+        value = self._redis.get(f'verita:response:{key}')
+        return json.loads(value) if value else None
+
+    def set(self, key, value):
+        self._redis.set(f'verita:response:{key}', json.dumps(value), ex=self.ttl_seconds)
+
+
+def create_cache_backend(url=RESPONSE_CACHE_URL):
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisCacheBackend(url)
+    return LocalCacheBackend()
+
+
+cache_backend = create_cache_backend()
+
+
+@event.listens_for(Session, 'after_flush')
+def track_versioned_writes(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, VERSIONED_MODELS):
+            session.info['data_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def track_bulk_writes(orm_execute_state):
+    # Core-style insert(Assessment) statements run through the session skip the flush.
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in VERSIONED_MODELS:
+        orm_execute_state.session.info['data_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def bump_data_version(session):
+    if session.info.pop('data_changed', False):
+        cache_backend.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_data_changes(session):
+    session.info.pop('data_changed', None)
+
+
+def cached_response(view):
+    """Serve a JSON view from cache until the data version changes, with ETag/Last-Modified revalidation."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, modified = cache_backend.current()
+        key = hashlib.sha256(f"{request.full_path}:{version}".encode('utf-8')).hexdigest()
+
+        entry = cache_backend.get(key)
+        RESPONSE_CACHE_LOOKUPS.inc(endpoint=request.endpoint, result='miss' if entry is None else 'hit')
+        if entry is None:
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            entry = {'body': response.get_data(as_text=True), 'mimetype': response.mimetype}
+            cache_backend.set(key, entry)
+
+        response = Response(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(key[:32])
+        response.last_modified = datetime.fromtimestamp(modified, tz=timezone.utc)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
@@ -1,17 +1,81 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify
-from flask_socketio import emit
+from flask import render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, g
+from flask_socketio import emit, join_room, leave_room
 from extensions import db
-from models import Transcription, Assessment, Project
-from fine_tuning import prepare_dataset, fine_tune_model
-from grading_framework import grade_transcription, UX_FRAMEWORKS
+from models import Transcription, Assessment, Project, BulkImport, ProjectStats, FineTuneJob
+from grading_framework import UX_FRAMEWORKS, REQUIRED_KEYS, resolve_frameworks
+from job_queue import create_job_queue, register_task_module, QueueFullError, RedisJobQueue
+from assessment_cache import assessment_cache
+from chat_request import check_openai_connection, set_fine_tuned_model_loader
+from response_cache import cached_response
+from bulk_import import read_records, create_bulk_import, bulk_import_status, watch_bulk_import, resume_bulk_imports
+from embeddings import project_themes, EMBEDDED_KEYS, THEME_SIMILARITY
+from query_api import transcription_query, assessment_query, parse_limit, stream_page, stream_export
+from metrics import span, render_metrics, start_profile, write_profile
+from socket_manager import SOCKETIO_MESSAGE_QUEUE, transcription_room, project_room, job_rooms
+from audio_ingest import save_upload, UploadTooLargeError, AUDIO_MAX_BYTES
+import grading_jobs  # noqa: F401 registers the grading tasks
 from sqlalchemy.sql import func
+from werkzeug.exceptions import RequestEntityTooLarge
+import os
+import json
 import logging
 import traceback
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Room for multipart boundaries and form fields around an upload of AUDIO_MAX_BYTES.
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+def latest_findings(count):
+    """The newest assessments with an insight, a pain point and an improvement, walked on the primary key.
+
+    Deterministic, so a cached /api/insights stays correct until the next write bumps the data version.
+    """
+    return Assessment.query.filter(Assessment.key_insight_count > 0, Assessment.pain_point_count > 0,
+                                   Assessment.improvement_count > 0) \
+        .order_by(Assessment.id.desc()).limit(count).all()
+
+def first_item(result, key):
+    value = (result or {}).get(key)
+    if isinstance(value, list) and value:
+        return str(value[0])
+    return None
+
+def resume_fine_tune_watcher(app, socketio):
+    from fine_tuning import resume_fine_tune_watcher
+    resume_fine_tune_watcher(app, socketio)
+
+def start_background_services(app, socketio):
+    """Background work for a serving process; CLI commands and spawned workers import the app without it."""
+    # Consumers run from the start, so a worker that never submits still drains a shared Redis queue.
+    app.extensions['job_queue'].start()
+    # Jobs left running by a previous process are polled again without waiting for the next POST /fine-tune.
+    socketio.start_background_task(resume_fine_tune_watcher, app, socketio)
+    socketio.start_background_task(resume_bulk_imports, app, socketio)
+    if os.environ.get("OPENAI_WARMUP") == "1":
+        # Build the client and prime the health cache off the request path.
+        socketio.start_background_task(check_openai_connection)
+
 def init_routes(app, socketio):
+    job_queue = create_job_queue(app, socketio)
+    app.extensions['job_queue'] = job_queue
+    if SOCKETIO_MESSAGE_QUEUE and not isinstance(job_queue, RedisJobQueue):
+        logger.warning("Job statuses are kept per process; point JOB_QUEUE_URL at Redis so /jobs/<id> "
+                       "answers on every worker")
+    if app.config.get('MAX_CONTENT_LENGTH') is None:
+        # Larger bodies are refused with 413 before Werkzeug spools them to disk; audio is the largest upload.
+        app.config['MAX_CONTENT_LENGTH'] = AUDIO_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+
+    # fine_tuning is imported on first use so it stays off the startup path.
+    register_task_module('fine_tune', 'fine_tuning')
+
+    def load_fine_tuned_model():
+        from fine_tuning import latest_fine_tuned_model
+        return latest_fine_tuned_model()
+
+    set_fine_tuned_model_loader(load_fine_tuned_model)
+
     @app.route('/', methods=['GET'])
     def index():
         return render_template('index.html')
@@ -30,46 +94,282 @@ def init_routes(app, socketio):
 
     @app.route('/fine-tune', methods=['POST'])
     def fine_tune():
-        dataset = prepare_dataset()
-        model_name = fine_tune_model(dataset)
-        flash(f"Model fine-tuned successfully. New model name: {model_name}", 'success')
+        """Queue dataset preparation and upload; the job status carries the fine-tuning job once it starts."""
+        wants_json = request.accept_mimetypes.best == 'application/json'
+        try:
+            job_id = job_queue.submit('fine_tune', request.form.get('project_id', type=int),
+                                      request.form.get('framework') or None,
+                                      request.form.get('min_score', type=float))
+        except QueueFullError as e:
+            if wants_json:
+                return jsonify({'error': str(e)}), 503
+            flash(str(e), 'error')
+            return redirect(url_for('index'))
+        logger.info(f"Queued fine-tuning job {job_id}")
+        if wants_json:
+            return jsonify({'job_id': job_id}), 202
+        flash(f"Preparing the fine-tuning dataset. Job ID: {job_id}", 'success')
         return redirect(url_for('index'))
 
+    @app.route('/fine-tune/<int:job_id>', methods=['GET'])
+    def get_fine_tune_job(job_id):
+        from fine_tuning import fine_tune_job_status
+        job = db.session.get(FineTuneJob, job_id)
+        if job is None:
+            return jsonify({'error': 'Fine-tuning job not found'}), 404
+        return jsonify(fine_tune_job_status(job))
+
+    def subscribe_sid(sid, room):
+        try:
+            join_room(room, sid=sid, namespace='/')
+        except (KeyError, ValueError) as e:
+            # Without a message queue only sids connected to this process can join.
+            logger.warning(f"Could not add {sid} to {room}: {e}")
+
+    def submit_grading(transcription_text, frameworks, project_id, stream=False, sid=None, profile=False):
+        if not transcription_text:
+            raise ValueError("Transcription text is empty")
+
+        new_transcription = Transcription(text=transcription_text, project_id=project_id)
+        db.session.add(new_transcription)
+        with span('db_commit'):
+            db.session.commit()
+        logger.info(f"New transcription created with ID: {new_transcription.id}")
+
+        # Results go to rooms rather than to the sid, so any worker can deliver them through the
+        # message queue and a reconnecting client can subscribe again.
+        if sid:
+            subscribe_sid(sid, transcription_room(new_transcription.id))
+        rooms = job_rooms(new_transcription.id, project_id)
+        if len(frameworks) == 1:
+            job_id = job_queue.submit('grade_transcription', new_transcription.id, frameworks[0], stream, room=rooms,
+                                      profile=profile)
+        else:
+            job_id = job_queue.submit('grade_frameworks', new_transcription.id, frameworks, room=rooms,
+                                      profile=profile)
+        logger.info(f"Queued grading job {job_id} for transcription ID: {new_transcription.id}")
+        return {'job_id': job_id, 'transcription_id': new_transcription.id, 'frameworks': frameworks,
+                'room': rooms[0]}
+
     @socketio.on('transcribe')
     def handle_transcription(data):
         try:
             logger.info(f"Received transcription: {data['transcription']}")
-            logger.info(f"Selected framework: {data['framework']}")
             transcription_text = data['transcription']
-            framework = data['framework']
-            project_id = data.get('project_id')
-            
-            if not transcription_text:
-                raise ValueError("Transcription text is empty")
-
-            new_transcription = Transcription(text=transcription_text, project_id=project_id)
-            db.session.add(new_transcription)
-            db.session.commit()
-            logger.info(f"New transcription created with ID: {new_transcription.id}")
-
-            assessment_result = grade_transcription(transcription_text, framework)
-            new_assessment = Assessment(transcription_id=new_transcription.id, result=assessment_result)
-            db.session.add(new_assessment)
-            db.session.commit()
-            logger.info(f"New assessment created for transcription ID: {new_transcription.id}")
+            frameworks = resolve_frameworks(data.get('frameworks') or data['framework'])
+            logger.info(f"Selected frameworks: {frameworks}")
 
-            logger.info(f"Emitting assessment result: {assessment_result}")
-            emit('assessment_result', {
-                'transcription_id': new_transcription.id,
-                'assessment': assessment_result
-            })
+            response = submit_grading(transcription_text, frameworks, data.get('project_id'),
+                                      stream=bool(data.get('stream', True)), sid=request.sid,
+                                      profile=bool(data.get('profile')))
+            emit('assessment_progress', dict(response, stage='queued'))
+            return response
         except Exception as e:
             logger.error(f"Error in handle_transcription: {str(e)}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             db.session.rollback()
             emit('assessment_error', {'error': str(e)})
+            return {'error': str(e)}
+
+    def subscription_rooms(data):
+        rooms = []
+        if (data or {}).get('transcription_id') is not None:
+            rooms.append(transcription_room(int(data['transcription_id'])))
+        if (data or {}).get('project_id') is not None:
+            rooms.append(project_room(int(data['project_id'])))
+        if not rooms:
+            raise ValueError("transcription_id or project_id is required")
+        return rooms
+
+    @socketio.on('subscribe')
+    def handle_subscribe(data):
+        try:
+            rooms = subscription_rooms(data)
+        except (TypeError, ValueError) as e:
+            return {'error': str(e)}
+        for room in rooms:
+            join_room(room)
+        return {'rooms': rooms}
+
+    @socketio.on('unsubscribe')
+    def handle_unsubscribe(data):
+        try:
+            rooms = subscription_rooms(data)
+        except (TypeError, ValueError) as e:
+            return {'error': str(e)}
+        for room in rooms:
+            leave_room(room)
+        return {'rooms': rooms}
+
+    @app.route('/api/assessments', methods=['POST'])
+    def create_assessments():
+        data = request.get_json(silent=True) or {}
+        try:
+            frameworks = resolve_frameworks(data.get('frameworks') or data.get('framework') or 'all')
+            response = submit_grading(data.get('transcription'), frameworks, data.get('project_id'),
+                                      sid=data.get('sid'), profile=request.args.get('profile') == '1')
+            return jsonify(response), 202
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        except QueueFullError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 503
+
+    @app.route('/api/assessments/<int:assessment_id>/regrade', methods=['POST'])
+    def regrade_assessment(assessment_id):
+        """Queue a re-grade that keeps the valid sections of an assessment. Incomplete and invalid
+        sections are always regenerated; ``sections`` names any others to redo."""
+        data = request.get_json(silent=True) or {}
+        assessment = db.session.get(Assessment, assessment_id)
+        if assessment is None:
+            return jsonify({'error': 'Assessment not found'}), 404
+        sections = data.get('sections') or []
+        if isinstance(sections, str):
+            sections = [sections]
+        unknown = [section for section in sections if section not in REQUIRED_KEYS]
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(map(str, unknown))}"}), 400
+
+        transcription = db.session.get(Transcription, assessment.transcription_id)
+        if data.get('sid'):
+            subscribe_sid(data['sid'], transcription_room(transcription.id))
+        rooms = job_rooms(transcription.id, transcription.project_id)
+        try:
+            job_id = job_queue.submit('regrade_assessment', assessment_id, sections, room=rooms)
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 503
+        logger.info(f"Queued regrade job {job_id} for assessment ID: {assessment_id}")
+        return jsonify({'job_id': job_id, 'assessment_id': assessment_id, 'transcription_id': transcription.id,
+                        'room': rooms[0]}), 202
+
+    def list_response(build_query, export=False):
+        try:
+            query = build_query(request.args)
+            limit = None if export else parse_limit(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if export:
+            return Response(stream_with_context(stream_export(query)), mimetype='application/x-ndjson')
+        return Response(stream_with_context(stream_page(query, limit)), mimetype='application/json')
+
+    @app.route('/api/assessments', methods=['GET'])
+    def list_assessments():
+        return list_response(assessment_query)
+
+    @app.route('/api/assessments/export', methods=['GET'])
+    def export_assessments():
+        return list_response(assessment_query, export=True)
+
+    @app.route('/api/transcriptions', methods=['GET'])
+    def list_transcriptions():
+        return list_response(transcription_query)
+
+    @app.route('/api/transcriptions/export', methods=['GET'])
+    def export_transcriptions():
+        return list_response(transcription_query, export=True)
+
+    @app.route('/api/transcriptions/audio', methods=['POST'])
+    def upload_audio():
+        """Accept a WAV recording as a multipart ``file`` or as the raw request body, then transcribe
+        and grade it in the background. Options come from the form or the query string."""
+        try:
+            options = request.form if request.files else request.args
+            upload = request.files.get('file')
+            requested = options.get('frameworks', 'all')
+            frameworks = resolve_frameworks(requested.split(',') if ',' in requested else requested)
+            project_id = options.get('project_id', type=int)
+            path = save_upload(upload.stream if upload is not None else request.stream)
+        except (UploadTooLargeError, RequestEntityTooLarge) as e:
+            return jsonify({'error': str(e)}), 413
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        new_transcription = Transcription(text='', project_id=project_id)
+        db.session.add(new_transcription)
+        db.session.commit()
+        if options.get('sid'):
+            subscribe_sid(options['sid'], transcription_room(new_transcription.id))
+        rooms = job_rooms(new_transcription.id, project_id)
+        try:
+            job_id = job_queue.submit('transcribe_audio', new_transcription.id, path, frameworks, room=rooms)
+        except QueueFullError as e:
+            os.remove(path)
+            db.session.delete(new_transcription)
+            db.session.commit()
+            return jsonify({'error': str(e)}), 503
+        logger.info(f"Queued audio transcription job {job_id} for transcription ID: {new_transcription.id}")
+        return jsonify({'job_id': job_id, 'transcription_id': new_transcription.id, 'frameworks': frameworks,
+                        'room': rooms[0]}), 202
+
+    @app.route('/projects/<int:project_id>/bulk-import', methods=['POST'])
+    def bulk_import(project_id):
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return jsonify({'error': 'A JSONL or ZIP file is required'}), 400
+        if db.session.get(Project, project_id) is None:
+            return jsonify({'error': 'Project not found'}), 404
+        try:
+            records = read_records(upload.stream, upload.filename)
+            new_import = create_bulk_import(records, project_id, request.form.get('framework', 'nielsen'),
+                                            backend_name=request.form.get('backend'))
+        except (ValueError, json.JSONDecodeError) as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        if request.form.get('sid'):
+            subscribe_sid(request.form['sid'], project_room(project_id))
+        socketio.start_background_task(watch_bulk_import, app, socketio, new_import.id,
+                                       room=project_room(project_id))
+        return jsonify(bulk_import_status(new_import)), 202
+
+    @app.route('/bulk-imports/<int:bulk_import_id>', methods=['GET'])
+    def get_bulk_import(bulk_import_id):
+        existing_import = db.session.get(BulkImport, bulk_import_id)
+        if existing_import is None:
+            return jsonify({'error': 'Bulk import not found'}), 404
+        return jsonify(bulk_import_status(existing_import))
+
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def get_job_status(job_id):
+        status = job_queue.status(job_id)
+        if status is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(dict(status, job_id=job_id))
+
+    @app.route('/healthz', methods=['GET'])
+    def healthz():
+        health = check_openai_connection()
+        return jsonify({'status': 'ok' if health['ok'] else 'degraded', 'openai': health}), 200 if health['ok'] else 503
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    @app.before_request
+    def start_request_profile():
+        if request.args.get('profile') == '1':
+            g.profiler = start_profile(request.endpoint or 'request')
+
+    @app.after_request
+    def finish_request_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            response.headers['X-Profile'] = write_profile(profiler, f"request-{request.endpoint}")
+        return response
+
+    @app.teardown_request
+    def discard_request_profile(error=None):
+        # after_request is skipped when a view raises; never leave the profiler attached to the thread.
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+
+    @app.route('/api/cache-stats', methods=['GET'])
+    def get_cache_stats():
+        return jsonify(assessment_cache.snapshot())
 
     @app.route('/get-latest-assessment', methods=['GET'])
+    @cached_response
     def get_latest_assessment():
         latest_assessment = Assessment.query.order_by(Assessment.id.desc()).first()
         if latest_assessment:
@@ -94,47 +394,59 @@ def init_routes(app, socketio):
         return redirect(url_for('dashboard'))
 
     @app.route('/api/insights')
+    @cached_response
     def get_insights():
         try:
-            avg_insights = db.session.query(
-                func.avg(func.jsonb_array_length(Assessment.result['key_insights'])).label('avg_key_insights'),
-                func.avg(func.jsonb_array_length(Assessment.result['user_pain_points'])).label('avg_user_pain_points'),
-                func.avg(func.jsonb_array_length(Assessment.result['areas_for_improvement'])).label('avg_areas_for_improvement')
-            ).first()
-
-            key_findings = db.session.query(
-                Assessment.result['key_insights'][0].astext.label('key_insight'),
-                Assessment.result['user_pain_points'][0].astext.label('user_pain_point'),
-                Assessment.result['areas_for_improvement'][0].astext.label('area_for_improvement')
-            ).order_by(func.random()).limit(3).all()
-
-            project_comparison = db.session.query(
-                Project.name,
-                func.avg(func.jsonb_array_length(Assessment.result['key_insights'])).label('avg_key_insights'),
-                func.avg(func.jsonb_array_length(Assessment.result['user_pain_points'])).label('avg_user_pain_points'),
-                func.avg(func.jsonb_array_length(Assessment.result['areas_for_improvement'])).label('avg_areas_for_improvement'),
-                func.avg(func.cast(func.cast(Assessment.result['overall_quality_score'].astext, db.String), db.Float)).label('avg_quality_score')
-            ).join(Transcription, Transcription.project_id == Project.id) \
-             .join(Assessment, Assessment.transcription_id == Transcription.id) \
-             .group_by(Project.id).all()
+            with span('insights_averages_query'):
+                avg_insights = db.session.query(
+                    func.avg(Assessment.key_insight_count).label('avg_key_insights'),
+                    func.avg(Assessment.pain_point_count).label('avg_user_pain_points'),
+                    func.avg(Assessment.improvement_count).label('avg_areas_for_improvement')
+                ).first()
+
+            with span('insights_findings_query'):
+                key_findings = [
+                    {
+                        'key_insight': first_item(sample.result, 'key_insights'),
+                        'user_pain_point': first_item(sample.result, 'user_pain_points'),
+                        'area_for_improvement': first_item(sample.result, 'areas_for_improvement')
+                    } for sample in latest_findings(3)
+                ]
+
+            with span('insights_projects_query'):
+                project_comparison = db.session.query(Project.name, ProjectStats) \
+                    .join(ProjectStats, ProjectStats.project_id == Project.id) \
+                    .filter(ProjectStats.assessment_count > 0).all()
 
             return jsonify({
                 'avg_insights': [float(avg_insights.avg_key_insights or 0), float(avg_insights.avg_user_pain_points or 0), float(avg_insights.avg_areas_for_improvement or 0)] if avg_insights else [0, 0, 0],
                 'key_findings': [
-                    {'key_insight': kf.key_insight, 'user_pain_point': kf.user_pain_point, 'area_for_improvement': kf.area_for_improvement}
-                    for kf in key_findings if kf.key_insight and kf.user_pain_point and kf.area_for_improvement
+                    kf for kf in key_findings if kf['key_insight'] and kf['user_pain_point'] and kf['area_for_improvement']
                 ],
                 'project_comparison': [
-                    {
-                        'name': project.name,
-                        'avg_key_insights': float(project.avg_key_insights or 0),
-                        'avg_user_pain_points': float(project.avg_user_pain_points or 0),
-                        'avg_areas_for_improvement': float(project.avg_areas_for_improvement or 0),
-                        'avg_quality_score': float(project.avg_quality_score or 0)
-                    } for project in project_comparison
+                    dict(stats.averages(), name=name) for name, stats in project_comparison
                 ]
             })
         except Exception as e:
             logger.error(f"Error in get_insights: {str(e)}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             return jsonify({'error': 'An error occurred while fetching insights'}), 500
+
+    @app.route('/api/projects/<int:project_id>/themes')
+    @cached_response
+    def get_project_themes(project_id):
+        if db.session.get(Project, project_id) is None:
+            return jsonify({'error': 'Project not found'}), 404
+        kind = request.args.get('kind')
+        if kind is not None and kind not in EMBEDDED_KEYS:
+            return jsonify({'error': f"kind must be one of: {', '.join(EMBEDDED_KEYS)}"}), 400
+        try:
+            themes = project_themes(project_id, kinds=[kind] if kind else EMBEDDED_KEYS,
+                                    threshold=request.args.get('threshold', THEME_SIMILARITY, type=float),
+                                    min_size=request.args.get('min_size', 2, type=int),
+                                    limit=request.args.get('limit', 20, type=int))
+            return jsonify({'project_id': project_id, 'themes': themes})
+        except Exception as e:
+            logger.error(f"Error in get_project_themes: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return jsonify({'error': 'An error occurred while clustering themes'}), 500
@@ -0,0 +1,70 @@
+import json
+
+
+class SectionStreamParser:
+    """Incrementally parse a streamed JSON object, yielding top-level members as they complete.
+
+    The model reply may wrap the object in a ```json fence or prose; everything before
+    the first ``{`` is ignored. Feed text deltas with ``feed`` and iterate over the
+    ``(key, value)`` pairs it returns.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+        self.done = False
+
+    def feed(self, text):
+        self.buffer += text
+        sections = []
+        while self.pos < len(self.buffer) and not self.done:
+            char = self.buffer[self.pos]
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+                self.pos += 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    section = self._parse_member(self.buffer[self.member_start:self.pos])
+                    if section:
+                        sections.append(section)
+                    self.done = True
+            elif char == ',' and self.depth == 1:
+                section = self._parse_member(self.buffer[self.member_start:self.pos])
+                if section:
+                    sections.append(section)
+                self.member_start = self.pos + 1
+            self.pos += 1
+        return sections
+
+    @staticmethod
+    def _parse_member(text):
+        text = text.strip()
+        if not text:
+            return None
+        try:
+            member = json.loads('{' + text + '}')
+        except json.JSONDecodeError:
+            return None
+        return next(iter(member.items()))
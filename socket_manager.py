@@ -0,0 +1,212 @@
+"""Socket.IO client managers for running more than one web worker.
+
+Events are addressed to rooms keyed by transcription and project rather than to a
+connection's sid, so whichever worker runs a job can reach the client through the
+message queue, and a client that reconnects (to any worker) picks its results back up
+by subscribing to the room again.
+
+``SOCKETIO_MESSAGE_QUEUE`` selects the backend:
+
+- unset: single process, events stay in memory (the default)
+- ``redis://`` / ``rediss://``, ``kafka://``, ``zmq+tcp://``, ``amqp://``: the managers shipped
+  with python-socketio, for production
+- ``memory://<channel>``: several Socket.IO servers inside one process, for tests
+- ``file:///path/to/dir``: workers on one host sharing an append-only log, for local
+  multi-process runs without a broker
+
+Job statuses for ``/jobs/<id>`` are only shared between workers when ``JOB_QUEUE_URL``
+points to Redis. ``benchmarks/scale_out.py`` measures throughput by worker count.
+"""
+import os
+import json
+import uuid
+import fcntl
+import logging
+import threading
+import traceback
+from socketio import Manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE") or None
+SOCKETIO_CHANNEL = os.environ.get("SOCKETIO_CHANNEL", "verita-socketio")
+FILE_QUEUE_POLL_SECONDS = float(os.environ.get("FILE_QUEUE_POLL_SECONDS", 0.02))
+
+
+def transcription_room(transcription_id) -> str:
+    return f"transcription:{transcription_id}"
+
+
+def project_room(project_id) -> str:
+    return f"project:{project_id}"
+
+
+def job_rooms(transcription_id, project_id=None) -> list:
+    rooms = [transcription_room(transcription_id)]
+    if project_id is not None:
+        rooms.append(project_room(project_id))
+    return rooms
+
+
+class QueueClientManager(Manager):
+    """Relays emits and room changes to the other servers on ``channel`` via ``_publish``/``_listen``.
+
+    A compact counterpart of python-socketio's ``PubSubManager`` that Flask-SocketIO's test
+    client accepts. Acknowledgement callbacks only work for clients on the emitting server.
+    """
+
+    def __init__(self, channel=SOCKETIO_CHANNEL, write_only=False):
+        super().__init__()
+        self.channel = channel
+        self.write_only = write_only
+        self.host_id = uuid.uuid4().hex
+        self._listening = False
+
+    def initialize(self):
+        super().initialize()
+        # The test client calls initialize once per client; listen only once.
+        if self.write_only or self._listening:
+            return
+        self._listening = True
+        self.subscribe()
+        self.server.start_background_task(self._thread)
+
+    def subscribe(self):
+        pass
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        room = to or room
+        namespace = namespace or '/'
+        super().emit(event, data, namespace, room=room, skip_sid=skip_sid, callback=callback)
+        self._publish({'method': 'emit', 'event': event, 'namespace': namespace, 'room': room, 'skip_sid': skip_sid,
+                       'args': list(data) if isinstance(data, tuple) else [data], 'host_id': self.host_id})
+
+    def enter_room(self, sid, namespace, room, eio_sid=None):
+        if self.is_connected(sid, namespace):
+            return super().enter_room(sid, namespace, room, eio_sid=eio_sid)
+        self._publish({'method': 'enter_room', 'sid': sid, 'namespace': namespace, 'room': room,
+                       'host_id': self.host_id})
+
+    def leave_room(self, sid, namespace, room):
+        if self.is_connected(sid, namespace):
+            return super().leave_room(sid, namespace, room)
+        self._publish({'method': 'leave_room', 'sid': sid, 'namespace': namespace, 'room': room,
+                       'host_id': self.host_id})
+
+    def close_room(self, room, namespace):
+        super().close_room(room, namespace)
+        self._publish({'method': 'close_room', 'namespace': namespace, 'room': room, 'host_id': self.host_id})
+
+    def _handle(self, message):
+        method, namespace = message['method'], message['namespace']
+        if method == 'emit':
+            args = message['args']
+            super().emit(message['event'], args[0] if len(args) == 1 else tuple(args), namespace,
+                         room=message['room'], skip_sid=message['skip_sid'])
+        elif method == 'enter_room' and self.is_connected(message['sid'], namespace):
+            super().enter_room(message['sid'], namespace, message['room'])
+        elif method == 'leave_room' and self.is_connected(message['sid'], namespace):
+            super().leave_room(message['sid'], namespace, message['room'])
+        elif method == 'close_room':
+            super().close_room(message['room'], namespace)
+
+    def _thread(self):
+        for raw in self._listen():
+            try:
+                message = json.loads(raw)
+                if message.get('host_id') != self.host_id:
+                    self._handle(message)
+            except Exception as e:
+                logger.error(f"Error handling Socket.IO queue message: {str(e)}")
+                logger.error(f"Traceback: {traceback.format_exc()}")
+
+    def _publish(self, data):
+        raise NotImplementedError
+
+    def _listen(self):
+        raise NotImplementedError
+
+
+class MemoryClientManager(QueueClientManager):
+    """Socket.IO servers in one process sharing a channel; for tests.
+
+    Messages are JSON encoded so they go through the same serialization a broker would impose.
+    """
+    _channels = {}
+    _channels_lock = threading.Lock()
+
+    def __init__(self, channel=SOCKETIO_CHANNEL, write_only=False):
+        super().__init__(channel=channel, write_only=write_only)
+        self._queue = None
+
+    def subscribe(self):
+        self._queue = self.server.eio.create_queue()
+        with self._channels_lock:
+            self._channels.setdefault(self.channel, []).append(self._queue)
+
+    def _publish(self, data):
+        message = json.dumps(data)
+        with self._channels_lock:
+            subscribers = list(self._channels.get(self.channel, []))
+        for queue in subscribers:
+            queue.put(message)
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+
+class FileClientManager(QueueClientManager):
+    """Workers on one host sharing an append-only JSON Lines file per channel.
+
+    Each message is one locked append; listeners tail the file from where it ended when
+    they subscribed. The file is never truncated, so this is for development and
+    benchmarks rather than long-running deployments.
+    """
+
+    def __init__(self, url, channel=SOCKETIO_CHANNEL, write_only=False, poll_interval=FILE_QUEUE_POLL_SECONDS):
+        super().__init__(channel=channel, write_only=write_only)
+        directory = url[len('file://'):]
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{channel}.jsonl")
+        self.poll_interval = poll_interval
+        self._offset = None
+
+    def subscribe(self):
+        with open(self.path, 'a') as log:
+            self._offset = log.tell()
+
+    def _publish(self, data):
+        line = (json.dumps(data) + '\n').encode('utf-8')
+        with open(self.path, 'ab') as log:
+            fcntl.flock(log, fcntl.LOCK_EX)
+            try:
+                log.write(line)
+            finally:
+                fcntl.flock(log, fcntl.LOCK_UN)
+
+    def _listen(self):
+        with open(self.path, 'rb') as log:
+            log.seek(self._offset)
+            pending = b''
+            while True:
+                chunk = log.readline()
+                if not chunk:
+                    self.server.sleep(self.poll_interval)
+                    continue
+                pending += chunk
+                if pending.endswith(b'\n'):
+                    yield pending.decode('utf-8')
+                    pending = b''
+
+
+def socketio_options(url=SOCKETIO_MESSAGE_QUEUE, channel=SOCKETIO_CHANNEL) -> dict:
+    """Keyword arguments for ``SocketIO(app, ...)`` selecting the client manager for ``url``."""
+    if not url:
+        return {}
+    if url.startswith('memory://'):
+        return {'client_manager': MemoryClientManager(channel=url[len('memory://'):] or channel)}
+    if url.startswith('file://'):
+        return {'client_manager': FileClientManager(url, channel=channel)}
+    return {'message_queue': url, 'channel': channel}
@@ -0,0 +1,126 @@
+"""Speech-to-text engines run inside the transcription process pool.
+
+Engines are pickled into the worker processes, so they hold only plain settings and
+create clients lazily on first use.
+"""
+import io
+import os
+import wave
+import hashlib
+import logging
+from audio_chunking import read_chunk, to_pcm16
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SPEECH_ENGINE = os.environ.get("SPEECH_ENGINE", "speech_recognition")
+SPEECH_RECOGNITION_METHOD = os.environ.get("SPEECH_RECOGNITION_METHOD", "recognize_google")
+SPEECH_LANGUAGE = os.environ.get("SPEECH_LANGUAGE", "en-US")
+OPENAI_TRANSCRIPTION_MODEL = os.environ.get("OPENAI_TRANSCRIPTION_MODEL", "whisper-1")
+
+
+def wav_bytes(samples, sample_rate) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(sample_rate)
+        output.writeframes(to_pcm16(samples))
+    return buffer.getvalue()
+
+
+class SpeechRecognitionEngine:
+    """Any ``recognize_*`` method of the speech_recognition package, e.g. google, sphinx or whisper."""
+
+    name = "speech_recognition"
+
+    def __init__(self, method=SPEECH_RECOGNITION_METHOD, language=SPEECH_LANGUAGE):
+        self.method = method
+        self.language = language
+
+    def transcribe(self, samples, sample_rate) -> str:
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            raise ValueError("SPEECH_ENGINE is speech_recognition but the SpeechRecognition package is not installed")
+        audio = sr.AudioData(to_pcm16(samples), sample_rate, 2)
+        try:
+            return getattr(sr.Recognizer(), self.method)(audio, language=self.language)
+        except sr.UnknownValueError:
+            # Nothing intelligible in this chunk.
+            return ""
+
+
+class OpenAITranscriptionEngine:
+    """OpenAI's transcription endpoint, called through the shared rate-limited client layer."""
+
+    name = "openai"
+
+    def __init__(self, model=OPENAI_TRANSCRIPTION_MODEL, language=SPEECH_LANGUAGE):
+        self.model = model
+        self.language = language.split('-')[0]
+        self._layer = None
+
+    def __getstate__(self):
+        # Each worker process builds its own client.
+        return dict(self.__dict__, _layer=None)
+
+    @property
+    def layer(self):
+        if self._layer is None:
+            from chat_request import get_client_layer
+            self._layer = get_client_layer()
+        return self._layer
+
+    def transcribe(self, samples, sample_rate) -> str:
+        response = self.layer.call(self.layer.client.audio.transcriptions.create, model=self.model,
+                                   language=self.language, file=("chunk.wav", wav_bytes(samples, sample_rate)))
+        return response.text
+
+
+class LocalSpeechEngine:
+    """Offline stand-in: deterministic placeholder words, about ``words_per_second`` of voiced audio."""
+
+    name = "local"
+    VOCABULARY = ("the", "export", "button", "was", "hard", "to", "find", "and", "I", "expected", "settings",
+                  "menu", "would", "show", "it", "saved", "but", "nothing", "happened", "so", "tried", "again")
+
+    def __init__(self, words_per_second=2.5, threshold=0.01):
+        self.words_per_second = words_per_second
+        self.threshold = threshold
+
+    def transcribe(self, samples, sample_rate) -> str:
+        voiced_seconds = float((abs(samples) > self.threshold).sum()) / sample_rate
+        count = int(voiced_seconds * self.words_per_second)
+        if count == 0:
+            return ""
+        seed = hashlib.blake2b(to_pcm16(samples[:sample_rate]), digest_size=8).digest()
+        start = int.from_bytes(seed, 'big')
+        return ' '.join(self.VOCABULARY[(start + i * 7) % len(self.VOCABULARY)] for i in range(count))
+
+
+_engines = {}
+
+
+def get_speech_engine(name: str = None):
+    name = name or SPEECH_ENGINE
+    if name not in _engines:
+        if name == "speech_recognition":
+            _engines[name] = SpeechRecognitionEngine()
+        elif name == "openai":
+            _engines[name] = OpenAITranscriptionEngine()
+        elif name == "local":
+            _engines[name] = LocalSpeechEngine()
+        else:
+            raise ValueError(f"Unknown speech engine: {name}")
+    return _engines[name]
+
+
+def register_speech_engine(name: str, engine):
+    _engines[name] = engine
+
+
+def transcribe_chunk(engine, path, chunk) -> str:
+    """Process pool entry point: decode one chunk from ``path`` and run ``engine`` on it."""
+    samples = read_chunk(path, chunk)
+    return engine.transcribe(samples, chunk.sample_rate).strip()
@@ -0,0 +1,54 @@
+"""Test setup: a throwaway SQLite database and the offline backends, configured before the app is imported."""
+import os
+import tempfile
+
+import pytest
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='verita-test-'), 'test.db')}"
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+os.environ['EMBEDDING_BACKEND'] = 'local'
+os.environ['BATCH_BACKEND'] = 'local'
+os.environ['FINE_TUNE_BACKEND'] = 'stub'
+os.environ['FINE_TUNE_POLL_MIN_SECONDS'] = '0'
+os.environ['VERIFY_QUOTES'] = '0'
+
+from app import app as flask_app  # noqa: E402
+from extensions import db  # noqa: E402
+from assessment_cache import assessment_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    assessment_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class FakeSocketIO:
+    """Records background tasks and emits instead of running them."""
+
+    def __init__(self):
+        self.tasks = []
+        self.emitted = []
+
+    def start_background_task(self, target, *args, **kwargs):
+        self.tasks.append((target, args, kwargs))
+
+    def emit(self, event, data, **kwargs):
+        self.emitted.append((event, data))
+
+    def sleep(self, seconds):
+        pass
+
+
+@pytest.fixture
+def fake_socketio():
+    return FakeSocketIO()
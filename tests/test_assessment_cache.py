@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta
+
+from assessment_cache import AssessmentCache, make_cache_key
+from extensions import db
+from models import AssessmentCacheEntry
+
+
+def test_cache_key_ignores_whitespace_only_differences():
+    assert make_cache_key("I could not  find\nthe button ", "nielsen", "gpt-4o", "v1") == \
+        make_cache_key("I could not find the button", "nielsen", "gpt-4o", "v1")
+
+
+def test_cache_key_covers_framework_model_and_prompt_version():
+    base = make_cache_key("transcript", "nielsen", "gpt-4o", "v1")
+    assert base != make_cache_key("transcript", "ideo", "gpt-4o", "v1")
+    assert base != make_cache_key("transcript", "nielsen", "gpt-4o-mini", "v1")
+    assert base != make_cache_key("transcript", "nielsen", "gpt-4o", "v2")
+
+
+def test_cache_key_parts_do_not_run_together():
+    assert make_cache_key("ab", "c", "m", "v") != make_cache_key("a", "bc", "m", "v")
+
+
+def test_memory_hit_returns_a_copy():
+    cache = AssessmentCache(persistent=False)
+    cache.set('key', {'key_insights': ['a']}, 'nielsen', 'gpt-4o', 'v1')
+    cache.get('key')['key_insights'].append('b')
+    assert cache.get('key') == {'key_insights': ['a']}
+    assert cache.snapshot()['memory_hits'] == 2
+
+
+def test_expired_memory_entry_is_a_miss():
+    cache = AssessmentCache(persistent=False, ttl_seconds=60)
+    cache._remember('key', {'a': 1}, 0, time.time() - 120)
+    assert cache.get('key') is None
+    assert cache.snapshot()['misses'] == 1
+
+
+def test_get_any_counts_one_lookup():
+    cache = AssessmentCache(persistent=False)
+    assert cache.get_any(['full', 'fast']) == (None, None)
+    cache.set('fast', {'a': 1}, 'nielsen', 'gpt-4o-mini', 'v1')
+    assert cache.get_any(['full', 'fast']) == ('fast', {'a': 1})
+    stats = cache.snapshot()
+    assert (stats['misses'], stats['memory_hits'], stats['hit_ratio']) == (1, 1, 0.5)
+
+
+def test_persisted_entry_survives_a_cleared_memory_tier(app):
+    cache = AssessmentCache()
+    cache.set('key', {'a': 1}, 'nielsen', 'gpt-4o', 'v1', latency_ms=1500)
+    cache.clear()
+    assert cache.get('key') == {'a': 1}
+    assert cache.snapshot()['db_hits'] == 1
+    # created_at is naive UTC; the reloaded entry must not look hours old or in the future.
+    stored_at = cache._entries['key'][0]
+    assert abs(stored_at - time.time()) < 60
+
+
+def test_purge_expired_removes_old_rows(app):
+    cache = AssessmentCache(ttl_seconds=3600)
+    cache.set('fresh', {'a': 1}, 'nielsen', 'gpt-4o', 'v1')
+    cache.set('stale', {'a': 2}, 'nielsen', 'gpt-4o', 'v1')
+    db.session.get(AssessmentCacheEntry, 'stale').created_at = datetime.utcnow() - timedelta(hours=2)
+    db.session.commit()
+    assert cache.purge_expired() == 1
+    assert db.session.get(AssessmentCacheEntry, 'fresh') is not None
@@ -0,0 +1,63 @@
+import pytest
+
+from batch_backends import LocalBatchBackend, register_batch_backend
+from bulk_import import create_bulk_import, poll_bulk_import, bulk_import_status
+from models import Assessment, Project
+from extensions import db
+
+LONG_TEXT = "I could not find the export button and gave up after ten minutes of searching the menus. " * 3
+
+
+@pytest.fixture
+def project(app):
+    project = Project(name='Imports')
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+def use_backend(backend):
+    register_batch_backend('local', backend)
+    return backend
+
+
+def test_short_records_count_as_failed_from_the_start(project):
+    use_backend(LocalBatchBackend())
+    bulk_import = create_bulk_import([{'text': LONG_TEXT}, {'text': 'too short'}], project.id, 'nielsen',
+                                     backend_name='local')
+    status = bulk_import_status(bulk_import)
+    assert (status['status'], status['completed'], status['failed']) == ('running', 0, 1)
+
+
+def test_poll_counts_graded_and_error_results_with_the_same_rule(project):
+    def responder(messages, model):
+        if 'broken' in messages[-1]['content']:
+            raise RuntimeError('batch request failed')
+        return LocalBatchBackend.default_responder(messages, model)
+
+    use_backend(LocalBatchBackend(responder=responder))
+    records = [{'text': LONG_TEXT}, {'text': 'broken ' + LONG_TEXT}, {'text': 'short'}]
+    bulk_import = create_bulk_import(records, project.id, 'nielsen', backend_name='local')
+
+    status = bulk_import_status(poll_bulk_import(bulk_import.id))
+    assert status['status'] == 'completed'
+    assert (status['completed'], status['failed']) == (1, 2)
+    assert status['completed'] + status['failed'] == status['total']
+    assert Assessment.query.count() == 3
+
+
+def test_poll_is_idempotent(project):
+    use_backend(LocalBatchBackend())
+    bulk_import = create_bulk_import([{'text': LONG_TEXT}, {'text': LONG_TEXT + ' again'}], project.id, 'nielsen',
+                                     backend_name='local')
+    first = bulk_import_status(poll_bulk_import(bulk_import.id))
+    second = bulk_import_status(poll_bulk_import(bulk_import.id))
+    assert first == second
+    assert Assessment.query.count() == 2
+
+
+def test_batches_wait_until_the_backend_completes(project):
+    use_backend(LocalBatchBackend(polls_until_complete=2))
+    bulk_import = create_bulk_import([{'text': LONG_TEXT}], project.id, 'nielsen', backend_name='local')
+    assert poll_bulk_import(bulk_import.id).status == 'running'
+    assert poll_bulk_import(bulk_import.id).status == 'completed'
@@ -0,0 +1,75 @@
+import pytest
+
+import fine_tuning
+from extensions import db
+from fine_tuning import (StubFineTuningAPI, ensure_fine_tune_watcher, resume_fine_tune_watcher,
+                         watch_fine_tune_jobs)
+from models import FineTuneJob
+
+
+@pytest.fixture(autouse=True)
+def watcher_stopped():
+    fine_tuning._watcher_running = False
+    yield
+    fine_tuning._watcher_running = False
+
+
+def add_job(api, status='validating_files'):
+    remote = api.create('file-test', 'gpt-test')
+    job = FineTuneJob(openai_job_id=remote.id, base_model='gpt-test', training_file_id='file-test', status=status)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_only_one_watcher_starts(app, fake_socketio):
+    ensure_fine_tune_watcher(app, fake_socketio)
+    ensure_fine_tune_watcher(app, fake_socketio)
+    assert len(fake_socketio.tasks) == 1
+    assert fine_tuning._watcher_running
+
+
+def test_watcher_clears_its_flag_when_nothing_is_pending(app, fake_socketio):
+    ensure_fine_tune_watcher(app, fake_socketio)
+    watch_fine_tune_jobs(app, fake_socketio, api=StubFineTuningAPI())
+    assert not fine_tuning._watcher_running
+    ensure_fine_tune_watcher(app, fake_socketio)
+    assert len(fake_socketio.tasks) == 2
+
+
+def test_watcher_polls_jobs_to_completion(app, fake_socketio):
+    api = StubFineTuningAPI()
+    job_id = add_job(api)
+    ensure_fine_tune_watcher(app, fake_socketio)
+    watch_fine_tune_jobs(app, fake_socketio, api=api)
+
+    job = db.session.get(FineTuneJob, job_id)
+    assert job.status == 'succeeded'
+    assert job.fine_tuned_model and job.finished_at is not None
+    assert [data['status'] for event, data in fake_socketio.emitted if event == 'fine_tune_status'] == \
+        ['queued', 'running', 'succeeded']
+    assert not fine_tuning._watcher_running
+
+
+def test_watcher_clears_its_flag_when_polling_crashes(app, fake_socketio):
+    def crash(seconds):
+        raise RuntimeError('server shutting down')
+
+    api = StubFineTuningAPI()
+    add_job(api)
+    fake_socketio.sleep = crash
+    ensure_fine_tune_watcher(app, fake_socketio)
+    with pytest.raises(RuntimeError):
+        watch_fine_tune_jobs(app, fake_socketio, api=api)
+    assert not fine_tuning._watcher_running
+
+
+def test_resume_starts_a_watcher_only_for_unfinished_jobs(app, fake_socketio):
+    api = StubFineTuningAPI()
+    add_job(api, status='succeeded')
+    resume_fine_tune_watcher(app, fake_socketio)
+    assert fake_socketio.tasks == []
+
+    add_job(api)
+    resume_fine_tune_watcher(app, fake_socketio)
+    assert len(fake_socketio.tasks) == 1
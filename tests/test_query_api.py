@@ -0,0 +1,51 @@
+import pytest
+
+from extensions import db
+from models import Transcription
+from query_api import encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def transcriptions(app):
+    rows = [Transcription(text=f"Transcript number {index}") for index in range(5)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor!')
+
+
+def test_pages_walk_newest_first_without_overlap(client, transcriptions):
+    seen = []
+    cursor = None
+    while True:
+        args = {'limit': 2, 'cursor': cursor} if cursor else {'limit': 2}
+        response = client.get('/api/transcriptions', query_string=args)
+        assert response.status_code == 200
+        page = response.get_json()
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+        assert len(page['items']) == 2
+    assert seen == sorted(transcriptions, reverse=True)
+
+
+def test_rows_added_between_pages_do_not_shift_the_next_page(client, transcriptions):
+    first = client.get('/api/transcriptions?limit=2').get_json()
+    db.session.add(Transcription(text="Arrived after the first page"))
+    db.session.commit()
+    second = client.get('/api/transcriptions', query_string={'limit': 2, 'cursor': first['next_cursor']}).get_json()
+    assert [item['id'] for item in second['items']] == sorted(transcriptions, reverse=True)[2:4]
+
+
+def test_bad_paging_arguments_are_400(client, transcriptions):
+    assert client.get('/api/transcriptions?cursor=%%%').status_code == 400
+    assert client.get('/api/transcriptions?limit=0').status_code == 400
@@ -0,0 +1,71 @@
+import os
+import re
+
+# Rough average for English text with OpenAI tokenizers; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+CHUNK_TOKEN_BUDGET = int(os.environ.get("CHUNK_TOKEN_BUDGET", 6000))
+LONG_TRANSCRIPT_TOKENS = int(os.environ.get("LONG_TRANSCRIPT_TOKENS", 12000))
+
+TIMESTAMP_PATTERN = re.compile(r'^\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?[\])]?')
+SPEAKER_PATTERN = re.compile(r"^\s*[A-Z][\w .'-]{0,40}:\s")
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def is_long_transcript(text: str, threshold: int = LONG_TRANSCRIPT_TOKENS) -> bool:
+    return estimate_tokens(text) > threshold
+
+
+def split_segments(text: str) -> list:
+    """Split a transcript into utterances, starting a new one at each timestamp or speaker label."""
+    segments = []
+    current = []
+    for line in text.splitlines():
+        if current and (TIMESTAMP_PATTERN.match(line) or SPEAKER_PATTERN.match(line)):
+            segments.append('\n'.join(current))
+            current = []
+        current.append(line)
+    if current:
+        segments.append('\n'.join(current))
+    return [segment for segment in segments if segment.strip()]
+
+
+def split_oversized(segment: str, budget: int) -> list:
+    pieces = []
+    current = ''
+    for sentence in SENTENCE_PATTERN.split(segment):
+        if current and estimate_tokens(current + ' ' + sentence) > budget:
+            pieces.append(current)
+            current = ''
+        while estimate_tokens(sentence) > budget:
+            cut = budget * CHARS_PER_TOKEN
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_transcript(text: str, budget: int = CHUNK_TOKEN_BUDGET) -> list:
+    """Group utterances into chunks of at most ``budget`` estimated tokens without splitting a turn."""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for segment in split_segments(text):
+        tokens = estimate_tokens(segment)
+        pieces = split_oversized(segment, budget) if tokens > budget else [segment]
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > budget:
+                chunks.append('\n'.join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks